@@ -20,6 +20,7 @@
 #
 #############################################################################
 import calendar
+from collections import defaultdict
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 from odoo import api, fields, models, _
@@ -365,111 +366,135 @@ class AccountAssetAsset(models.Model):
             undone_dotation_number += 1
         return undone_dotation_number
 
-    def compute_depreciation_board(self):
+    def _get_depreciation_dates(self, depreciation_date, count, cache):
+        """Dates of the next ``count`` depreciations starting at
+        ``depreciation_date``. Assets sharing a start date and period share
+        the same schedule, it is computed once per run and kept in ``cache``.
+        """
+        key = ('dates', depreciation_date, count, self.method_period)
+        if key not in cache:
+            dates = []
+            for _i in range(count):
+                dates.append(depreciation_date)
+                # Considering Depr. Period as months
+                depreciation_date = depreciation_date + relativedelta(
+                    months=+self.method_period)
+            cache[key] = dates
+        return cache[key]
+
+    def _get_depreciation_board(self, cache):
+        """Values of the unposted depreciation lines of the asset"""
         self.ensure_one()
+        board = []
+        if self.value_residual == 0.0:
+            return board
         posted_depreciation_line_ids = self.depreciation_line_ids.filtered(
             lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
-        unposted_depreciation_line_ids = self.depreciation_line_ids.filtered(
-            lambda x: not x.move_check)
-
-        # Remove old unposted depreciation lines. We cannot use unlink()
-        # with One2many field
-        commands = [(2, line_id.id, False) for line_id in
-                    unposted_depreciation_line_ids]
-
-        if self.value_residual != 0.0:
-            amount_to_depr = residual_amount = self.value_residual
-            if self.prorata:
-                # if we already have some previous validated entries,
-                # starting date is last entry + method perio
-                if posted_depreciation_line_ids and \
-                        posted_depreciation_line_ids[-1].depreciation_date:
-                    last_depreciation_date = datetime.strptime(
-                        posted_depreciation_line_ids[-1].depreciation_date,
-                        DF).date()
-                    depreciation_date = last_depreciation_date + relativedelta(
-                        months=+self.method_period)
-                else:
-                    depreciation_date = datetime.strptime(
-                        str(self._get_last_depreciation_date()[self.id]),
-                        DF).date()
+        amount_to_depr = residual_amount = self.value_residual
+        if self.prorata:
+            # if we already have some previous validated entries,
+            # starting date is last entry + method perio
+            if posted_depreciation_line_ids and \
+                    posted_depreciation_line_ids[-1].depreciation_date:
+                last_depreciation_date = fields.Date.to_date(
+                    posted_depreciation_line_ids[-1].depreciation_date)
+                depreciation_date = last_depreciation_date + relativedelta(
+                    months=+self.method_period)
             else:
-                # depreciation_date = 1st of January of purchase year if
-                # annual valuation, 1st of
-                # purchase month in other cases
-                if self.method_period >= 12:
-                    if self.company_id.fiscalyear_last_month:
-                        asset_date = (date(year=int(self.date.year),
-                                           month=int(
-                                               self.company_id.fiscalyear_last_month),
-                                           day=int(
-                                               self.company_id.
-                                               fiscalyear_last_day)) +
-                                      relativedelta(days=1) + relativedelta(
-                                    year=int(
-                                        self.date.year)))
-                        # e.g. 2018-12-31 +1 -> 2019
-                    else:
-                        asset_date = datetime.strptime(
-                            str(self.date)[:4] + '-01-01', DF).date()
-                else:
-                    asset_date = datetime.strptime(str(self.date)[:7] + '-01',
-                                                   DF).date()
-                # if we already have some previous validated entries, starting
-                # date isn't 1st January but last entry + method period
-                if posted_depreciation_line_ids and \
-                        posted_depreciation_line_ids[-1].depreciation_date:
-                    last_depreciation_date = datetime.strptime(str(
-                        posted_depreciation_line_ids[-1].depreciation_date),
-                        DF).date()
-                    depreciation_date = last_depreciation_date + relativedelta(
-                        months=+self.method_period)
+                depreciation_date = datetime.strptime(
+                    str(cache['last_depreciation_dates'][self.id]),
+                    DF).date()
+        else:
+            # depreciation_date = 1st of January of purchase year if
+            # annual valuation, 1st of
+            # purchase month in other cases
+            if self.method_period >= 12:
+                if self.company_id.fiscalyear_last_month:
+                    asset_date = (date(year=int(self.date.year),
+                                       month=int(
+                                           self.company_id.fiscalyear_last_month),
+                                       day=int(
+                                           self.company_id.
+                                           fiscalyear_last_day)) +
+                                  relativedelta(days=1) + relativedelta(
+                                year=int(
+                                    self.date.year)))
+                    # e.g. 2018-12-31 +1 -> 2019
                 else:
-                    depreciation_date = asset_date
-            day = depreciation_date.day
-            month = depreciation_date.month
-            year = depreciation_date.year
-            total_days = (year % 4) and 365 or 366
-
-            undone_dotation_number = self._compute_board_undone_dotation_nb(
-                depreciation_date, total_days)
-
-            for x in range(len(posted_depreciation_line_ids),
-                           undone_dotation_number):
-                sequence = x + 1
-                amount = self._compute_board_amount(sequence, residual_amount,
-                                                    amount_to_depr,
-                                                    undone_dotation_number,
-                                                    posted_depreciation_line_ids,
-                                                    total_days,
-                                                    depreciation_date)
-
-                amount = self.currency_id.round(amount)
-                if float_is_zero(amount,
-                                 precision_rounding=self.currency_id.rounding):
-                    continue
-                residual_amount -= amount
-                vals = {
-                    'amount': amount,
-                    'asset_id': self.id,
-                    'sequence': sequence,
-                    'name': (self.code or '') + '/' + str(sequence),
-                    'remaining_value': residual_amount if
-                    residual_amount >= 0 else 0.0,
-                    'depreciated_value': self.value - (
-                            self.salvage_value + residual_amount),
-                    'depreciation_date': depreciation_date.strftime(DF),
-                }
-                commands.append((0, False, vals))
-                # Considering Depr. Period as months
-                depreciation_date = date(year, month, day) + relativedelta(
+                    asset_date = datetime.strptime(
+                        str(self.date)[:4] + '-01-01', DF).date()
+            else:
+                asset_date = datetime.strptime(str(self.date)[:7] + '-01',
+                                               DF).date()
+            # if we already have some previous validated entries, starting
+            # date isn't 1st January but last entry + method period
+            if posted_depreciation_line_ids and \
+                    posted_depreciation_line_ids[-1].depreciation_date:
+                last_depreciation_date = datetime.strptime(str(
+                    posted_depreciation_line_ids[-1].depreciation_date),
+                    DF).date()
+                depreciation_date = last_depreciation_date + relativedelta(
                     months=+self.method_period)
-                day = depreciation_date.day
-                month = depreciation_date.month
-                year = depreciation_date.year
-
-        self.write({'depreciation_line_ids': commands})
+            else:
+                depreciation_date = asset_date
+        total_days = (depreciation_date.year % 4) and 365 or 366
+
+        undone_key = ('undone', depreciation_date, self.method_time,
+                      self.method_end, self.method_number,
+                      self.method_period, self.prorata)
+        if undone_key not in cache:
+            cache[undone_key] = self._compute_board_undone_dotation_nb(
+                depreciation_date, total_days)
+        undone_dotation_number = cache[undone_key]
+
+        # The date only moves forward when a line is kept, the n-th kept
+        # line gets the n-th date
+        dates = self._get_depreciation_dates(
+            depreciation_date,
+            max(undone_dotation_number - len(posted_depreciation_line_ids),
+                0), cache)
+        for x in range(len(posted_depreciation_line_ids),
+                       undone_dotation_number):
+            sequence = x + 1
+            depreciation_date = dates[len(board)]
+            amount = self._compute_board_amount(sequence, residual_amount,
+                                                amount_to_depr,
+                                                undone_dotation_number,
+                                                posted_depreciation_line_ids,
+                                                total_days,
+                                                depreciation_date)
+
+            amount = self.currency_id.round(amount)
+            if float_is_zero(amount,
+                             precision_rounding=self.currency_id.rounding):
+                continue
+            residual_amount -= amount
+            board.append({
+                'amount': amount,
+                'asset_id': self.id,
+                'sequence': sequence,
+                'name': (self.code or '') + '/' + str(sequence),
+                'remaining_value': residual_amount if
+                residual_amount >= 0 else 0.0,
+                'depreciated_value': self.value - (
+                        self.salvage_value + residual_amount),
+                'depreciation_date': depreciation_date,
+            })
+        return board
 
+    def compute_depreciation_board(self):
+        """Recompute the unposted depreciation lines of the assets. The
+        boards of all assets are computed first and then compared with the
+        existing unposted lines, only the lines that changed are written."""
+        self.mapped('depreciation_line_ids')
+        cache = {'last_depreciation_dates': {}}
+        if self.filtered('prorata'):
+            cache['last_depreciation_dates'] = (
+                self.filtered('prorata')._get_last_depreciation_date())
+        boards = {asset: asset._get_depreciation_board(cache)
+                  for asset in self}
+        self.env['account.asset.depreciation.line'].\
+            _sync_depreciation_board(boards)
         return True
 
     def validate(self):
@@ -651,8 +676,7 @@ class AccountAssetAsset(models.Model):
     def write(self, vals):
         res = super(AccountAssetAsset, self).write(vals)
         if 'depreciation_line_ids' not in vals and 'state' not in vals:
-            for rec in self:
-                rec.compute_depreciation_board()
+            self.compute_depreciation_board()
         return res
 
     def open_entries(self):
@@ -707,6 +731,52 @@ class AccountAssetDepreciationLine(models.Model):
                                               line.move_id.state == 'posted')\
                 else False
 
+    def _get_board_changes(self, vals):
+        """Fields of ``vals`` that differ from the line"""
+        self.ensure_one()
+        changes = {}
+        currency = self.asset_id.currency_id
+        for fname in ('amount', 'remaining_value', 'depreciated_value'):
+            if currency.compare_amounts(self[fname], vals[fname]):
+                changes[fname] = vals[fname]
+        if self.depreciation_date != vals['depreciation_date']:
+            changes['depreciation_date'] = vals['depreciation_date']
+        if self.name != vals['name']:
+            changes['name'] = vals['name']
+        return changes
+
+    @api.model
+    def _sync_depreciation_board(self, boards):
+        """Apply computed boards ``{asset: [line values]}`` to the unposted
+        lines. Existing lines are matched by sequence, unchanged lines are
+        left untouched, changed lines are updated, missing lines are created
+        and the remaining ones are removed, each with a single ORM call."""
+        to_create = []
+        to_unlink = self.browse()
+        to_write = defaultdict(lambda: self.browse())
+        for asset, board in boards.items():
+            unposted = {}
+            for line in asset.depreciation_line_ids.filtered(
+                    lambda x: not x.move_check):
+                if line.sequence in unposted:
+                    to_unlink |= line
+                else:
+                    unposted[line.sequence] = line
+            for vals in board:
+                line = unposted.pop(vals['sequence'], None)
+                if not line:
+                    to_create.append(vals)
+                    continue
+                changes = line._get_board_changes(vals)
+                if changes:
+                    to_write[tuple(sorted(changes.items()))] |= line
+            for line in unposted.values():
+                to_unlink |= line
+        to_unlink.unlink()
+        for changes, lines in to_write.items():
+            lines.write(dict(changes))
+        return self.create(to_create)
+
     def create_move(self, post_move=True):
         created_moves = self.env['account.move']
         prec = self.env['decimal.precision'].precision_get('Account')
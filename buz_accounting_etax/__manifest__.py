@@ -1,6 +1,6 @@
 {
     'name': 'BUZ Accounting E-Tax Integration',
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.1.0',
     'category': 'Accounting',
     'summary': 'การเชื่อมต่อระบบ E-Tax สำหรับส่งใบกำกับภาษี',
     'description': '''
@@ -9,6 +9,7 @@
         - ตั้งค่าการเชื่อมต่อ API
         - ติดตามสถานะการส่ง
         - ดาวน์โหลด PDF และ XML
+        - คิวส่งเอกสารแบบเบื้องหลัง (worker pool, ส่งซ้ำอัตโนมัติ, จำกัดอัตราการส่ง)
     ''',
     'author': 'BUZ Team',
     'website': 'https://www.buzteam.com',
@@ -16,6 +17,7 @@
     'data': [
         'security/ir.model.access.csv',
         'data/etax_data.xml',
+        'data/ir_cron_data.xml',
         'views/etax_config_views.xml',
         'views/etax_transaction_views.xml',
     ],
@@ -0,0 +1,56 @@
+import json
+import uuid
+
+from odoo import http, tools
+from odoo.http import request
+
+
+class EtaxMockController(http.Controller):
+    """Endpoint จำลอง E-Tax API สำหรับทดสอบ
+
+    เปิดใช้งานเมื่อรัน test หรือกำหนด ir.config_parameter
+    buz_accounting_etax.enable_mock_endpoint = True
+    - ?status=503 จำลอง HTTP error (ใช้ทดสอบการส่งซ้ำ)
+    - ?result=ER จำลองข้อผิดพลาดจาก API
+    """
+
+    def _mock_enabled(self):
+        return tools.config['test_enable'] or tools.str2bool(
+            request.env['ir.config_parameter'].sudo().get_param(
+                'buz_accounting_etax.enable_mock_endpoint', 'False'))
+
+    @http.route('/etax/mock/etaxsigndocumentjson', type='http', auth='none',
+                methods=['POST'], csrf=False)
+    def mock_sign_document(self, status=None, result=None, **kwargs):
+        if not self._mock_enabled():
+            return request.not_found()
+        if status:
+            return request.make_json_response({'status': 'ER', 'message': 'mock error'},
+                                              status=int(status))
+        try:
+            data = json.loads(request.httprequest.get_data(as_text=True) or '{}')
+        except ValueError:
+            return request.make_json_response({'status': 'ER', 'message': 'invalid JSON'})
+        if result == 'ER' or not data.get('TextContent'):
+            return request.make_json_response({'status': 'ER', 'message': 'TextContent is required'})
+        code = f'MOCK-{uuid.uuid4().hex[:12]}'
+        base_url = request.httprequest.host_url.rstrip('/')
+        return request.make_json_response({
+            'status': 'OK',
+            'transactionCode': code,
+            'pdfURL': f'{base_url}/etax/mock/document/{code}/pdf',
+            'xmlURL': f'{base_url}/etax/mock/document/{code}/xml',
+        })
+
+    @http.route('/etax/mock/document/<string:code>/<string:kind>', type='http',
+                auth='none', methods=['GET'])
+    def mock_document(self, code, kind):
+        if not self._mock_enabled() or kind not in ('pdf', 'xml'):
+            return request.not_found()
+        if kind == 'pdf':
+            content = b'%PDF-1.4\n% mock ' + code.encode() + b'\n%%EOF\n'
+            mimetype = 'application/pdf'
+        else:
+            content = f'<?xml version="1.0"?><MockTaxInvoice code="{code}"/>'.encode()
+            mimetype = 'application/xml'
+        return request.make_response(content, headers=[('Content-Type', mimetype)])
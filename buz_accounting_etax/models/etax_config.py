@@ -33,6 +33,17 @@ class EtaxConfig(models.Model):
         ('Y', 'ส่งอีเมล'),
         ('N', 'ไม่ส่งอีเมล')
     ], 'ส่งอีเมลอัตโนมัติ', default='Y')
+
+    # การตั้งค่าคิวส่งเอกสาร
+    queue_on_confirm = fields.Boolean('เข้าคิวส่งเมื่อยืนยันใบแจ้งหนี้', default=True)
+    queue_batch_size = fields.Integer('จำนวนเอกสารต่อรอบ', default=100)
+    queue_workers = fields.Integer('จำนวน Worker', default=4)
+    rate_limit = fields.Float('จำกัดจำนวนครั้งต่อวินาที', default=5.0,
+                              help='0 = ไม่จำกัด')
+    request_timeout = fields.Integer('Timeout (วินาที)', default=30)
+    max_attempts = fields.Integer('จำนวนครั้งที่ส่งซ้ำสูงสุด', default=5)
+    retry_backoff = fields.Integer('ระยะรอก่อนส่งซ้ำ (วินาที)', default=60,
+                                   help='เพิ่มเป็นสองเท่าในแต่ละครั้งที่ส่งไม่สำเร็จ')
     
     def test_connection(self):
         """ทดสอบการเชื่อมต่อ API"""
@@ -0,0 +1,74 @@
+"""HTTP helpers สำหรับคิวส่ง E-Tax
+
+ฟังก์ชันในไฟล์นี้ไม่ใช้ ORM จึงเรียกจาก worker thread ได้โดยตรง
+"""
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# HTTP status ที่ถือว่าเป็นข้อผิดพลาดชั่วคราว (ส่งใหม่ได้)
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(key, pool_size):
+    """คืน requests.Session ที่ใช้ connection pool ร่วมกันต่อ key (db, config)"""
+    with _sessions_lock:
+        session = _sessions.get((key, pool_size))
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[(key, pool_size)] = session
+        return session
+
+
+class RateLimiter:
+    """จำกัดจำนวน request ต่อวินาที ใช้ร่วมกันได้หลาย thread"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def post_json(session, limiter, url, headers, payload, timeout):
+    """ส่ง payload แบบ JSON คืน dict ผลลัพธ์ (ไม่ raise)"""
+    limiter.acquire()
+    try:
+        response = session.post(url, data=json.dumps(payload), headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        return {'status_code': None, 'text': '', 'error': str(e), 'transient': True}
+    return {
+        'status_code': response.status_code,
+        'text': response.text,
+        'error': '',
+        'transient': response.status_code in TRANSIENT_STATUS_CODES,
+    }
+
+
+def fetch_content(session, limiter, url, timeout):
+    """ดาวน์โหลดไฟล์จาก URL คืน (content, error)"""
+    limiter.acquire()
+    try:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        return None, str(e)
+    return response.content, ''
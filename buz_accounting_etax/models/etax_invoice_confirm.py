@@ -113,18 +113,21 @@ class AccountMoveInherit(models.Model):
             'notes': move.notes,
         })
 
-        for line in move.invoice_line_ids:
-            if line.product_id.name != 'Down Payment':
-                self.env['etax.transaction.line'].create({
-                    'transaction_id': etax_transaction.id,
-                    'product_id': line.product_id.id,
-                    'name': line.product_id.name,
-                    'quantity': line.quantity,
-                    'price_unit': line.price_unit,
-                    'discount': line.discount,
-                    'price_subtotal': line.price_subtotal,
-                    'tax_ids': [(6, 0, line.tax_ids.ids)],
-                })
+        self.env['etax.transaction.line'].create([{
+            'transaction_id': etax_transaction.id,
+            'product_id': line.product_id.id,
+            'name': line.product_id.name,
+            'quantity': line.quantity,
+            'price_unit': line.price_unit,
+            'discount': line.discount,
+            'price_subtotal': line.price_subtotal,
+            'tax_ids': [(6, 0, line.tax_ids.ids)],
+        } for line in move.invoice_line_ids if line.product_id.name != 'Down Payment'])
+
+        # เข้าคิวส่ง E-Tax (ส่งโดย cron ไม่ทำให้ผู้ใช้ต้องรอ)
+        # เฉพาะเอกสารขาย (ใบกำกับภาษี/ใบลดหนี้ของเรา) ไม่ส่งบิลผู้ขาย
+        if etax_config.queue_on_confirm and move.move_type in ('out_invoice', 'out_refund'):
+            etax_transaction.action_enqueue()
 
     @api.constrains('invoice_line_ids')
     def _check_invoice_lines(self):
@@ -1,12 +1,20 @@
 from odoo import models, fields, api
 from odoo.exceptions import UserError, ValidationError
-import requests
+import base64
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from . import etax_http
+
 _logger = logging.getLogger(__name__)
 
+# ระยะรอสูงสุดก่อนส่งซ้ำ (วินาที)
+MAX_RETRY_BACKOFF = 3600
+# จำนวนเอกสารที่ดาวน์โหลด PDF/XML ต่อรอบ
+DEFAULT_DOCUMENT_FETCH_BATCH = 50
+
 class EtaxTransaction(models.Model):
     _name = 'etax.transaction'
     _description = 'ธุรกรรม E-Tax'
@@ -24,6 +32,7 @@ class EtaxTransaction(models.Model):
     
     state = fields.Selection([
         ('draft', 'ร่าง'),
+        ('queued', 'รอส่ง'),
         ('sending', 'กำลังส่ง'),
         ('sent', 'ส่งสำเร็จ'),
         ('error', 'ข้อผิดพลาด'),
@@ -74,6 +83,14 @@ class EtaxTransaction(models.Model):
     xml_url = fields.Char('URL ไฟล์ XML', readonly=True)
     api_response = fields.Text('ผลตอบกลับจาก API', readonly=True)
     error_message = fields.Text('ข้อความข้อผิดพลาด', readonly=True)
+
+    # คิวส่งเอกสาร
+    attempt_count = fields.Integer('จำนวนครั้งที่ส่ง', readonly=True, copy=False)
+    next_attempt_at = fields.Datetime('ส่งครั้งถัดไป', readonly=True, copy=False, index=True)
+    last_attempt_at = fields.Datetime('ส่งล่าสุด', readonly=True, copy=False)
+    pdf_attachment_id = fields.Many2one('ir.attachment', 'ไฟล์ PDF', readonly=True, copy=False)
+    xml_attachment_id = fields.Many2one('ir.attachment', 'ไฟล์ XML', readonly=True, copy=False)
+    documents_fetched = fields.Boolean('ดาวน์โหลดเอกสารแล้ว', readonly=True, copy=False)
     
     # รายการสินค้า
     line_ids = fields.One2many('etax.transaction.line', 'transaction_id', 'รายการสินค้า')
@@ -151,6 +168,44 @@ class EtaxTransaction(models.Model):
     def prepare_etax_data(self):
         """เตรียมข้อมูลสำหรับส่งไป E-Tax API"""
         self.ensure_one()
+        return self._prepare_etax_data_batch()[self.id]
+
+    def _prefetch_etax_data(self):
+        """โหลดข้อมูลที่ใช้สร้าง payload ของทุกธุรกรรมในไม่กี่ query
+
+        mapped() อ่านข้อมูลของทั้ง recordset ต่อหนึ่งตาราง แทนการอ่านทีละเอกสาร
+        """
+        self.mapped('etax_config_id.seller_tax_id')
+        self.mapped('partner_id.name')
+        self.mapped('invoice_id.name')
+        self.mapped('sale_order_ref.name')
+        lines = self.mapped('line_ids')
+        lines.mapped('product_id.default_code')
+        lines.mapped('tax_ids.amount')
+        return lines
+
+    @api.model
+    def _get_etax_selection_labels(self):
+        """ป้ายชื่อของ selection ที่ใช้ใน payload อ่านครั้งเดียวต่อ batch"""
+        return {
+            fname: dict(self._fields[fname].selection)
+            for fname in ('remark_dbn', 'remark_cdn', 'document_type')
+        }
+
+    def _prepare_etax_data_batch(self):
+        """สร้าง payload ของทุกธุรกรรมใน recordset คืน {transaction_id: payload}
+
+        โหลดข้อมูลล่วงหน้าทั้ง recordset ด้วย _prefetch_etax_data() แล้วสร้าง payload
+        ทีละธุรกรรมด้วย _build_etax_payload() ตัวเดิม ส่วนที่ลดลงคือจำนวน query
+        ไม่ได้เปลี่ยนวิธีสร้าง payload
+        """
+        self._prefetch_etax_data()
+        labels = self._get_etax_selection_labels()
+        return {transaction.id: transaction._build_etax_payload(labels) for transaction in self}
+
+    def _build_etax_payload(self, labels):
+        """สร้าง payload ของธุรกรรมหนึ่งรายการจากข้อมูลที่โหลดไว้แล้ว"""
+        self.ensure_one()
 
         currency_code = "THB"
         bank_name = ""
@@ -164,60 +219,11 @@ class EtaxTransaction(models.Model):
         # เตรียมข้อมูลรายการสินค้า
         line_items = []
         for i, line in enumerate(self.line_ids, 1):
-            tax_rate = 0
-            tax_amount = 0
-            if line.tax_ids:
-                tax_rate = line.tax_ids[0].amount
-                tax_amount = line.price_subtotal * (tax_rate / 100)
-            
-            line_item = {
-                "L01-LINE_ID": str(i),
-                "L02-PRODUCT_ID": line.product_id.default_code or '',
-                "L03-PRODUCT_NAME": line.name[:100],  # จำกัดความยาว
-                "L04-PRODUCT_DESC": "",
-                "L05-PRODUCT_BATCH_ID": "",
-                "L06-PRODUCT_EXPIRE_DTM": "",
-                "L07-PRODUCT_CLASS_CODE": "",
-                "L08-PRODUCT_CLASS_NAME": "",
-                "L09-PRODUCT_ORIGIN_COUNTRY_ID": "",
-                "L10-PRODUCT_CHARGE_AMOUNT": f"{line.price_unit:.2f}",
-                "L11-PRODUCT_CHARGE_CURRENCY_CODE": "THB",
-                "L12-PRODUCT_ALLOWANCE_CHARGE_IND": "",
-                "L13-PRODUCT_ALLOWANCE_ACTUAL_AMOUNT": "0.00",
-                "L14-PRODUCT_ALLOWANCE_ACTUAL_CURRENCY_CODE": "THB",
-                "L15-PRODUCT_ALLOWANCE_REASON_CODE": "",
-                "L16-PRODUCT_ALLOWANCE_REASON": "",
-                "L17-PRODUCT_QUANTITY": f"{line.quantity:.2f}",
-                "L18-PRODUCT_UNIT_CODE": "",
-                "L19-PRODUCT_QUANTITY_PER_UNIT": f"{line.price_unit:.2f}",
-                "L20-LINE_TAX_TYPE_CODE": "VAT",
-                "L21-LINE_TAX_CAL_RATE": f"{tax_rate:.2f}",
-                "L22-LINE_BASIS_AMOUNT": f"{line.price_subtotal:.2f}",
-                "L23-LINE_BASIS_CURRENCY_CODE": "THB",
-                "L24-LINE_TAX_CAL_AMOUNT": f"{tax_amount:.2f}",
-                "L25-LINE_TAX_CAL_CURRENCY_CODE": "THB",
-                "L26-LINE_ALLOWANCE_CHARGE_IND": "",
-                "L27-LINE_ALLOWANCE_ACTUAL_AMOUNT": "0.00",
-                "L28-LINE_ALLOWANCE_ACTUAL_CURRENCY_CODE": "",
-                "L29-LINE_ALLOWANCE_REASON_CODE": "",
-                "L30-LINE_ALLOWANCE_REASON": "",
-                "L31-LINE_TAX_TOTAL_AMOUNT": "0.00",
-                "L32-LINE_TAX_TOTAL_CURRENCY_CODE": "",
-                "L33-LINE_NET_TOTAL_AMOUNT": f"{line.price_subtotal:.2f}",
-                "L34-LINE_NET_TOTAL_CURRENCY_CODE": "THB",
-                "L35-LINE_NET_INCLUDE_TAX_TOTAL_AMOUNT": f"{line.price_subtotal:.2f}",
-                "L36-LINE_NET_INCLUDE_TAX_TOTAL_CURRENCY_CODE": "THB",
-            }
-            
-            # เพิ่มฟิลด์ Remark
-            for j in range(37, 47):
-                line_item[f"L{j:02d}-PRODUCT_REMARK{j-36}"] = ""
-            
-            line_items.append(line_item)
+            line_items.append(self._prepare_etax_line_item(i, line))
 
-        dbn_label = dict(self._fields['remark_dbn'].selection).get(self.remark_dbn)
-        cdn_label = dict(self._fields['remark_cdn'].selection).get(self.remark_cdn)
-        doc_label = dict(self._fields['document_type'].selection).get(self.document_type)
+        dbn_label = labels['remark_dbn'].get(self.remark_dbn)
+        cdn_label = labels['remark_cdn'].get(self.remark_cdn)
+        doc_label = labels['document_type'].get(self.document_type)
 
         # ตรวจสอบว่ามีฟิลด์ที่ต้องการหรือไม่ และกำหนดค่าเริ่มต้น
         payment_method = ""
@@ -403,12 +409,127 @@ class EtaxTransaction(models.Model):
         
         return etax_data
 
+    def _collect_etax_payloads(self):
+        """สร้างและตรวจสอบ payload ของทั้ง recordset
+
+        คืน (payloads, errors) โดย payloads เป็น {transaction: payload} ของเอกสารที่ผ่าน
+        และ errors เป็น {transaction: ข้อความ} ของเอกสารที่สร้างไม่ได้หรือข้อมูลไม่ครบ
+        """
+        self._prefetch_etax_data()
+        labels = self._get_etax_selection_labels()
+        payloads = {}
+        errors = {}
+        for transaction in self:
+            try:
+                payload = transaction._build_etax_payload(labels)
+            except Exception as e:
+                errors[transaction] = str(e)
+                continue
+            problems = self._validate_etax_payload(payload)
+            if problems:
+                errors[transaction] = '\n'.join(problems)
+            else:
+                payloads[transaction] = payload
+        return payloads, errors
+
+    @api.model
+    def _validate_etax_payload(self, payload):
+        """ตรวจสอบข้อมูลที่จำเป็นของ payload ก่อนส่ง คืนรายการข้อความที่พบปัญหา"""
+        content = payload['TextContent']
+        problems = []
+        seller_tax_id = payload.get('SellerTaxId') or ''
+        if len(seller_tax_id) != 13 or not seller_tax_id.isdigit():
+            problems.append('เลขประจำตัวผู้เสียภาษีของผู้ขายต้องเป็นตัวเลข 13 หลัก')
+        if not content['B02-BUYER_NAME']:
+            problems.append('ไม่พบชื่อลูกค้า')
+        buyer_tax_id = content['B04-BUYER_TAX_ID'] or ''
+        if content['B03-BUYER_TAX_ID_TYPE'] == 'TXID' and (len(buyer_tax_id) != 13 or not buyer_tax_id.isdigit()):
+            problems.append('เลขประจำตัวผู้เสียภาษีของลูกค้าต้องเป็นตัวเลข 13 หลัก')
+        if not content['LINE_ITEM_INFORMATION']:
+            problems.append('ไม่มีรายการสินค้า')
+        return problems
+
+    def action_validate_etax(self):
+        """ตรวจสอบข้อมูลของธุรกรรมที่เลือกทั้งหมดก่อนส่ง"""
+        payloads, errors = self._collect_etax_payloads()
+        if errors:
+            message = '\n'.join(
+                f'{transaction.invoice_id.name or transaction.display_name}: {error}'
+                for transaction, error in errors.items()
+            )
+            notification_type = 'warning'
+        else:
+            message = f'ข้อมูลครบถ้วน {len(payloads)} รายการ'
+            notification_type = 'success'
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'ตรวจสอบข้อมูล E-Tax',
+                'message': message,
+                'type': notification_type,
+                'sticky': bool(errors),
+            }
+        }
+
+    def _prepare_etax_line_item(self, i, line):
+        """ข้อมูลรายการสินค้าหนึ่งรายการ (LINE_ITEM_INFORMATION)"""
+        tax_rate = 0
+        tax_amount = 0
+        if line.tax_ids:
+            tax_rate = line.tax_ids[0].amount
+            tax_amount = line.price_subtotal * (tax_rate / 100)
+
+        line_item = {
+            "L01-LINE_ID": str(i),
+            "L02-PRODUCT_ID": line.product_id.default_code or '',
+            "L03-PRODUCT_NAME": line.name[:100],  # จำกัดความยาว
+            "L04-PRODUCT_DESC": "",
+            "L05-PRODUCT_BATCH_ID": "",
+            "L06-PRODUCT_EXPIRE_DTM": "",
+            "L07-PRODUCT_CLASS_CODE": "",
+            "L08-PRODUCT_CLASS_NAME": "",
+            "L09-PRODUCT_ORIGIN_COUNTRY_ID": "",
+            "L10-PRODUCT_CHARGE_AMOUNT": f"{line.price_unit:.2f}",
+            "L11-PRODUCT_CHARGE_CURRENCY_CODE": "THB",
+            "L12-PRODUCT_ALLOWANCE_CHARGE_IND": "",
+            "L13-PRODUCT_ALLOWANCE_ACTUAL_AMOUNT": "0.00",
+            "L14-PRODUCT_ALLOWANCE_ACTUAL_CURRENCY_CODE": "THB",
+            "L15-PRODUCT_ALLOWANCE_REASON_CODE": "",
+            "L16-PRODUCT_ALLOWANCE_REASON": "",
+            "L17-PRODUCT_QUANTITY": f"{line.quantity:.2f}",
+            "L18-PRODUCT_UNIT_CODE": "",
+            "L19-PRODUCT_QUANTITY_PER_UNIT": f"{line.price_unit:.2f}",
+            "L20-LINE_TAX_TYPE_CODE": "VAT",
+            "L21-LINE_TAX_CAL_RATE": f"{tax_rate:.2f}",
+            "L22-LINE_BASIS_AMOUNT": f"{line.price_subtotal:.2f}",
+            "L23-LINE_BASIS_CURRENCY_CODE": "THB",
+            "L24-LINE_TAX_CAL_AMOUNT": f"{tax_amount:.2f}",
+            "L25-LINE_TAX_CAL_CURRENCY_CODE": "THB",
+            "L26-LINE_ALLOWANCE_CHARGE_IND": "",
+            "L27-LINE_ALLOWANCE_ACTUAL_AMOUNT": "0.00",
+            "L28-LINE_ALLOWANCE_ACTUAL_CURRENCY_CODE": "",
+            "L29-LINE_ALLOWANCE_REASON_CODE": "",
+            "L30-LINE_ALLOWANCE_REASON": "",
+            "L31-LINE_TAX_TOTAL_AMOUNT": "0.00",
+            "L32-LINE_TAX_TOTAL_CURRENCY_CODE": "",
+            "L33-LINE_NET_TOTAL_AMOUNT": f"{line.price_subtotal:.2f}",
+            "L34-LINE_NET_TOTAL_CURRENCY_CODE": "THB",
+            "L35-LINE_NET_INCLUDE_TAX_TOTAL_AMOUNT": f"{line.price_subtotal:.2f}",
+            "L36-LINE_NET_INCLUDE_TAX_TOTAL_CURRENCY_CODE": "THB",
+        }
+
+        # เพิ่มฟิลด์ Remark
+        for j in range(37, 47):
+            line_item[f"L{j:02d}-PRODUCT_REMARK{j-36}"] = ""
+
+        return line_item
+
     def send_to_etax(self):
         """ส่งข้อมูลไปยัง E-Tax API"""
         self.ensure_one()
 
         etax_data = self.prepare_etax_data()
-        self.notes = json.dumps(etax_data, ensure_ascii=False, indent=2)
         try:
             self.state = 'sending'
             
@@ -638,72 +759,48 @@ class EtaxTransaction(models.Model):
             # }
 
             # ส่งข้อมูลไป API
-            headers = {
-                'Content-Type': 'application/json',
-                'Authorization': f"Bearer {self.etax_config_id.api_key}"
-            }
-
-            response = requests.post(
-                self.etax_config_id.api_url,
-                data=json.dumps(etax_data),
-                headers=headers,
-                timeout=30
+            config = self.etax_config_id
+            result = etax_http.post_json(
+                self._get_etax_session(config),
+                etax_http.RateLimiter(0),
+                config.api_url,
+                self._get_etax_headers(),
+                etax_data,
+                config.request_timeout or 30,
             )
-            
-            # บันทึกการตอบกลับ
-            self.api_response = response.text
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if result.get('status') == 'OK':
-                    # อัพเดทข้อมูลเมื่อสำเร็จ
-                    self.write({
-                        'state': 'sent',
-                        'transaction_code': result.get('transactionCode'),
-                        'pdf_url': result.get('pdfURL'),
-                        'xml_url': result.get('xmlURL'),
-                        'error_message': '',
-                    })
-                    
-                    return {
-                        'type': 'ir.actions.client',
-                        'tag': 'display_notification',
-                        'params': {
-                            'title': 'สำเร็จ!',
-                            'message': f'ส่งข้อมูลไปยัง E-Tax สำเร็จ\nรหัสธุรกรรม: {result.get("transactionCode")}',
-                            'type': 'success',
-                        }
+            if result['error']:
+                raise UserError(result['error'])
+            self._apply_etax_result(result)
+
+            if self.state == 'sent':
+                return {
+                    'type': 'ir.actions.client',
+                    'tag': 'display_notification',
+                    'params': {
+                        'title': 'สำเร็จ!',
+                        'message': f'ส่งข้อมูลไปยัง E-Tax สำเร็จ\nรหัสธุรกรรม: {self.transaction_code}',
+                        'type': 'success',
                     }
-                else:
-                    # มีข้อผิดพลาดจาก API
-                    self.write({
-                        'state': 'error',
-                        'error_message': result.get('message', 'ไม่ทราบสาเหตุ'),
-                    })
-                    
-                    return {
-                        'type': 'ir.actions.client',
-                        'tag': 'display_notification',
-                        'params': {
-                            'title': 'ข้อผิดพลาด!',
-                            'message': f'E-Tax API Error: {result.get("message", etax_data)}',
-                            'type': 'warning',
-                        }
+                }
+            elif result['status_code'] == 200:
+                # มีข้อผิดพลาดจาก API
+                return {
+                    'type': 'ir.actions.client',
+                    'tag': 'display_notification',
+                    'params': {
+                        'title': 'ข้อผิดพลาด!',
+                        'message': f'E-Tax API Error: {self.error_message or etax_data}',
+                        'type': 'warning',
                     }
+                }
             else:
                 # HTTP Error
-                self.write({
-                    'state': 'error',
-                    'error_message': f'HTTP Error {response.status_code}: {response.text}',
-                })
-                
                 return {
                     'type': 'ir.actions.client',
                     'tag': 'display_notification',
                     'params': {
                         'title': 'ข้อผิดพลาด!',
-                        'message': f'HTTP Error {response.status_code}',
+                        'message': f'HTTP Error {result["status_code"]}',
                         'type': 'danger',
                     }
                 }
@@ -725,8 +822,215 @@ class EtaxTransaction(models.Model):
                 }
             }
 
+    def _get_etax_headers(self):
+        return {
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {self.etax_config_id.api_key}"
+        }
+
+    @api.model
+    def _get_etax_session(self, config):
+        """HTTP session ที่ใช้ connection pool ร่วมกันต่อการตั้งค่า"""
+        return etax_http.get_session(
+            (self.env.cr.dbname, config.id), max(config.queue_workers, 1))
+
+    def _apply_etax_result(self, result):
+        """บันทึกผลตอบกลับจาก API ลงธุรกรรม"""
+        self.ensure_one()
+        vals = {
+            'api_response': result['text'],
+            'attempt_count': self.attempt_count + 1,
+            'last_attempt_at': fields.Datetime.now(),
+        }
+        if result['status_code'] == 200:
+            try:
+                response = json.loads(result['text'])
+            except ValueError:
+                response = {'message': result['text']}
+            if response.get('status') == 'OK':
+                # อัพเดทข้อมูลเมื่อสำเร็จ
+                vals.update({
+                    'state': 'sent',
+                    'transaction_code': response.get('transactionCode'),
+                    'pdf_url': response.get('pdfURL'),
+                    'xml_url': response.get('xmlURL'),
+                    'error_message': '',
+                    'next_attempt_at': False,
+                })
+            else:
+                vals.update({
+                    'state': 'error',
+                    'error_message': response.get('message', 'ไม่ทราบสาเหตุ'),
+                    'next_attempt_at': False,
+                })
+        else:
+            vals.update({
+                'state': 'error',
+                'error_message': result['error'] or f'HTTP Error {result["status_code"]}: {result["text"]}',
+                'next_attempt_at': False,
+            })
+        self.write(vals)
+
+    # ========== คิวส่งเอกสาร ==========
+
+    def action_enqueue(self):
+        """นำธุรกรรมเข้าคิวส่ง E-Tax"""
+        to_queue = self.filtered(lambda t: t.state in ('draft', 'error'))
+        to_queue.write({
+            'state': 'queued',
+            'attempt_count': 0,
+            'next_attempt_at': fields.Datetime.now(),
+            'error_message': '',
+        })
+        return True
+
+    def _claim_queued(self, limit):
+        """ล็อกธุรกรรมที่ถึงเวลาส่ง โดยข้ามแถวที่ worker อื่นถืออยู่"""
+        self.flush_model(['state', 'next_attempt_at'])
+        self.env.cr.execute("""
+            SELECT id FROM etax_transaction
+             WHERE state = 'queued'
+               AND (next_attempt_at IS NULL OR next_attempt_at <= %s)
+             ORDER BY next_attempt_at NULLS FIRST, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, (fields.Datetime.now(), limit))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _schedule_retry(self, result):
+        """ข้อผิดพลาดชั่วคราว: ส่งใหม่แบบ exponential backoff จนครบจำนวนครั้ง"""
+        self.ensure_one()
+        config = self.etax_config_id
+        attempt = self.attempt_count + 1
+        error = result['error'] or f'HTTP Error {result["status_code"]}: {result["text"]}'
+        if attempt >= max(config.max_attempts, 1):
+            self.write({
+                'state': 'error',
+                'attempt_count': attempt,
+                'last_attempt_at': fields.Datetime.now(),
+                'next_attempt_at': False,
+                'error_message': error,
+            })
+            return
+        delay = min((config.retry_backoff or 60) * 2 ** (attempt - 1), MAX_RETRY_BACKOFF)
+        self.write({
+            'attempt_count': attempt,
+            'last_attempt_at': fields.Datetime.now(),
+            'next_attempt_at': fields.Datetime.now() + timedelta(seconds=delay),
+            'error_message': error,
+        })
+
+    @api.model
+    def _process_etax_queue(self, limit=None, commit=False):
+        """ส่งธุรกรรมในคิวด้วย worker pool คืนจำนวนธุรกรรมที่ประมวลผล
+
+        HTTP ทำใน thread (ไม่ใช้ ORM) ส่วนการบันทึกผลทำใน thread หลัก
+        """
+        configs = self.env['etax.config'].search([])
+        batch_size = limit or max(configs.mapped('queue_batch_size') or [100])
+        transactions = self._claim_queued(batch_size)
+        transactions.filtered(lambda t: not t.etax_config_id).write({
+            'state': 'error',
+            'error_message': 'ไม่พบการตั้งค่า E-Tax',
+            'next_attempt_at': False,
+        })
+        for config in transactions.mapped('etax_config_id'):
+            batch = transactions.filtered(lambda t: t.etax_config_id == config)
+            payloads, errors = batch._collect_etax_payloads()
+            for transaction, error in errors.items():
+                _logger.warning('E-Tax payload error for %s: %s', transaction.display_name, error)
+                transaction.write({'state': 'error', 'error_message': error, 'next_attempt_at': False})
+            if not payloads:
+                continue
+            session = self._get_etax_session(config)
+            limiter = etax_http.RateLimiter(config.rate_limit)
+            timeout = config.request_timeout or 30
+            with ThreadPoolExecutor(max_workers=max(config.queue_workers, 1)) as executor:
+                futures = {
+                    transaction: executor.submit(
+                        etax_http.post_json, session, limiter, config.api_url,
+                        transaction._get_etax_headers(), payload, timeout)
+                    for transaction, payload in payloads.items()
+                }
+                results = {transaction: future.result() for transaction, future in futures.items()}
+            for transaction, result in results.items():
+                if result['transient']:
+                    transaction._schedule_retry(result)
+                else:
+                    transaction._apply_etax_result(result)
+            _logger.info('E-Tax queue: processed %s transactions for config %s',
+                         len(results), config.name)
+        if commit:
+            self.env.cr.commit()
+        return len(transactions)
+
+    @api.model
+    def _cron_process_etax_queue(self):
+        self._process_etax_queue(commit=True)
+
+    @api.model
+    def _fetch_etax_documents(self, limit=DEFAULT_DOCUMENT_FETCH_BATCH, commit=False):
+        """ดาวน์โหลด PDF/XML ของเอกสารที่ส่งสำเร็จเก็บเป็นไฟล์แนบ"""
+        transactions = self.search([
+            ('state', '=', 'sent'),
+            ('documents_fetched', '=', False),
+            '|', ('pdf_url', '!=', False), ('xml_url', '!=', False),
+        ], limit=limit, order='id')
+        for config in transactions.mapped('etax_config_id'):
+            batch = transactions.filtered(lambda t: t.etax_config_id == config)
+            session = self._get_etax_session(config)
+            limiter = etax_http.RateLimiter(config.rate_limit)
+            timeout = config.request_timeout or 30
+            jobs = [
+                (transaction, kind, url)
+                for transaction in batch
+                for kind, url in (('pdf', transaction.pdf_url), ('xml', transaction.xml_url))
+                if url
+            ]
+            with ThreadPoolExecutor(max_workers=max(config.queue_workers, 1)) as executor:
+                futures = [
+                    (transaction, kind, executor.submit(
+                        etax_http.fetch_content, session, limiter, url, timeout))
+                    for transaction, kind, url in jobs
+                ]
+                results = [(transaction, kind, future.result()) for transaction, kind, future in futures]
+            failed = self.browse()
+            fetched = []
+            attachment_vals = []
+            for transaction, kind, (content, error) in results:
+                if error:
+                    _logger.warning('E-Tax %s download failed for %s: %s',
+                                    kind.upper(), transaction.display_name, error)
+                    failed |= transaction
+                    continue
+                fetched.append((transaction, kind))
+                attachment_vals.append({
+                    'name': f'{transaction.invoice_id.name or transaction.transaction_code}.{kind}',
+                    'datas': base64.b64encode(content),
+                    'res_model': self._name,
+                    'res_id': transaction.id,
+                    'mimetype': 'application/pdf' if kind == 'pdf' else 'application/xml',
+                })
+            attachments = self.env['ir.attachment'].create(attachment_vals)
+            for (transaction, kind), attachment in zip(fetched, attachments):
+                transaction[f'{kind}_attachment_id'] = attachment
+            (batch - failed).write({'documents_fetched': True})
+        if commit:
+            self.env.cr.commit()
+        return len(transactions)
+
+    @api.model
+    def _cron_fetch_etax_documents(self):
+        self._fetch_etax_documents(commit=True)
+
     def action_download_pdf(self):
         """ดาวน์โหลดไฟล์ PDF"""
+        if self.pdf_attachment_id:
+            return {
+                'type': 'ir.actions.act_url',
+                'url': f'/web/content/{self.pdf_attachment_id.id}?download=true',
+                'target': 'new',
+            }
         if self.pdf_url:
             return {
                 'type': 'ir.actions.act_url',
@@ -736,6 +1040,12 @@ class EtaxTransaction(models.Model):
 
     def action_download_xml(self):
         """ดาวน์โหลดไฟล์ XML"""
+        if self.xml_attachment_id:
+            return {
+                'type': 'ir.actions.act_url',
+                'url': f'/web/content/{self.xml_attachment_id.id}?download=true',
+                'target': 'new',
+            }
         if self.xml_url:
             return {
                 'type': 'ir.actions.act_url',
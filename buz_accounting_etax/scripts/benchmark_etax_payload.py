@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark การสร้าง payload E-Tax
+
+สร้างธุรกรรม E-Tax สังเคราะห์ (ค่าเริ่มต้น 1,000 เอกสาร) แล้วเปรียบเทียบ
+
+- per_record: เรียก prepare_etax_data() ทีละเอกสาร (ไม่มี prefetch ร่วมกัน)
+- batch:      เรียก _prepare_etax_data_batch() ครั้งเดียวทั้ง recordset
+- validate:   _collect_etax_payloads() (สร้าง + ตรวจสอบข้อมูลก่อนส่ง)
+
+บันทึกเวลาและจำนวน SQL query ของแต่ละแบบ และตรวจว่า payload ทั้งสองแบบเหมือนกัน
+ข้อมูลที่สร้างจะถูก rollback เมื่อจบ ไม่มีการส่งข้อมูลไปยัง E-Tax API
+
+Usage:
+    python3 benchmark_etax_payload.py --database=bench_db --invoices=1000 --lines=5
+    python3 benchmark_etax_payload.py --database=bench_db --output=etax_payload_bench.json
+"""
+
+import argparse
+import json
+import sys
+import time
+
+try:
+    import odoo
+    from odoo import api, SUPERUSER_ID
+    from odoo.modules.registry import Registry
+except ImportError:
+    print("Error: Odoo not found. Run this script from Odoo environment.")
+    sys.exit(1)
+
+
+def create_transactions(env, n_invoices, n_lines, n_partners):
+    """สร้างธุรกรรม E-Tax สังเคราะห์สำหรับการวัดผล"""
+    config = env['etax.config'].create({
+        'name': 'Payload Benchmark',
+        'seller_tax_id': '0000000000000',
+        'api_key': 'bench',
+        'user_code': 'bench',
+        'access_key': 'bench',
+        'queue_on_confirm': False,
+    })
+    partners = env['res.partner'].create([{
+        'name': f'E-Tax Benchmark Customer {i}',
+        'vat': f'{i:013d}',
+        'street': f'{i} Benchmark Road',
+        'zip': '10110',
+    } for i in range(1, n_partners + 1)])
+    products = env['product.product'].create([{
+        'name': f'E-Tax Benchmark Product {i}',
+        'default_code': f'ETXB{i:04d}',
+    } for i in range(n_lines)])
+    tax = env['account.tax'].search([('type_tax_use', '=', 'sale'), ('amount', '=', 7)], limit=1)
+    return env['etax.transaction'].create([{
+        'etax_config_id': config.id,
+        'partner_id': partners[i % n_partners].id,
+        'line_ids': [(0, 0, {
+            'product_id': product.id,
+            'quantity': j + 1,
+            'price_unit': 100.0 + i,
+            'tax_ids': [(6, 0, tax.ids)],
+        }) for j, product in enumerate(products)],
+    } for i in range(n_invoices)])
+
+
+def measure(env, func):
+    """คืน (ผลลัพธ์, เวลา, จำนวน query) โดยเริ่มจาก cache ว่าง"""
+    env.invalidate_all()
+    cr = env.cr
+    queries_before = cr.sql_log_count
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start, cr.sql_log_count - queries_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark E-Tax payload building')
+    parser.add_argument('--database', required=True, help='Database name')
+    parser.add_argument('--invoices', type=int, default=1000, help='Number of transactions')
+    parser.add_argument('--lines', type=int, default=5, help='Lines per transaction')
+    parser.add_argument('--partners', type=int, default=200, help='Distinct customers')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    odoo.tools.config.parse_config(['--database', args.database])
+    registry = Registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        print(f"Creating {args.invoices} transactions x {args.lines} lines...")
+        transactions = create_transactions(env, args.invoices, args.lines, args.partners)
+        env.flush_all()
+        ids = transactions.ids
+        Transaction = env['etax.transaction']
+
+        def per_record():
+            return {tid: Transaction.browse(tid).prepare_etax_data() for tid in ids}
+
+        single, single_wall, single_queries = measure(env, per_record)
+        batch, batch_wall, batch_queries = measure(
+            env, lambda: Transaction.browse(ids)._prepare_etax_data_batch())
+        (payloads, errors), validate_wall, validate_queries = measure(
+            env, lambda: Transaction.browse(ids)._collect_etax_payloads())
+
+        result = {
+            'invoices': args.invoices,
+            'lines': args.lines,
+            'identical': single == batch,
+            'valid': len(payloads),
+            'invalid': len(errors),
+            'per_record': {'wall_s': round(single_wall, 4), 'queries': single_queries},
+            'batch': {'wall_s': round(batch_wall, 4), 'queries': batch_queries},
+            'validate': {'wall_s': round(validate_wall, 4), 'queries': validate_queries},
+        }
+        cr.rollback()
+
+    print(f"{'path':<12}{'wall (s)':>12}{'queries':>10}")
+    for path in ('per_record', 'batch', 'validate'):
+        print(f"{path:<12}{result[path]['wall_s']:>12.4f}{result[path]['queries']:>10}")
+    if batch_wall:
+        print(f"speedup: {single_wall / batch_wall:.1f}x")
+    print(f"payloads identical: {result['identical']}")
+    print(f"validation: {result['valid']} valid, {result['invalid']} invalid")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    return 0 if result['identical'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
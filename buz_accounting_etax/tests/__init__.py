@@ -0,0 +1,2 @@
+from . import test_etax_queue
+from . import test_etax_payload
@@ -0,0 +1,28 @@
+from odoo.tests import TransactionCase
+
+
+class EtaxTestCommon(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'E-Tax Customer', 'vat': '1234567890123'})
+        cls.product = cls.env['product.product'].create({'name': 'E-Tax Product', 'default_code': 'ETX'})
+        cls.config = cls.env['etax.config'].create({
+            'name': 'Test',
+            'seller_tax_id': '0000000000000',
+            'api_key': 'key',
+            'user_code': 'user',
+            'access_key': 'access',
+        })
+
+    def _create_transactions(self, count, partner=None, lines=1):
+        return self.env['etax.transaction'].create([{
+            'etax_config_id': self.config.id,
+            'partner_id': (partner or self.partner).id,
+            'line_ids': [(0, 0, {
+                'product_id': self.product.id,
+                'quantity': j + 1,
+                'price_unit': 100.0 + i,
+            }) for j in range(lines)],
+        } for i in range(count)])
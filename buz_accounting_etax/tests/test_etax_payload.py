@@ -0,0 +1,38 @@
+from odoo.tests import tagged
+
+from .common import EtaxTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestEtaxPayload(EtaxTestCommon):
+
+    def test_01_batch_matches_single_payload(self):
+        transactions = self._create_transactions(5, lines=3)
+        payloads = transactions._prepare_etax_data_batch()
+        self.assertEqual(set(payloads), set(transactions.ids))
+        for transaction in transactions:
+            self.env.invalidate_all()
+            self.assertEqual(payloads[transaction.id], transaction.prepare_etax_data())
+            self.assertEqual(len(payloads[transaction.id]['TextContent']['LINE_ITEM_INFORMATION']), 3)
+
+    def _count_queries(self, transactions):
+        self.env.invalidate_all()
+        start = self.cr.sql_log_count
+        transactions._prepare_etax_data_batch()
+        return self.cr.sql_log_count - start
+
+    def test_02_batch_query_count_does_not_grow(self):
+        small = self._create_transactions(2, lines=2)
+        large = self._create_transactions(20, lines=2)
+        self.assertLessEqual(self._count_queries(large), self._count_queries(small) + 2)
+
+    def test_03_validate_before_submission(self):
+        valid = self._create_transactions(2)
+        no_lines = self._create_transactions(1, lines=0)
+        bad_vat = self._create_transactions(
+            1, partner=self.env['res.partner'].create({'name': 'Bad VAT', 'vat': '12345'}))
+        payloads, errors = (valid | no_lines | bad_vat)._collect_etax_payloads()
+        self.assertEqual(set(payloads), set(valid))
+        self.assertEqual(set(errors), set(no_lines | bad_vat))
+        self.assertIn('ไม่มีรายการสินค้า', errors[no_lines])
+        self.assertIn('ลูกค้า', errors[bad_vat])
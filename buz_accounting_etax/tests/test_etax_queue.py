@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import HttpCase, tagged
+
+from .common import EtaxTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestEtaxQueue(EtaxTestCommon, HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config.write({
+            'queue_workers': 2,
+            'rate_limit': 0,
+            'retry_backoff': 60,
+            'max_attempts': 2,
+        })
+
+    def _set_endpoint(self, query=''):
+        self.config.api_url = f'{self.base_url()}/etax/mock/etaxsigndocumentjson{query}'
+
+    def test_01_queue_sent_and_documents_fetched(self):
+        self._set_endpoint()
+        transactions = self._create_transactions(3)
+        transactions.action_enqueue()
+        self.assertEqual(set(transactions.mapped('state')), {'queued'})
+
+        processed = self.env['etax.transaction']._process_etax_queue()
+        self.assertEqual(processed, 3)
+        self.assertEqual(set(transactions.mapped('state')), {'sent'})
+        self.assertTrue(all(code.startswith('MOCK-') for code in transactions.mapped('transaction_code')))
+        self.assertEqual(transactions.mapped('attempt_count'), [1, 1, 1])
+        # Payload is not stored in notes anymore
+        self.assertFalse(any(transactions.mapped('notes')))
+
+        self.env['etax.transaction']._fetch_etax_documents()
+        self.assertTrue(all(transactions.mapped('documents_fetched')))
+        self.assertEqual(len(transactions.mapped('pdf_attachment_id')), 3)
+        self.assertEqual(len(transactions.mapped('xml_attachment_id')), 3)
+
+    def test_02_transient_error_retried_with_backoff(self):
+        self._set_endpoint('?status=503')
+        transaction = self._create_transactions(1)
+        transaction.action_enqueue()
+
+        self.env['etax.transaction']._process_etax_queue()
+        self.assertEqual(transaction.state, 'queued')
+        self.assertEqual(transaction.attempt_count, 1)
+        self.assertGreater(transaction.next_attempt_at, fields.Datetime.now() + timedelta(seconds=30))
+        # Not due yet, nothing to send
+        self.assertEqual(self.env['etax.transaction']._process_etax_queue(), 0)
+
+        # Last attempt fails for good
+        transaction.next_attempt_at = fields.Datetime.now()
+        self.env['etax.transaction']._process_etax_queue()
+        self.assertEqual(transaction.state, 'error')
+        self.assertEqual(transaction.attempt_count, 2)
+
+    def test_03_api_error_not_retried(self):
+        self._set_endpoint('?result=ER')
+        transaction = self._create_transactions(1)
+        transaction.action_enqueue()
+        self.env['etax.transaction']._process_etax_queue()
+        self.assertEqual(transaction.state, 'error')
+        self.assertFalse(transaction.next_attempt_at)
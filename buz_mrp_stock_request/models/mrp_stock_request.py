@@ -21,35 +21,55 @@ class MrpProduction(models.Model):
     has_available_to_allocate = fields.Boolean(
         string="Has Materials to Allocate",
         compute="_compute_has_available_to_allocate",
+        store=True,
         help="Indicates if there are materials available to allocate from stock requests",
     )
     available_allocations_count = fields.Integer(
         string="Available Allocations Count",
         compute="_compute_has_available_to_allocate",
+        store=True,
     )
 
     def _compute_mrp_stock_request_count(self):
         for mo in self:
             mo.mrp_stock_request_count = len(mo.stock_request_ids)
 
+    @api.depends(
+        "stock_request_ids.state",
+        "stock_request_ids.line_ids.qty_available_to_allocate",
+        "stock_request_ids.line_ids.uom_id",
+    )
     def _compute_has_available_to_allocate(self):
-        """Check if there are materials available to allocate to this MO."""
+        """Check if there are materials available to allocate to these MOs.
+
+        Lines with a quantity left to allocate, rounded to their UoM, are
+        counted per MO in one grouped query over the requested or done
+        stock requests.
+        """
+        counts = {}
+        mo_ids = self._origin.ids
+        if mo_ids:
+            self.env["mrp.stock.request"].flush_model(["state", "mo_ids"])
+            self.env["mrp.stock.request.line"].flush_model(
+                ["request_id", "uom_id", "qty_available_to_allocate"]
+            )
+            self.env["uom.uom"].flush_model(["rounding"])
+            self.env.cr.execute("""
+                SELECT rel.production_id, COUNT(*)
+                  FROM mrp_stock_request_production_rel rel
+                  JOIN mrp_stock_request request
+                    ON request.id = rel.request_id
+                   AND request.state IN ('requested', 'done')
+                  JOIN mrp_stock_request_line line ON line.request_id = request.id
+                  JOIN uom_uom uom ON uom.id = line.uom_id
+                 WHERE rel.production_id = ANY(%s)
+                   AND line.qty_available_to_allocate / uom.rounding >= 0.5
+                 GROUP BY rel.production_id
+            """, [mo_ids])
+            counts = dict(self.env.cr.fetchall())
         for mo in self:
-            count = 0
-            has_available = False
-            # Check all linked stock requests
-            for request in mo.stock_request_ids:
-                if request.state in ['requested', 'done']:
-                    # Check if any line has available quantity
-                    for line in request.line_ids:
-                        if float_compare(
-                            line.qty_available_to_allocate,
-                            0.0,
-                            precision_rounding=line.uom_id.rounding
-                        ) > 0:
-                            has_available = True
-                            count += 1
-            mo.has_available_to_allocate = has_available
+            count = counts.get(mo._origin.id, 0)
+            mo.has_available_to_allocate = bool(count)
             mo.available_allocations_count = count
 
     def action_view_stock_requests(self):
@@ -607,9 +627,7 @@ class MrpStockRequest(models.Model):
 
     def _compute_issued_quantities(self):
         """Recompute issued quantities from done moves."""
-        for request in self:
-            for line in request.line_ids:
-                line._compute_qty_issued()
+        self.line_ids._compute_qty_issued()
 
     def action_allocate_wizard(self):
         """Open allocation wizard - smart selection based on MO count."""
@@ -850,32 +868,56 @@ class MrpStockRequestLine(models.Model):
         copy=False,
     )
 
+    def _read_reference_quantities(self, query):
+        """Run a grouped query returning (line id, quantity in the reference
+        UoM of its category) for these lines.
+
+        The source UoM factors are applied in SQL, the caller converts to the
+        UoM of each line, which may still be unsaved in a form.
+        """
+        line_ids = self._origin.ids
+        if not line_ids:
+            return {}
+        self.env["uom.uom"].flush_model(["factor"])
+        self.env.cr.execute(query, [line_ids])
+        return dict(self.env.cr.fetchall())
+
+    def _set_from_reference_quantities(self, field_name, quantities):
+        for line in self:
+            qty = float(quantities.get(line._origin.id, 0.0)) * line.uom_id.factor
+            line[field_name] = float_round(
+                qty, precision_rounding=line.uom_id.rounding or 0.01
+            )
+
     @api.depends("move_ids.state", "move_ids.product_uom_qty", "move_ids.product_uom")
     def _compute_qty_issued(self):
         """Compute issued quantity from done moves."""
-        for line in self:
-            qty_issued = 0.0
-            done_moves = line.move_ids.filtered(lambda m: m.state == 'done')
-            for move in done_moves:
-                # Convert move quantity to line UoM
-                qty_issued += move.product_uom._compute_quantity(
-                    move.product_uom_qty,
-                    line.uom_id
-                )
-            line.qty_issued = qty_issued
+        self.flush_model(["move_ids"])
+        self.env["stock.move"].flush_model(["state", "product_uom_qty", "product_uom"])
+        quantities = self._read_reference_quantities("""
+            SELECT rel.line_id, SUM(move.product_uom_qty / uom.factor)
+              FROM mrp_stock_request_line_move_rel rel
+              JOIN stock_move move ON move.id = rel.move_id AND move.state = 'done'
+              JOIN uom_uom uom ON uom.id = move.product_uom
+             WHERE rel.line_id = ANY(%s)
+             GROUP BY rel.line_id
+        """)
+        self._set_from_reference_quantities("qty_issued", quantities)
 
     @api.depends("allocation_ids.qty_consumed", "allocation_ids.uom_id")
     def _compute_qty_allocated(self):
         """Compute allocated quantity from allocations."""
-        for line in self:
-            qty_allocated = 0.0
-            for allocation in line.allocation_ids:
-                # Convert allocation quantity to line UoM
-                qty_allocated += allocation.uom_id._compute_quantity(
-                    allocation.qty_consumed,
-                    line.uom_id
-                )
-            line.qty_allocated = qty_allocated
+        self.env["mrp.stock.request.allocation"].flush_model(
+            ["request_line_id", "qty_consumed", "uom_id"]
+        )
+        quantities = self._read_reference_quantities("""
+            SELECT allocation.request_line_id, SUM(allocation.qty_consumed / uom.factor)
+              FROM mrp_stock_request_allocation allocation
+              JOIN uom_uom uom ON uom.id = allocation.uom_id
+             WHERE allocation.request_line_id = ANY(%s)
+             GROUP BY allocation.request_line_id
+        """)
+        self._set_from_reference_quantities("qty_allocated", quantities)
 
     @api.depends("qty_requested", "qty_issued")
     def _compute_qty_remaining(self):
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestAllocationSolver(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Wizard = cls.env["mrp.stock.request.allocate.multi.wizard"]
+
+    def _solve(self, supply, demands, method, rounding=1.0):
+        return self.Wizard._solve_allocation(supply, demands, method, rounding)
+
+    def test_supply_covers_demand(self):
+        for method in ("proportional", "priority"):
+            allocation = self._solve(10.0, [("a", 3.0), ("b", 4.0)], method)
+            self.assertEqual(allocation, {"a": 3.0, "b": 4.0})
+
+    def test_proportional_shortage(self):
+        allocation = self._solve(10.0, [("a", 6.0), ("b", 6.0)], "proportional")
+        self.assertEqual(allocation, {"a": 5.0, "b": 5.0})
+        # What is left after rounding down goes to the first demands
+        allocation = self._solve(10.0, [("a", 4.0), ("b", 4.0), ("c", 4.0)], "proportional")
+        self.assertEqual(allocation, {"a": 4.0, "b": 3.0, "c": 3.0})
+
+    def test_priority_shortage(self):
+        allocation = self._solve(10.0, [("a", 6.0), ("b", 6.0), ("c", 2.0)], "priority")
+        self.assertEqual(allocation, {"a": 6.0, "b": 4.0, "c": 0.0})
+
+    def test_rounding_never_exceeds_supply(self):
+        """Demands finer than the UoM rounding are not rounded up past the supply"""
+        demands = [("a", 0.335), ("b", 0.335), ("c", 0.33)]
+        for method in ("proportional", "priority"):
+            allocation = self._solve(1.0, demands, method, rounding=0.01)
+            self.assertAlmostEqual(sum(allocation.values()), 1.0, places=6)
+            self.assertAlmostEqual(allocation["a"], 0.34, places=6)
+            self.assertAlmostEqual(allocation["b"], 0.33, places=6)
+            self.assertAlmostEqual(allocation["c"], 0.33, places=6)
@@ -1,9 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import logging
+import time
+from collections import defaultdict
+
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.fields import Command
 from odoo.tools import float_compare, float_round, float_is_zero
 
+_logger = logging.getLogger(__name__)
+
 
 class MrpStockRequestAllocateMultiWizard(models.TransientModel):
     _name = "mrp.stock.request.allocate.multi.wizard"
@@ -33,6 +40,18 @@ class MrpStockRequestAllocateMultiWizard(models.TransientModel):
         compute="_compute_has_unallocated_materials",
         help="Indicates if there are unallocated materials in the stock request"
     )
+    allocation_method = fields.Selection(
+        [
+            ("proportional", "Proportional to Demand"),
+            ("priority", "By MO Priority"),
+        ],
+        string="Allocation Method",
+        required=True,
+        default="proportional",
+        help="How issued materials are split when they do not cover the demand "
+             "of all MOs: in proportion to each MO's remaining demand, or MO by "
+             "MO by priority then start date.",
+    )
 
     @api.depends("request_id", "request_id.mo_ids", "mo_allocation_ids")
     def _compute_info_html(self):
@@ -100,58 +119,156 @@ class MrpStockRequestAllocateMultiWizard(models.TransientModel):
                 
         return res
     
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         """Create wizard and populate MO allocations."""
-        wizard = super().create(vals)
-        
-        if wizard.request_id:
-            import logging
-            _logger = logging.getLogger(__name__)
-            _logger.info("=== Creating MO allocations for request: %s", wizard.request_id.name)
-            _logger.info("=== MOs in request: %s", wizard.request_id.mo_ids.mapped('name'))
-            
-            # Create one allocation group per MO
-            created_count = 0
-            for mo in wizard.request_id.mo_ids:
-                # Collect available materials for this MO
-                line_vals = []
-                for req_line in wizard.request_id.line_ids:
-                    _logger.info("=== Product %s: available = %s", req_line.product_id.name, req_line.qty_available_to_allocate)
-                    if float_compare(
-                        req_line.qty_available_to_allocate,
-                        0.0,
-                        precision_rounding=req_line.uom_id.rounding
-                    ) > 0:
-                        line_vals.append((0, 0, {
-                            'request_line_id': req_line.id,
-                            'product_id': req_line.product_id.id,
-                            'uom_id': req_line.uom_id.id,
-                            'available_qty': req_line.qty_available_to_allocate,
-                            'qty_to_consume': req_line.qty_available_to_allocate,
-                        }))
-                
-                _logger.info("=== MO %s has %d materials available", mo.name, len(line_vals))
-                
-                # Create MO allocation even if no materials (so user sees the MO in list)
-                # If no materials, show empty - user can't allocate anything but sees why
-                mo_alloc = self.env['mrp.stock.request.mo.allocation'].create({
-                    'wizard_id': wizard.id,
-                    'mo_id': mo.id,
-                    'line_ids': line_vals,
-                })
-                created_count += 1
-                _logger.info("=== Created MO allocation: %s (id=%s) with %d lines", mo_alloc.mo_id.name, mo_alloc.id, len(line_vals))
-            
-            _logger.info("=== Total MO allocations created: %d", created_count)
-            
-            # Force refresh to show MO allocations
-            wizard.invalidate_recordset(['mo_allocation_ids'])
-            
-            # Check what we have
-            _logger.info("=== Wizard mo_allocation_ids count: %d", len(wizard.mo_allocation_ids))
-        
-        return wizard
+        wizards = super().create(vals_list)
+        for wizard in wizards.filtered("request_id"):
+            wizard._populate_mo_allocations()
+        return wizards
+
+    def _get_ordered_mos(self):
+        """MOs of the request, most urgent first then by start date."""
+        return self.request_id.mo_ids.sorted(
+            lambda mo: (-int(mo.priority or 0), mo.date_start or fields.Datetime.now(), mo.id)
+        )
+
+    def _get_allocatable_lines(self):
+        return self.request_id.line_ids.filtered(
+            lambda line: float_compare(
+                line.qty_available_to_allocate, 0.0, precision_rounding=line.uom_id.rounding
+            ) > 0
+        )
+
+    def _get_component_demand(self, mos, request_lines):
+        """Remaining component demand of the MOs for each request line.
+
+        Raw material moves of all MOs are summed with one grouped query and
+        converted to the UoM of the request line.
+
+        :return: {(mo id, request line id): quantity in the request line UoM}
+        """
+        lines_by_product = defaultdict(list)
+        for line in request_lines:
+            lines_by_product[line.product_id].append(line)
+        groups = self.env["stock.move"]._read_group(
+            [
+                ("raw_material_production_id", "in", mos.ids),
+                ("product_id", "in", request_lines.product_id.ids),
+                ("state", "not in", ("done", "cancel")),
+            ],
+            ["raw_material_production_id", "product_id", "product_uom"],
+            ["product_uom_qty:sum", "quantity:sum"],
+        )
+        demand = defaultdict(float)
+        for mo, product, uom, qty_demand, qty_consumed in groups:
+            remaining = max(qty_demand - qty_consumed, 0.0)
+            for line in lines_by_product[product]:
+                demand[(mo.id, line.id)] += uom._compute_quantity(remaining, line.uom_id, round=False)
+        return demand
+
+    @api.model
+    def _solve_allocation(self, supply, demands, method, rounding):
+        """Split a supply between demands.
+
+        When the supply covers every demand, each one is served in full.
+        Otherwise ``proportional`` gives each demand its share of the supply
+        and ``priority`` serves demands in order. In every case the shares are
+        rounded down and what is left is handed out in order, each demand
+        taking at most its quantity rounded up, so the total never exceeds
+        the supply.
+
+        :param supply: available quantity
+        :param demands: list of (key, quantity) ordered by priority
+        :param method: "proportional" or "priority"
+        :param rounding: rounding of the UoM of the quantities
+        :return: {key: allocated quantity}
+        """
+        total = sum(qty for _key, qty in demands)
+        covered = float_compare(total, supply, precision_rounding=rounding) <= 0
+        allocation = {}
+        for key, qty in demands:
+            if covered:
+                share = qty
+            elif method == "proportional":
+                share = supply * qty / total
+            else:
+                share = 0.0
+            allocation[key] = float_round(share, precision_rounding=rounding, rounding_method="DOWN")
+        left = supply - sum(allocation.values())
+        for key, qty in demands:
+            if float_compare(left, 0.0, precision_rounding=rounding) <= 0:
+                break
+            wanted = float_round(qty, precision_rounding=rounding, rounding_method="UP") - allocation[key]
+            extra = float_round(min(left, wanted), precision_rounding=rounding, rounding_method="DOWN")
+            allocation[key] = float_round(allocation[key] + extra, precision_rounding=rounding)
+            left -= extra
+        return allocation
+
+    def _compute_allocation_proposal(self):
+        """Propose the quantity of each request line to consume in each MO.
+
+        :return: (allocatable request lines, {(mo id, request line id): quantity})
+        """
+        self.ensure_one()
+        mos = self._get_ordered_mos()
+        lines = self._get_allocatable_lines()
+        demand = self._get_component_demand(mos, lines)
+        proposal = {}
+        for line in lines:
+            demands = [
+                ((mo.id, line.id), demand[(mo.id, line.id)])
+                for mo in mos
+                if demand.get((mo.id, line.id), 0.0) > 0
+            ]
+            proposal.update(self._solve_allocation(
+                line.qty_available_to_allocate, demands, self.allocation_method, line.uom_id.rounding
+            ))
+        return lines, proposal
+
+    def _populate_mo_allocations(self):
+        """Create one allocation group per MO, prefilled by the allocation engine."""
+        self.ensure_one()
+        started = time.monotonic()
+        lines, proposal = self._compute_allocation_proposal()
+        # Every MO gets a tab, even without materials, so the user sees why
+        self.env["mrp.stock.request.mo.allocation"].create([{
+            "wizard_id": self.id,
+            "mo_id": mo.id,
+            "line_ids": [Command.create({
+                "request_line_id": line.id,
+                "product_id": line.product_id.id,
+                "uom_id": line.uom_id.id,
+                "available_qty": line.qty_available_to_allocate,
+                "qty_to_consume": proposal.get((mo.id, line.id), 0.0),
+            }) for line in lines],
+        } for mo in self._get_ordered_mos()])
+        _logger.info(
+            "Stock request %s: proposed %s allocation(s) of %d material(s) to %d MO(s) in %.2fs",
+            self.request_id.name, self.allocation_method, len(lines),
+            len(self.request_id.mo_ids), time.monotonic() - started,
+        )
+
+    def action_compute_allocation(self):
+        """Recompute the proposed quantities with the selected method."""
+        self.ensure_one()
+        _lines, proposal = self._compute_allocation_proposal()
+        lines_by_qty = defaultdict(list)
+        for line in self.mo_allocation_ids.line_ids:
+            qty = proposal.get((line.mo_allocation_id.mo_id.id, line.request_line_id.id), 0.0)
+            lines_by_qty[qty].append(line.id)
+        for qty, line_ids in lines_by_qty.items():
+            self.env["mrp.stock.request.mo.allocation.line"].browse(line_ids).write(
+                {"qty_to_consume": qty}
+            )
+        return {
+            "name": _("Allocate Materials to Manufacturing Orders"),
+            "type": "ir.actions.act_window",
+            "view_mode": "form",
+            "res_model": self._name,
+            "res_id": self.id,
+            "target": "new",
+        }
 
     def action_allocate_all(self):
         """Allocate materials to all MOs."""
@@ -160,34 +277,32 @@ class MrpStockRequestAllocateMultiWizard(models.TransientModel):
         if not self.mo_allocation_ids:
             raise UserError(_("No allocations to process."))
 
+        started = time.monotonic()
         # Collect all lines to allocate
-        all_lines = []
-        for mo_allocation in self.mo_allocation_ids:
-            for line in mo_allocation.line_ids:
-                if not float_is_zero(line.qty_to_consume, precision_rounding=line.uom_id.rounding):
-                    all_lines.append(line)
-        
+        all_lines = self.mo_allocation_ids.line_ids.filtered(
+            lambda line: not float_is_zero(line.qty_to_consume, precision_rounding=line.uom_id.rounding)
+        )
+
         if not all_lines:
             raise UserError(_("Please specify quantities to allocate."))
 
         # Validate all allocations
         self._validate_all_allocations(all_lines)
 
-        # Perform allocations
+        # Perform allocations, one create per model for the whole batch
+        consumed = all_lines._perform_consumptions()
+        self.env['mrp.stock.request.allocation'].create([{
+            'request_line_id': line.request_line_id.id,
+            'mo_id': line.mo_allocation_id.mo_id.id,
+            'uom_id': line.uom_id.id,
+            'qty_consumed': consumed[line],
+            'lot_id': line.lot_id.id if line.lot_id else False,
+            'notes': line.notes or '',
+        } for line in all_lines])
+
         summary_by_mo = {}
         for line in all_lines:
-            consumed_qty = line._perform_consumption()
-            
-            # Create allocation record
-            self.env['mrp.stock.request.allocation'].create({
-                'request_line_id': line.request_line_id.id,
-                'mo_id': line.mo_allocation_id.mo_id.id,
-                'uom_id': line.uom_id.id,
-                'qty_consumed': consumed_qty,
-                'lot_id': line.lot_id.id if line.lot_id else False,
-                'notes': line.notes or '',
-            })
-            
+            consumed_qty = consumed[line]
             # Group by MO for summary
             mo_name = line.mo_allocation_id.mo_id.name
             if mo_name not in summary_by_mo:
@@ -215,9 +330,12 @@ class MrpStockRequestAllocateMultiWizard(models.TransientModel):
             )
 
         # Log in each MO's chatter
+        lines_by_mo_allocation = defaultdict(list)
+        for line in all_lines:
+            lines_by_mo_allocation[line.mo_allocation_id].append(line)
         for mo_allocation in self.mo_allocation_ids:
             mo = mo_allocation.mo_id
-            mo_lines = [line for line in all_lines if line.mo_allocation_id == mo_allocation]
+            mo_lines = lines_by_mo_allocation[mo_allocation]
             if mo_lines:
                 mo_summary = [
                     _("• %s %s of %s%s") % (
@@ -242,13 +360,19 @@ class MrpStockRequestAllocateMultiWizard(models.TransientModel):
         # Show success message
         total_allocated = len(all_lines)
         total_mos = len(summary_by_mo)
-        
+        elapsed = time.monotonic() - started
+        _logger.info(
+            "Stock request %s: allocated %d material line(s) to %d MO(s) in %.2fs",
+            self.request_id.name, total_allocated, total_mos, elapsed,
+        )
+
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
                 'title': _('Success'),
-                'message': _('%d material(s) allocated to %d MO(s)') % (total_allocated, total_mos),
+                'message': _('%d material(s) allocated to %d MO(s) in %.1fs') % (
+                    total_allocated, total_mos, elapsed),
                 'type': 'success',
                 'sticky': False,
             }
@@ -468,60 +592,80 @@ class MrpStockRequestMoAllocationLine(models.TransientModel):
     def _perform_consumption(self):
         """Perform consumption to MO."""
         self.ensure_one()
-        
-        mo = self.mo_allocation_id.mo_id
-        product = self.product_id
-        qty_to_consume = self.qty_to_consume
-        uom = self.uom_id
-        lot = self.lot_id
-
-        # Find or create raw move
-        raw_move = mo.move_raw_ids.filtered(
-            lambda m: m.product_id == product and m.state not in ['done', 'cancel']
-        )
-        
-        if not raw_move:
+        return self._perform_consumptions()[self]
+
+    def _perform_consumptions(self):
+        """Consume these lines into their MOs.
+
+        Missing raw material moves and the move lines of all the lines are
+        each created with a single create().
+
+        :return: {line: consumed quantity in the line UoM}
+        """
+        raw_moves = {}
+        for mo in self.mo_allocation_id.mo_id:
+            for move in mo.move_raw_ids:
+                if move.state not in ['done', 'cancel']:
+                    raw_moves.setdefault((mo.id, move.product_id.id), move)
+
+        # Find or create raw moves
+        new_move_vals = {}
+        for line in self:
+            mo = line.mo_allocation_id.mo_id
+            key = (mo.id, line.product_id.id)
+            if key in raw_moves:
+                continue
             if mo.state in ['done', 'cancel']:
                 raise UserError(
                     _("Cannot add materials to MO %s (state: %s)") % (mo.name, mo.state)
                 )
-            
-            raw_move = self.env['stock.move'].create({
-                'name': product.display_name,
-                'product_id': product.id,
-                'product_uom_qty': qty_to_consume,
-                'product_uom': uom.id,
+            if key in new_move_vals:
+                new_move_vals[key]['product_uom_qty'] += line.uom_id._compute_quantity(
+                    line.qty_to_consume, self.env['uom.uom'].browse(new_move_vals[key]['product_uom'])
+                )
+                continue
+            new_move_vals[key] = {
+                'name': line.product_id.display_name,
+                'product_id': line.product_id.id,
+                'product_uom_qty': line.qty_to_consume,
+                'product_uom': line.uom_id.id,
                 'location_id': mo.location_src_id.id,
-                'location_dest_id': product.property_stock_production.id,
+                'location_dest_id': line.product_id.property_stock_production.id,
                 'raw_material_production_id': mo.id,
                 'company_id': mo.company_id.id,
                 'origin': mo.name,
                 'state': 'confirmed',
-            })
-            raw_move._action_confirm()
-        else:
-            raw_move = raw_move[0]
-
-        # Convert quantity
-        qty_in_move_uom = uom._compute_quantity(qty_to_consume, raw_move.product_uom)
+            }
+        if new_move_vals:
+            new_moves = self.env['stock.move'].create(list(new_move_vals.values()))
+            new_moves._action_confirm()
+            for key, move in zip(new_move_vals, new_moves):
+                if not move.exists():
+                    # Merged while confirming
+                    move = self.env['mrp.production'].browse(key[0]).move_raw_ids.filtered(
+                        lambda m: m.product_id.id == key[1] and m.state not in ['done', 'cancel']
+                    )[:1]
+                raw_moves[key] = move
 
-        # Get location from request
-        location_src = self.mo_allocation_id.wizard_id.request_id.location_dest_id or mo.location_src_id
-        
-        # Create move line
-        move_line_vals = {
-            'move_id': raw_move.id,
-            'product_id': product.id,
-            'product_uom_id': raw_move.product_uom.id,
-            'quantity': qty_in_move_uom,
-            'location_id': location_src.id,
-            'location_dest_id': raw_move.location_dest_id.id,
-            'company_id': mo.company_id.id,
-        }
-        
-        if lot:
-            move_line_vals['lot_id'] = lot.id
-            
+        # Create move lines
+        move_line_vals = []
+        for line in self:
+            mo = line.mo_allocation_id.mo_id
+            raw_move = raw_moves[(mo.id, line.product_id.id)]
+            # Get location from request
+            location_src = line.mo_allocation_id.wizard_id.request_id.location_dest_id or mo.location_src_id
+            vals = {
+                'move_id': raw_move.id,
+                'product_id': line.product_id.id,
+                'product_uom_id': raw_move.product_uom.id,
+                'quantity': line.uom_id._compute_quantity(line.qty_to_consume, raw_move.product_uom),
+                'location_id': location_src.id,
+                'location_dest_id': raw_move.location_dest_id.id,
+                'company_id': mo.company_id.id,
+            }
+            if line.lot_id:
+                vals['lot_id'] = line.lot_id.id
+            move_line_vals.append(vals)
         self.env['stock.move.line'].create(move_line_vals)
 
-        return qty_to_consume
+        return {line: line.qty_to_consume for line in self}
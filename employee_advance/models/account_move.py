@@ -25,6 +25,19 @@ class AccountMove(models.Model):
         compute='_compute_wht_cert_count'
     )
 
+    def _post(self, soft=True):
+        """Refresh the stored balance of the advance boxes hit by the posted entries"""
+        posted = super()._post(soft)
+        posted.line_ids._get_advance_boxes()._refresh_balance_simple()
+        return posted
+
+    def button_draft(self):
+        """Refresh the stored balance of the advance boxes when posted entries are reset"""
+        boxes = self.filtered(lambda move: move.state == 'posted').line_ids._get_advance_boxes()
+        res = super().button_draft()
+        boxes._refresh_balance_simple()
+        return res
+
     @api.depends('line_ids')
     def _compute_wht_cert_count(self):
         for move in self:
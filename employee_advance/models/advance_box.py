@@ -91,80 +91,63 @@ class EmployeeAdvanceBox(models.Model):
     @api.depends('account_id', 'employee_id', 'journal_id')
     def _compute_balance(self):
         """
-        Compute balance from journal entries.
+        Compute balance from posted journal entries.
         ALWAYS filter by employee partner to separate each employee's advance box.
-        Use account_id (113001) with partner filtering for balance calculation.
+        All boxes are summed with one grouped query by (account, partner).
         """
+        balances = self._get_balances()
         for record in self:
-            _logger.info("🔍 BALANCE DEBUG: Computing for advance box %s (employee: %s)", 
-                       record.id, record.employee_id.name)
-            
-            # Get employee partner for filtering
+            record.balance = balances.get(record.id, 0.0)
+
+    def _get_balances(self, date=False):
+        """Return ``{box_id: balance}`` of posted entries, up to ``date`` when given
+
+        The balance of a box is the sum of the posted lines on its account
+        for the employee partner. Lines of every box are read with a single
+        ``_read_group`` grouped by (account, partner).
+        """
+        box_keys = {}
+        for record in self:
+            if not record.account_id or not record.employee_id:
+                continue
             partner_id = record._get_employee_partner()
-            
             if not partner_id:
-                _logger.warning("⚠️ BALANCE DEBUG: No partner found for employee %s, setting balance to 0", 
-                              record.employee_id.name)
-                record.balance = 0.0
+                _logger.warning("No partner found for employee %s, advance box balance is 0",
+                                record.employee_id.name)
                 continue
-            
-            # Use account_id (113001 เงินทดรองจ่าย) with partner filtering
-            if record.account_id and record.employee_id:
-                domain = [
-                    ('account_id', '=', record.account_id.id),
-                    ('move_id.state', '=', 'posted'),
-                    ('partner_id', '=', partner_id),
-                ]
-                
-                _logger.info("📋 BALANCE DEBUG: Searching account %s (%s) with partner %s", 
-                           record.account_id.code, record.account_id.name, partner_id)
-                
-                # ใช้ search แทน read_group เพื่อ debug ง่ายขึ้น
-                lines = self.env['account.move.line'].search(domain)
-                _logger.info("📋 BALANCE DEBUG: Found %d lines", len(lines))
-                
-                total_debit = sum(lines.mapped('debit'))
-                total_credit = sum(lines.mapped('credit'))
-                balance = total_debit - total_credit
-                
-                _logger.info("💰 BALANCE DEBUG: Debit: %s, Credit: %s, Balance: %s", 
-                           total_debit, total_credit, balance)
-                           
-                for line in lines:
-                    _logger.info("  📝 Line: %s | %s | Dr: %s | Cr: %s | Move: %s", 
-                               line.date, line.name, line.debit, line.credit, line.move_id.name)
-                
-                record.balance = balance
-                
-                record.balance = balance
-            else:
-                _logger.warning("⚠️ BALANCE DEBUG: Missing account or employee")
-                record.balance = 0.0
+            box_keys[record.id] = (record.account_id.id, partner_id)
+        if not box_keys:
+            return {}
+
+        domain = [
+            ('account_id', 'in', list({key[0] for key in box_keys.values()})),
+            ('partner_id', 'in', list({key[1] for key in box_keys.values()})),
+            ('parent_state', '=', 'posted'),
+        ]
+        if date:
+            domain.append(('date', '<=', date))
+        groups = self.env['account.move.line'].sudo()._read_group(
+            domain, ['account_id', 'partner_id'], ['balance:sum'])
+        totals = {(account.id, partner.id): balance for account, partner, balance in groups}
+        return {box_id: totals.get(key, 0.0) for box_id, key in box_keys.items()}
+
+    def _get_balance_at(self, date):
+        """Balance of the advance box as of ``date`` (inclusive)"""
+        self.ensure_one()
+        return self._get_balances(date=date).get(self.id, 0.0)
 
     def _refresh_balance_simple(self):
-        """Simple balance refresh without triggering heavy computation - HANG FIX"""
-        for record in self:
-            try:
-                _logger.info("💰 BALANCE REFRESH: Starting for box %s", record.id)
-                # Invalidate the cache to force recomputation
-                record.invalidate_recordset(['balance'])
-                # Force recomputation by calling the compute method directly
-                record._compute_balance()
-                _logger.info("💰 BALANCE REFRESH: Completed for box %s, new balance: %s", 
-                           record.id, record.balance)
-            except Exception as e:
-                _logger.warning("⚠️ Balance refresh failed for %s: %s", record.name, str(e))
-                # Don't fail the entire operation if balance refresh fails
-    
+        """Mark the stored balance for recomputation
+
+        The boxes are recomputed together at the next flush (or read) with a
+        single grouped query instead of one search per box.
+        """
+        if self:
+            self.env.add_to_compute(self._fields['balance'], self)
+
     def _trigger_balance_recompute(self):
-        """Method to manually recompute the balance field - HANG FIX APPLIED"""
-        try:
-            # Use the simple refresh method instead of heavy computation
-            self._refresh_balance_simple()
-            _logger.debug("💰 Balance recompute completed for %d records", len(self))
-        except Exception as e:
-            _logger.warning("⚠️ Balance recompute failed: %s", str(e))
-            # Don't fail the entire operation if balance recompute fails
+        """Method to manually recompute the balance field"""
+        self._refresh_balance_simple()
 
     def action_refill_to_base(self):
         """Open wizard to refill advance box to base amount"""
@@ -212,17 +195,17 @@ class EmployeeAdvanceBox(models.Model):
         # Method 1: Check if address_home_id exists (from hr_contract module) - Primary method
         if hasattr(self.employee_id, 'address_home_id') and self.employee_id.sudo().address_home_id:
             partner_id = self.employee_id.sudo().address_home_id.id
-            _logger.info("🎯 ADVANCE BOX PARTNER: Found via address_home_id: %s", partner_id)
+            _logger.debug("🎯 ADVANCE BOX PARTNER: Found via address_home_id: %s", partner_id)
         
         # Method 2: Get the related user's partner (which might contain private address)
         if not partner_id and self.employee_id.user_id and self.employee_id.user_id.partner_id:
             partner_id = self.employee_id.user_id.partner_id.id
-            _logger.info("🎯 ADVANCE BOX PARTNER: Found via user.partner: %s", partner_id)
+            _logger.debug("🎯 ADVANCE BOX PARTNER: Found via user.partner: %s", partner_id)
         
         # Method 3: Default to employee's address_id (work address)
         if not partner_id and self.employee_id.address_id:
             partner_id = self.employee_id.address_id.id
-            _logger.info("🎯 ADVANCE BOX PARTNER: Found via address_id: %s", partner_id)
+            _logger.debug("🎯 ADVANCE BOX PARTNER: Found via address_id: %s", partner_id)
         
         # If still no partner found, try to create/find partner by employee name
         if not partner_id:
@@ -235,7 +218,7 @@ class EmployeeAdvanceBox(models.Model):
                 
                 if employee_partner:
                     partner_id = employee_partner.id
-                    _logger.info("🎯 ADVANCE BOX PARTNER: Found existing partner %s (%s) for employee %s", 
+                    _logger.debug("🎯 ADVANCE BOX PARTNER: Found existing partner %s (%s) for employee %s", 
                                partner_id, employee_partner.name, self.employee_id.name)
                 else:
                     # สร้าง Partner ใหม่สำหรับ Employee
@@ -247,7 +230,7 @@ class EmployeeAdvanceBox(models.Model):
                         'customer_rank': 0,
                     })
                     partner_id = employee_partner.id
-                    _logger.info("🎯 ADVANCE BOX PARTNER: Created new partner %s (%s) for employee %s", 
+                    _logger.debug("🎯 ADVANCE BOX PARTNER: Created new partner %s (%s) for employee %s", 
                                partner_id, employee_partner.name, self.employee_id.name)
                     
             except Exception as e:
@@ -260,7 +243,7 @@ class EmployeeAdvanceBox(models.Model):
                         partner_id = self.employee_id.user_id.partner_id.id
                     elif self.employee_id.address_id:
                         partner_id = self.employee_id.address_id.id
-                    _logger.info("🔄 ADVANCE BOX PARTNER: Using fallback partner %s", partner_id)
+                    _logger.debug("🔄 ADVANCE BOX PARTNER: Using fallback partner %s", partner_id)
                 except Exception as e2:
                     _logger.warning("⚠️ All fallbacks failed: %s", str(e2))
         
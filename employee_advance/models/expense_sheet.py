@@ -1,4 +1,6 @@
-from odoo import api, fields, models, _
+from collections import defaultdict
+
+from odoo import api, fields, models, _, Command
 from odoo.exceptions import UserError
 import logging
 
@@ -178,10 +180,11 @@ class HrExpenseSheet(models.Model):
         """Override approval to create draft vendor bills - enhanced with vendor grouping"""
         res = super(HrExpenseSheet, self).action_approve_expense_sheets()
         
-        for sheet in self:
-            if sheet.state == 'approve':
-                # Always use the enhanced vendor bill creation logic
-                sheet.action_create_vendor_bills()
+        # Always use the enhanced vendor bill creation logic, batched over
+        # all approved sheets of a multi-selection
+        approved_sheets = self.filtered(lambda sheet: sheet.state == 'approve')
+        if approved_sheets:
+            approved_sheets._create_vendor_bills_batch()
         
         return res
 
@@ -308,37 +311,71 @@ class HrExpenseSheet(models.Model):
     def action_create_vendor_bills(self):
         """Create vendor bills based on vendor field - group by vendor and create separate bills"""
         self.ensure_one()
-        
+        return self._create_vendor_bills_batch()
+
+    def _create_vendor_bills_batch(self):
+        """Create the vendor bills of all sheets in ``self`` at once
+
+        Bill values of every sheet are built first, then the bills are created
+        with one create() call, the expense attachments are copied with one
+        create() call and the review activities are scheduled together.
+        """
         # Run validations
         self._validate_fiscal_period()
         self._validate_expense_lines_for_clear_mode()
         
-        if self.is_billed:
-            raise UserError(_("Bills have already been created for this expense sheet."))
+        billed_sheets = self.filtered('is_billed')
+        if billed_sheets:
+            raise UserError(_("Bills have already been created for expense sheet %s.")
+                            % ', '.join(billed_sheets.mapped('name')))
         
         # Always use the date-based grouping logic to separate bills by date
         # regardless of whether it's vendor or employee reimbursement
         bills = self._create_bills_by_vendor_grouping()
+        if not bills:
+            return bills
         
-        if bills:
-            self.bill_ids = [(4, bill.id) for bill in bills]
-            self.is_billed = True
-            
-            # Post accounting activity to reviewers
-            self._post_accounting_activity_for_bills(bills)
-            
+        # Post accounting activity to reviewers
+        self._post_accounting_activity_for_bills(bills)
+        
+        bills_by_sheet = defaultdict(lambda: self.env['account.move'])
+        for bill in bills:
+            bills_by_sheet[bill.expense_sheet_id.id] |= bill
+        for sheet in self.filtered(lambda sheet: sheet.id in bills_by_sheet):
+            sheet_bills = bills_by_sheet[sheet.id]
+            sheet.write({
+                'bill_ids': [Command.link(bill_id) for bill_id in sheet_bills.ids],
+                'is_billed': True,
+            })
             # Log in chatter
-            bill_names = ', '.join(bills.mapped('name'))
-            self.message_post(body=_(f"Vendor bills created: {bill_names}"))
+            bill_names = ', '.join(sheet_bills.mapped('name'))
+            sheet.message_post(body=_("Vendor bills created: %s") % bill_names)
             
         return bills
 
     def _create_bills_by_vendor_grouping(self):
         """Enhanced: Group expenses by vendor and expense line date, and create separate bills per vendor/expense date.
-        If no vendor specified, group under employee name and expense line date."""
-        bills = self.env['account.move']
+        If no vendor specified, group under employee name and expense line date.
+        The bills of all sheets in ``self`` are created with a single create() call."""
+        bill_vals_list = []
+        bill_expenses = []
+        for sheet in self:
+            for group_data in sheet._get_vendor_bill_groups():
+                bill_vals = sheet._prepare_vendor_bill_vals(group_data)
+                if bill_vals:
+                    bill_vals_list.append(bill_vals)
+                    bill_expenses.append(group_data['expenses'])
+        
+        bills = self.env['account.move'].sudo().create(bill_vals_list)
         
-        # Group expense lines by (vendor_or_employee_partner, company, currency, expense_line_date)
+        # Carry attachments from expense lines to the bills
+        self._carry_attachments_to_bills(list(zip(bill_expenses, bills)))
+        
+        return bills
+
+    def _get_vendor_bill_groups(self):
+        """Group the expense lines by (vendor_or_employee_partner, company, currency, expense_line_date)"""
+        self.ensure_one()
         groups = {}
         
         for expense in self.expense_line_ids:
@@ -383,13 +420,7 @@ class HrExpenseSheet(models.Model):
             
             groups[group_key]['expenses'] |= expense
         
-        # Create bills for each group
-        for group_data in groups.values():
-            bill = self._create_single_bill_for_vendor_group_date(group_data)
-            if bill:
-                bills |= bill
-        
-        return bills
+        return list(groups.values())
 
     def _calculate_expense_base_amount(self, expense):
         """Calculate expense amount before tax for included tax expenses"""
@@ -414,6 +445,20 @@ class HrExpenseSheet(models.Model):
 
     def _create_single_bill_for_vendor_group_date(self, group_data):
         """Create a single vendor bill for a vendor group with specific date (enhanced version)"""
+        bill_vals = self._prepare_vendor_bill_vals(group_data)
+        if not bill_vals:
+            return self.env['account.move']
+        
+        bill = self.env['account.move'].sudo().create(bill_vals)
+        
+        # Carry attachments from expense lines to the bill
+        self._carry_attachments_to_bill(group_data['expenses'], bill)
+        
+        return bill
+
+    def _prepare_vendor_bill_vals(self, group_data):
+        """Return the vendor bill values for a vendor group with specific date"""
+        self.ensure_one()
         partner_id = group_data['partner_id']
         partner_name = group_data['partner_name']
         company_id = group_data['company_id']
@@ -423,7 +468,7 @@ class HrExpenseSheet(models.Model):
         is_vendor = group_data['is_vendor']
         
         if not partner_id:
-            return self.env['account.move']
+            return {}
         
         # Validate company and currency consistency within the group
         for expense in expenses:
@@ -450,7 +495,7 @@ class HrExpenseSheet(models.Model):
             # Include expense.id in key to ensure each expense line creates a separate invoice line
             key = (account.id, taxes, tuple(sorted(analytic_distribution.keys())), wht_tax, product_id, expense.id)
             
-            _logger.info(f"DEBUG _create_single_bill_for_vendor_group_date: Expense {expense.name} - analytic_distribution: {analytic_distribution}")
+            _logger.debug("Expense %s - analytic_distribution: %s", expense.name, analytic_distribution)
             
             if key not in account_tax_groups:
                 account_tax_groups[key] = {
@@ -485,6 +530,14 @@ class HrExpenseSheet(models.Model):
             'invoice_line_ids': []
         }
         
+        # Link advance box to ALL bills when using advance (not just employee bills)
+        # This allows WHT wizard to find the correct advance box for vendor bills too
+        if self.use_advance and self.advance_box_id:
+            bill_vals.update({
+                'advance_box_id': self.advance_box_id.id,
+                'is_expense_advance_bill': True
+            })
+        
         for (account_id, taxes_tuple, analytic_keys, wht_tax, product_id, expense_id), group_data in account_tax_groups.items():
             line_vals = {
                 'name': ', '.join(group_data['expenses'].mapped('name')),
@@ -518,24 +571,7 @@ class HrExpenseSheet(models.Model):
             
             bill_vals['invoice_line_ids'].append((0, 0, line_vals))
         
-        bill = self.env['account.move'].sudo().create(bill_vals)
-        
-        # Link advance box to ALL bills when using advance (not just employee bills)
-        # This allows WHT wizard to find the correct advance box for vendor bills too
-        if self.use_advance and self.advance_box_id:
-            bill.sudo().write({
-                'advance_box_id': self.advance_box_id.id,
-                'is_expense_advance_bill': True
-            })
-        
-        # Carry attachments from expense lines to the bill
-        # Get all expenses from all groups to attach
-        all_expenses = self.env['hr.expense']
-        for group_data in account_tax_groups.values():
-            all_expenses |= group_data['expenses']
-        self._carry_attachments_to_bill(all_expenses, bill)
-        
-        return bill
+        return bill_vals
 
     def _create_bills_by_expense_lines(self):
         """Legacy: Group expense lines and create vendor bills per group"""
@@ -866,55 +902,73 @@ class HrExpenseSheet(models.Model):
 
     def _carry_attachments_to_bill(self, expense_lines, bill):
         """Copy attachments from expense lines to the corresponding bill"""
+        self._carry_attachments_to_bills([(expense_lines, bill)])
+
+    def _carry_attachments_to_bills(self, expenses_and_bills):
+        """Copy attachments from expense lines to their bills
+
+        ``expenses_and_bills`` is a list of ``(expense_lines, bill)`` pairs.
+        Attachments of all expenses are read with one search and copied with
+        one create() call.
+        """
+        if not expenses_and_bills:
+            return
         Attachment = self.env['ir.attachment']
-        
-        for expense in expense_lines:
-            # Find attachments related to this expense
-            expense_attachments = Attachment.search([
-                ('res_model', '=', 'hr.expense'),
-                ('res_id', '=', expense.id)
-            ])
-            
-            # Copy each attachment to the bill
-            for attachment in expense_attachments:
-                Attachment.create({
-                    'name': attachment.name,
-                    'datas': attachment.datas,
-                    'res_model': 'account.move',
-                    'res_id': bill.id,
-                    'type': attachment.type,
-                    'url': attachment.url,
-                })
+        expense_ids = {expense_id for expenses, _bill in expenses_and_bills for expense_id in expenses.ids}
+        attachments_by_expense = defaultdict(list)
+        for attachment in Attachment.search([
+            ('res_model', '=', 'hr.expense'),
+            ('res_id', 'in', list(expense_ids))
+        ]):
+            attachments_by_expense[attachment.res_id].append(attachment)
+        
+        vals_list = [{
+            'name': attachment.name,
+            'raw': attachment.raw,
+            'res_model': 'account.move',
+            'res_id': bill.id,
+            'type': attachment.type,
+            'url': attachment.url,
+        } for expenses, bill in expenses_and_bills
+            for expense in expenses
+            for attachment in attachments_by_expense[expense.id]]
+        if vals_list:
+            Attachment.create(vals_list)
 
     def _post_accounting_activity_for_bills(self, bills):
-        """Post accounting activity for reviewers to check the created bills"""
+        """Post accounting activity for reviewers to check the created bills
+
+        The activities of all bills are created with one create() call.
+        """
+        if not bills:
+            return
         ICP = self.env['ir.config_parameter'].sudo()
         user_id = int(ICP.get_param('employee_advance.advance_notify_user_id', 0))
         group_id = int(ICP.get_param('employee_advance.advance_notify_group_id', 0))
         activity_type_id = int(ICP.get_param('employee_advance.advance_notify_activity_type_id', 0))
         deadline_days = int(ICP.get_param('employee_advance.advance_notify_deadline_days', 1))
         
+        activity_type_id = activity_type_id or self.env.ref('employee_advance.mail_activity_type_advance_bill_review').id
+        user_id = user_id or self.env.ref('base.user_admin').id
+        if group_id:
+            user_id = self.env['res.users'].search([('groups_id', '=', group_id)], limit=1).id or user_id
+        res_model_id = self.env['ir.model']._get_id('account.move')
+        date_deadline = fields.Date.add(fields.Date.context_today(self), days=deadline_days)
+        
+        activity_vals_list = []
         for bill in bills:
-            activity_vals = {
+            sheet_name = bill.expense_sheet_id.name
+            activity_vals_list.append({
                 'res_id': bill.id,
-                'res_model_id': self.env['ir.model']._get_id('account.move'),
-                'activity_type_id': activity_type_id or self.env.ref('employee_advance.mail_activity_type_advance_bill_review').id,
-                'summary': f'Review vendor bill for expense sheet {self.name}',
-                'user_id': user_id or self.env.ref('base.user_admin').id,
-                'date_deadline': fields.Date.add(fields.Date.context_today(self), days=deadline_days),
-            }
-            
-            if group_id:
-                activity_vals['user_id'] = self.env['res.users'].search([('groups_id', '=', group_id)], limit=1).id or activity_vals['user_id']
-            
-            # Use sudo() to bypass access rights for creating activities
-            bill.sudo().activity_schedule(
-                activity_type_id=activity_vals['activity_type_id'],
-                summary=activity_vals['summary'],
-                note=f"Expense sheet {self.name} has been approved. Please review the vendor bill.",
-                user_id=activity_vals['user_id'],
-                date_deadline=activity_vals['date_deadline']
-            )
+                'res_model_id': res_model_id,
+                'activity_type_id': activity_type_id,
+                'summary': f'Review vendor bill for expense sheet {sheet_name}',
+                'note': f"Expense sheet {sheet_name} has been approved. Please review the vendor bill.",
+                'user_id': user_id,
+                'date_deadline': date_deadline,
+            })
+        # Use sudo() to bypass access rights for creating activities
+        self.env['mail.activity'].sudo().create(activity_vals_list)
 
     def _validate_expense_lines_for_clear_mode(self):
         """Validate expense lines based on clear_mode"""
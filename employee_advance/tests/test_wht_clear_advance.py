@@ -149,4 +149,37 @@ class TestWHTClearAdvance(common.TransactionCase):
         context = action['context']
         self.assertEqual(context['default_expense_sheet_id'], self.expense_sheet.id)
         self.assertEqual(context['default_employee_id'], self.employee.id)
-        self.assertEqual(context['default_advance_box_id'], self.advance_box.id)
\ No newline at end of file
+        self.assertEqual(context['default_advance_box_id'], self.advance_box.id)
+
+    def test_advance_box_balance_follows_posting(self):
+        """Test that the stored balance is refreshed on post/reset and can be read as of a date"""
+        partner_id = self.advance_box._get_employee_partner()
+        counterpart = self.env['account.account'].create({
+            'name': 'Advance Counterpart',
+            'code': '1341',
+            'account_type': 'asset_current',
+            'company_id': self.company.id,
+        })
+
+        def create_move(date, amount):
+            return self.env['account.move'].create({
+                'move_type': 'entry',
+                'journal_id': self.journal.id,
+                'date': date,
+                'line_ids': [
+                    (0, 0, {'account_id': self.advance_account.id, 'partner_id': partner_id,
+                            'debit': amount, 'credit': 0.0}),
+                    (0, 0, {'account_id': counterpart.id, 'debit': 0.0, 'credit': amount}),
+                ],
+            })
+
+        first = create_move(fields.Date.to_date('2025-01-10'), 1000.0)
+        second = create_move(fields.Date.to_date('2025-02-10'), 500.0)
+        self.assertEqual(self.advance_box.balance, 0.0)
+
+        (first + second).action_post()
+        self.assertEqual(self.advance_box.balance, 1500.0)
+        self.assertEqual(self.advance_box._get_balance_at(fields.Date.to_date('2025-01-31')), 1000.0)
+
+        second.button_draft()
+        self.assertEqual(self.advance_box.balance, 1000.0)
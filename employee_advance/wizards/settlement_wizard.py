@@ -172,11 +172,13 @@ class AdvanceSettlementWizard(models.TransientModel):
         
         return res
 
-    @api.depends('box_id')
+    @api.depends('box_id', 'settlement_date')
     def _compute_current_balance(self):
-        """Compute the current balance from the advance box"""
+        """Compute the balance of the advance box as of the settlement date"""
         for record in self:
-            if record.box_id:
+            if record.box_id and record.settlement_date:
+                record.current_balance = record.box_id._get_balance_at(record.settlement_date)
+            elif record.box_id:
                 record.current_balance = record.box_id.balance
             else:
                 record.current_balance = 0.0
@@ -205,12 +207,11 @@ class AdvanceSettlementWizard(models.TransientModel):
     def _onchange_box(self):
         """Update defaults based on selected box"""
         if self.box_id:
-            self.current_balance = self.box_id.balance
             self.memo = f'Advance Settlement for {self.box_id.employee_id.name}'
             # Set default scenario based on balance direction
-            if self.box_id.balance > 0:
+            if self.current_balance > 0:
                 self.scenario = 'pay_employee'
-            elif self.box_id.balance < 0:
+            elif self.current_balance < 0:
                 self.scenario = 'employee_refund'
             else:
                 self.scenario = 'write_off'
@@ -3,7 +3,7 @@
 
 {
     "name": "Thai Localization - VAT and Withholding Tax",
-    "version": "17.0.1.3.1",
+    "version": "17.0.1.3.2",
     "author": "Ecosoft, Odoo Community Association (OCA)",
     "license": "AGPL-3",
     "website": "https://github.com/OCA/l10n-thailand",
@@ -29,6 +29,7 @@
         "views/product_view.xml",
         "views/account_payment_view.xml",
         "views/personal_income_tax_view.xml",
+        "views/personal_income_tax_yearly_view.xml",
         "views/res_partner_view.xml",
         "views/account_menu.xml",
     ],
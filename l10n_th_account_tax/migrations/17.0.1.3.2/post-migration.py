@@ -0,0 +1,10 @@
+# Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Fill the yearly PIT income table from existing withholding moves"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["personal.income.tax.yearly"]._refresh(None)
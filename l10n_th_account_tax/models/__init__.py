@@ -13,4 +13,5 @@ from . import account_payment
 from . import account_withholding_tax
 from . import account_withholding_move
 from . import account_tax
+from . import ir_sequence
 from . import res_partner
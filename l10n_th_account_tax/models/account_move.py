@@ -1,6 +1,8 @@
 # Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th/)
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
 
+from collections import defaultdict
+
 from odoo import _, Command, api, fields, models
 from odoo.exceptions import UserError
 from odoo.tools.float_utils import float_compare, float_round
@@ -404,14 +406,50 @@ class AccountMove(models.Model):
     def _post(self, soft=True):
         """Additional tax invoice info (tax_invoice_number, tax_invoice_date)
         Case sales tax, use Odoo's info, as document is issued out.
-        Case purchase tax, use vendor's info to fill back."""
+        Case purchase tax, use vendor's info to fill back.
+
+        All moves are handled together, so posting a large batch of
+        invoices does not search, number and write move by move."""
+        # Purchase Taxes
+        self._post_purchase_tax_invoices()
+
+        res = super()._post(soft=soft)
 
-        def handle_purchase_taxes(move):
+        # Sales Taxes
+        self._post_sales_tax_invoices()
+
+        # Withholding Tax:
+        # - Create account.withholding.move, for every withholding tax line
+        # - For case PIT, it is possible that there is no withholidng amount
+        #   but still need to keep track the withholding.move base amount
+        self._post_withholding_moves()
+
+        # When post, do remove the existing certs
+        self.mapped("wht_cert_ids").unlink()
+        return res
+
+    def _get_expense_sheet_by_move(self):
+        """Return {move_id: hr.expense.sheet} with a single search"""
+        if "hr.expense.sheet" not in self.env:
+            return {}
+        sheets = self.env["hr.expense.sheet"].search(
+            [("account_move_ids", "in", self.ids)]
+        )
+        sheet_by_move = {}
+        for sheet in sheets:
+            for move_id in sheet.account_move_ids.ids:
+                sheet_by_move.setdefault(move_id, sheet)
+        return sheet_by_move
+
+    def _post_purchase_tax_invoices(self):
+        sheet_by_move = self._get_expense_sheet_by_move()
+        # {(number, date): tax invoices}, written once per value
+        expense_tax_invoices = defaultdict(
+            lambda: self.env["account.move.tax.invoice"]
+        )
+        for move in self:
             # Check if this move is linked to an expense sheet
-            expense_sheet = False
-            if 'hr.expense.sheet' in self.env:
-                expense_sheet = self.env['hr.expense.sheet'].search([('account_move_ids', 'in', [move.id])], limit=1)
-            
+            expense_sheet = sheet_by_move.get(move.id, False)
             for tax_invoice in move.tax_invoice_ids.filtered(
                 lambda tax: tax.tax_line_id.type_tax_use == "purchase"
                 or (
@@ -431,10 +469,11 @@ class AccountMove(models.Model):
                             any(tax.id == tax_invoice.tax_line_id.id for tax in exp.tax_ids)
                         )
                         if matching_expense:
-                            tax_invoice.write({
-                                'tax_invoice_number': matching_expense[0].tax_invoice_number,
-                                'tax_invoice_date': matching_expense[0].tax_invoice_date,
-                            })
+                            key = (
+                                matching_expense[0].tax_invoice_number,
+                                matching_expense[0].tax_invoice_date,
+                            )
+                            expense_tax_invoices[key] |= tax_invoice
                             continue
                 
                 if (
@@ -476,70 +515,87 @@ class AccountMove(models.Model):
                             % (move.name or move.id)
                         )
 
-        def handle_sales_taxes(move):
+        for (number, date), tax_invoices in expense_tax_invoices.items():
+            tax_invoices.write(
+                {
+                    "tax_invoice_number": number,
+                    "tax_invoice_date": date,
+                }
+            )
+
+    def _post_sales_tax_invoices(self):
+        move_tax_invoices = []
+        # Tax invoices needing a new number, per sequence (and date range)
+        to_number = defaultdict(list)
+        for move in self:
             for tax_invoice in move.tax_invoice_ids.filtered(
                 lambda tax: tax.tax_line_id.type_tax_use == "sale"
                 or tax.move_id.journal_id.type == "sale"
             ):
-                tinv_number, tinv_date = self._get_tax_invoice_number(
-                    move, tax_invoice, tax_invoice.tax_line_id
-                )
-                tax_invoice.write(
-                    {
-                        "tax_invoice_number": tinv_number,
-                        "tax_invoice_date": tinv_date,
-                    }
-                )
+                move_tax_invoices.append((move, tax_invoice))
+                if self._tax_invoice_needs_sequence(move, tax_invoice):
+                    sequence = tax_invoice.tax_line_id.taxinv_sequence_id
+                    key = (sequence, sequence.use_date_range and move.date)
+                    to_number[key].append(tax_invoice.id)
+
+        # Reserve all numbers of a sequence at once, in posting order
+        reserved_numbers = {}
+        for (sequence, sequence_date), tax_invoice_ids in to_number.items():
+            numbers = sequence._next_batch(
+                len(tax_invoice_ids), sequence_date=sequence_date or None
+            )
+            reserved_numbers.update(zip(tax_invoice_ids, numbers))
+
+        tax_invoice_ids_by_vals = defaultdict(list)
+        for move, tax_invoice in move_tax_invoices:
+            tinv_number, tinv_date = self._get_tax_invoice_number(
+                move,
+                tax_invoice,
+                tax_invoice.tax_line_id,
+                reserved_number=reserved_numbers.get(tax_invoice.id),
+            )
+            tax_invoice_ids_by_vals[(tinv_number, tinv_date)].append(tax_invoice.id)
+        TaxInvoice = self.env["account.move.tax.invoice"]
+        for (tinv_number, tinv_date), tax_invoice_ids in tax_invoice_ids_by_vals.items():
+            TaxInvoice.browse(tax_invoice_ids).write(
+                {
+                    "tax_invoice_number": tinv_number,
+                    "tax_invoice_date": tinv_date,
+                }
+            )
 
-        def handle_withholding_taxes(move):
-            # Normal case, create withholding.move only when withholding
-            # Changed: only check wht_tax_id, not wht_account flag
-            wht_movelines = move.line_ids.filtered(lambda line: line.wht_tax_id)
-            withholding_moves = [
-                Command.create(self._prepare_withholding_move(wht_ml))
-                for wht_ml in wht_movelines
-            ]
-            move.write({"wht_move_ids": [Command.clear()] + withholding_moves})
-
-            # On payment JE, keep track of move when PIT not withheld,
-            # use data from vendor bill
+    def _post_withholding_moves(self):
+        # Normal case, create withholding.move only when withholding
+        # Changed: only check wht_tax_id, not wht_account flag
+        self.mapped("wht_move_ids").unlink()
+        WithholdingMove = self.env["account.withholding.move"]
+        vals_list = []
+        for move in self:
+            for wht_ml in move.line_ids.filtered(lambda line: line.wht_tax_id):
+                vals = self._prepare_withholding_move(wht_ml)
+                vals["move_id"] = move.id
+                vals_list.append(vals)
+        WithholdingMove.create(vals_list)
+
+        # On payment JE, keep track of move when PIT not withheld,
+        # use data from vendor bill
+        line_pit = None
+        pit_vals_list = []
+        for move in self:
             payment_id = getattr(move, "origin_payment_id", False)
-            if payment_id and not payment_id.wht_move_ids.mapped("is_pit"):
+            if not payment_id or payment_id.wht_move_ids.mapped("is_pit"):
+                continue
+            if line_pit is None:
                 active_ids = self.env.context.get("active_ids", [])
                 model = self.env.context.get("active_model")
                 move_lines = self._get_movelines_from_model(model, active_ids)
                 line_pit = move_lines.filtered("wht_tax_id.is_pit")
-                if not line_pit:
-                    return
-
-                line_wht_moves = [
-                    Command.create(
-                        self._prepare_withholding_move(line, pit_no_wht=True)
-                    )
-                    for line in line_pit
-                ]
-                move.write({"wht_move_ids": line_wht_moves})
-
-        # Purchase Taxes
-        for move in self:
-            handle_purchase_taxes(move)
-
-        res = super()._post(soft=soft)
-
-        # Sales Taxes
-        for move in self:
-            handle_sales_taxes(move)
-
-        # Withholding Tax:
-        # - Create account.withholding.move, for every withholding tax line
-        # - For case PIT, it is possible that there is no withholidng amount
-        #   but still need to keep track the withholding.move base amount
-        for move in self:
-            handle_withholding_taxes(move)
-
-        # When post, do remove the existing certs
-        self.mapped("wht_cert_ids").unlink()
-        return res
+            for line in line_pit:
+                vals = self._prepare_withholding_move(line, pit_no_wht=True)
+                vals["move_id"] = move.id
+                pit_vals_list.append(vals)
+        if pit_vals_list:
+            WithholdingMove.create(pit_vals_list)
 
     def _prepare_withholding_move(self, wht_ml, pit_no_wht=False):
         """Prepare dict for account.withholding.move"""
@@ -574,7 +630,17 @@ class AccountMove(models.Model):
             "company_id": wht_ml.company_id.id,
         }
 
-    def _get_tax_invoice_number(self, move, tax_invoice, tax):
+    def _tax_invoice_needs_sequence(self, move, tax_invoice):
+        """True when _get_tax_invoice_number would take a new sequence number"""
+        sequence = tax_invoice.tax_line_id.taxinv_sequence_id
+        if not sequence or (move.move_type == "entry" and move.reversed_entry_id):
+            return False
+        number = tax_invoice.tax_invoice_number
+        if move.move_type in ("out_invoice", "out_refund") and number == "/":
+            number = False
+        return not number
+
+    def _get_tax_invoice_number(self, move, tax_invoice, tax, reserved_number=False):
         """Tax Invoice Numbering for Customer Invioce / Receipt
         - If move_type in ("out_invoice", "out_refund")
           - If number is (False, "/"), consider it no valid number then,
@@ -583,6 +649,7 @@ class AccountMove(models.Model):
         - Else,
           - If no number
             - If move_type = "entry" and has reversed entry, use origin number
+        reserved_number, when given, is used instead of a new sequence number
         """
         origin_move = move.move_type == "entry" and move.reversed_entry_id or move
         sequence = tax_invoice.tax_line_id.taxinv_sequence_id
@@ -600,7 +667,9 @@ class AccountMove(models.Model):
                         tax_invoices and tax_invoices[0].tax_invoice_number or False
                     )
                 else:  # Normal case, use new sequence
-                    number = sequence.next_by_id(sequence_date=move.date)
+                    number = reserved_number or sequence.next_by_id(
+                        sequence_date=move.date
+                    )
             else:  # Now sequence for this tax, use config (payment/invoice number)
                 number = (
                     tax_invoice.payment_id.name
@@ -660,6 +729,10 @@ class AccountMove(models.Model):
     def button_draft(self):
         res = super().button_draft()
         self.mapped("wht_cert_ids").action_cancel()
+        # PIT of a draft payment does not count in the yearly income
+        self.env["personal.income.tax.yearly"]._refresh_wht_moves(
+            self.mapped("wht_move_ids")
+        )
         return res
 
     def create_wht_cert(self):
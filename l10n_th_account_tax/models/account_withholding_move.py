@@ -95,6 +95,52 @@ class AccountWithholdingMove(models.Model):
         check_company=True,
     )
 
+    # Fields that change the yearly PIT income of a partner
+    _PIT_YEARLY_FIELDS = {
+        "partner_id",
+        "move_id",
+        "payment_id",
+        "date",
+        "calendar_year",
+        "amount_income",
+        "amount_wht",
+        "wht_tax_id",
+        "company_id",
+    }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env["personal.income.tax.yearly"]._refresh_wht_moves(records)
+        return records
+
+    def write(self, vals):
+        if self._PIT_YEARLY_FIELDS.isdisjoint(vals):
+            return super().write(vals)
+        # Partner or year may change, refresh the old rows as well
+        partner_ids = set(self.mapped("partner_id").ids)
+        calendar_years = set(self.mapped("calendar_year"))
+        res = super().write(vals)
+        partner_ids |= set(self.mapped("partner_id").ids)
+        calendar_years |= set(self.mapped("calendar_year"))
+        calendar_years.discard(False)
+        if partner_ids and calendar_years:
+            self.env["personal.income.tax.yearly"]._refresh(
+                partner_ids, calendar_years
+            )
+        return res
+
+    def unlink(self):
+        wht_moves = self.filtered(lambda wht: wht.partner_id and wht.calendar_year)
+        partner_ids = wht_moves.mapped("partner_id").ids
+        calendar_years = set(wht_moves.mapped("calendar_year"))
+        res = super().unlink()
+        if partner_ids:
+            self.env["personal.income.tax.yearly"]._refresh(
+                partner_ids, calendar_years
+            )
+        return res
+
     @api.depends("move_id")
     def _compute_move_data(self):
         for rec in self:
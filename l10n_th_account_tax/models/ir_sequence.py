@@ -0,0 +1,46 @@
+# Copyright 2019 Ecosoft Co., Ltd (https://ecosoft.co.th/)
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl.html)
+
+from odoo import fields, models
+from odoo.addons.base.models.ir_sequence import _update_nogap
+
+
+class IrSequence(models.Model):
+    _inherit = "ir.sequence"
+
+    def _reserve_numbers(self, count, date_range=None):
+        """Reserve ``count`` numbers of the sequence (or of its date range)
+        in one statement, return their number_next values"""
+        if self.implementation == "standard":
+            seq_name = "ir_sequence_%03d" % self.id
+            if date_range:
+                seq_name = "ir_sequence_%03d_%03d" % (self.id, date_range.id)
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)", (seq_name, count)
+            )
+            return [row[0] for row in self.env.cr.fetchall()]
+        increment = self.number_increment
+        number_next = _update_nogap(date_range or self, increment * count)
+        return [number_next + increment * i for i in range(count)]
+
+    def _next_batch(self, count, sequence_date=None):
+        """Same as ``count`` calls of next_by_id(), with one reservation"""
+        self.ensure_one()
+        self.check_access_rights("read")
+        if not self.use_date_range:
+            numbers = self._reserve_numbers(count)
+            return [self.get_next_char(number) for number in numbers]
+        dt = sequence_date or self._context.get("ir_sequence_date", fields.Date.today())
+        seq_date = self.env["ir.sequence.date_range"].search(
+            [
+                ("sequence_id", "=", self.id),
+                ("date_from", "<=", dt),
+                ("date_to", ">=", dt),
+            ],
+            limit=1,
+        )
+        if not seq_date:
+            seq_date = self._create_date_range_seq(dt)
+        sequence = self.with_context(ir_sequence_date_range=seq_date.date_from)
+        numbers = self._reserve_numbers(count, date_range=seq_date)
+        return [sequence.get_next_char(number) for number in numbers]
@@ -118,10 +118,9 @@ class PersonalIncomeTax(models.Model):
     @api.model
     def _get_pit_amount_yearly(self, partner, pit_date):
         calendar_year = pit_date.strftime("%Y")
-        pit_year = partner.pit_move_ids.filtered(
-            lambda pit: pit.calendar_year == calendar_year
+        return self.env["personal.income.tax.yearly"]._get_amount_income(
+            partner, calendar_year
         )
-        return sum(pit_year.mapped("amount_income"))
 
 
 class PersonalIncomeTaxRate(models.Model):
@@ -166,3 +165,123 @@ class PersonalIncomeTaxRate(models.Model):
         for rec in self:
             prev_rec = self.filtered(lambda pit, rec=rec: pit.sequence <= rec.sequence)
             rec.amount_tax_accum = sum(prev_rec.mapped("amount_tax_max"))
+
+
+class PersonalIncomeTaxYearly(models.Model):
+    """Running PIT income per partner and calendar year
+
+    Kept in sync with account.withholding.move, so the yearly income used
+    for expected withholding does not need to read all PIT moves of a partner.
+    """
+
+    _name = "personal.income.tax.yearly"
+    _description = "PIT Yearly Income"
+    _order = "calendar_year desc, partner_id"
+    _rec_name = "calendar_year"
+
+    partner_id = fields.Many2one(
+        comodel_name="res.partner",
+        required=True,
+        index=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+    calendar_year = fields.Char(required=True, index=True, readonly=True)
+    company_id = fields.Many2one(
+        comodel_name="res.company",
+        required=True,
+        index=True,
+        ondelete="cascade",
+        readonly=True,
+    )
+    currency_id = fields.Many2one(related="company_id.currency_id")
+    amount_income = fields.Monetary(string="Income", readonly=True)
+    amount_wht = fields.Monetary(string="Withholding Amount", readonly=True)
+    move_count = fields.Integer(string="PIT Moves", readonly=True)
+
+    _sql_constraints = [
+        (
+            "partner_year_company_unique",
+            "UNIQUE(partner_id, calendar_year, company_id)",
+            "Yearly PIT income must be unique per partner, year and company!",
+        ),
+    ]
+
+    @api.model
+    def _get_amount_income(self, partner, calendar_year):
+        """Yearly income of a partner, in the companies the user works in"""
+        rows = self.sudo().search_read(
+            [
+                ("partner_id", "=", partner.id),
+                ("calendar_year", "=", calendar_year),
+                ("company_id", "in", self.env.companies.ids),
+            ],
+            ["amount_income"],
+        )
+        return sum(row["amount_income"] for row in rows)
+
+    @api.model
+    def _refresh_wht_moves(self, wht_moves):
+        """Recompute the rows touched by the given withholding moves"""
+        wht_moves = wht_moves.filtered(
+            lambda wht: wht.partner_id and wht.calendar_year
+        )
+        if wht_moves:
+            self._refresh(
+                wht_moves.mapped("partner_id").ids,
+                set(wht_moves.mapped("calendar_year")),
+            )
+
+    @api.model
+    def _refresh(self, partner_ids, calendar_years=None):
+        """Recompute rows of the partners (and years) from their PIT moves,
+        with the same rules as res.partner's pit_move_ids"""
+        domain = [("is_pit", "=", True), ("payment_state", "!=", "draft")]
+        row_domain = []
+        if partner_ids is not None:
+            domain.append(("partner_id", "in", list(partner_ids)))
+            row_domain.append(("partner_id", "in", list(partner_ids)))
+        if calendar_years is not None:
+            domain.append(("calendar_year", "in", list(calendar_years)))
+            row_domain.append(("calendar_year", "in", list(calendar_years)))
+        groups = (
+            self.env["account.withholding.move"]
+            .sudo()
+            .read_group(
+                domain,
+                ["amount_income:sum", "amount_wht:sum"],
+                ["partner_id", "calendar_year", "company_id"],
+                lazy=False,
+            )
+        )
+        totals = {
+            (group["partner_id"][0], group["calendar_year"], group["company_id"][0]): {
+                "amount_income": group["amount_income"],
+                "amount_wht": group["amount_wht"],
+                "move_count": group["__count"],
+            }
+            for group in groups
+            if group["partner_id"] and group["calendar_year"]
+        }
+        rows = self.sudo().search(row_domain)
+        to_unlink = rows.browse()
+        for row in rows:
+            vals = totals.pop(
+                (row.partner_id.id, row.calendar_year, row.company_id.id), None
+            )
+            if vals is None:
+                to_unlink |= row
+            elif any(row[fname] != value for fname, value in vals.items()):
+                row.write(vals)
+        to_unlink.unlink()
+        self.sudo().create(
+            [
+                dict(
+                    vals,
+                    partner_id=partner_id,
+                    calendar_year=calendar_year,
+                    company_id=company_id,
+                )
+                for (partner_id, calendar_year, company_id), vals in totals.items()
+            ]
+        )
@@ -31,10 +31,10 @@ class ResPartner(models.Model):
 
     def action_view_pit_move_yearly_summary(self):
         ctx = self._get_context_pit_monitoring()
-        domain = [("is_pit", "=", True), ("partner_id", "=", self.id)]
+        domain = [("partner_id", "=", self.id)]
         return {
             "name": self.env._("Personal Income Tax Yearly"),
-            "res_model": "account.withholding.move",
+            "res_model": "personal.income.tax.yearly",
             "view_mode": "pivot,list,graph",
             "context": ctx,
             "domain": domain,
@@ -983,3 +983,25 @@ class TestTaxInvoice(AccountTestInvoicingCommon):
         self.assertEqual(move.tax_invoice_ids.report_late_mo, "0")
         line_tax.manual_tax_invoice = False
         self.assertFalse(move.tax_invoice_ids)
+
+    def test_16_customer_invoice_batch_post_sequence(self):
+        """Posting several invoices together numbers tax invoices
+        in posting order, same as posting them one by one"""
+        self.cust_vat_sequence.prefix = "CTX"
+        self.cust_vat_sequence.number_next_actual = 1
+        self.output_vat.taxinv_sequence_id = self.cust_vat_sequence
+        invoices = self.customer_invoice_vat.copy()
+        invoices |= self.customer_invoice_vat.copy()
+        invoices |= self.customer_invoice_vat.copy()
+        invoices.action_post()
+        self.assertEqual(
+            [inv.tax_invoice_ids.tax_invoice_number for inv in invoices],
+            ["CTX0001", "CTX0002", "CTX0003"],
+        )
+        self.assertEqual(
+            invoices.mapped("tax_invoice_ids.tax_invoice_date"), invoices.mapped("date")
+        )
+        # Next single posting continues the same sequence
+        single = self.customer_invoice_vat.copy()
+        single.action_post()
+        self.assertEqual(single.tax_invoice_ids.tax_invoice_number, "CTX0004")
@@ -514,3 +514,28 @@ class TestWithholdingTax(AccountTestInvoicingCommon):
         self.assertEqual(
             register_payment.amount, (price_unit - (price_unit * 0.01)) * 2
         )
+
+    def test_07_batch_post_withholding_move(self):
+        """Posting journal entries together creates one withholding move
+        per WHT line, linked to its own entry"""
+        price_unit = 100
+        moves = self.move_obj
+        for wht_amount, wht_tax in ((1, self.wht_1), (3, self.wht_3)):
+            moves |= self._create_invoice(
+                self.partner_1.id,
+                self.misc_journal.id,
+                "entry",
+                self.wht_account.id,
+                price_unit,
+                wht_amount=wht_amount,
+                wht_tax_id=wht_tax.id,
+            )
+        moves.action_post()
+        for move, wht_tax in zip(moves, (self.wht_1, self.wht_3)):
+            self.assertEqual(len(move.wht_move_ids), 1)
+            self.assertEqual(move.wht_move_ids.wht_tax_id, wht_tax)
+            self.assertEqual(move.wht_move_ids.partner_id, self.partner_1)
+        # Reset and post again, withholding moves are replaced
+        moves.button_draft()
+        moves.action_post()
+        self.assertEqual(len(moves.wht_move_ids), 2)
@@ -7,7 +7,7 @@ from freezegun import freeze_time
 
 from odoo import Command, fields
 from odoo.exceptions import UserError, ValidationError
-from odoo.tests import Form, tagged
+from odoo.tests import Form, new_test_user, tagged
 
 from odoo.addons.account.tests.common import AccountTestInvoicingCommon
 
@@ -274,3 +274,66 @@ class TestWithholdingTaxPIT(AccountTestInvoicingCommon):
         )
 
         self.assertEqual(result1, result2)
+
+    @freeze_time("2001-02-01")
+    def test_04_pit_yearly_income(self):
+        """Yearly PIT income follows PIT moves on payment and cancel"""
+        self.pit_rate = self._create_pit("2001")
+        pit_yearly_obj = self.env["personal.income.tax.yearly"]
+        data = [
+            {
+                "price_unit": 1000.0,
+                "wht_tax_id": self.wht_pit.id,
+            }
+        ]
+        invoice = self._create_invoice(data)
+        invoice.action_post()
+        with Form.from_action(self.env, invoice.action_register_payment()) as wiz_form:
+            action_payment = wiz_form.save().action_create_payments()
+
+        yearly = pit_yearly_obj.search([("partner_id", "=", self.partner.id)])
+        self.assertEqual(yearly.calendar_year, "2001")
+        self.assertEqual(
+            yearly.amount_income, sum(self.partner.pit_move_ids.mapped("amount_income"))
+        )
+        self.assertEqual(
+            yearly.amount_wht, sum(self.partner.pit_move_ids.mapped("amount_wht"))
+        )
+        self.assertEqual(
+            self.pit_rate._get_pit_amount_yearly(self.partner, fields.Date.today()),
+            yearly.amount_income,
+        )
+
+        # Cancel payment, mirrored PIT moves are accumulated too
+        payment = self.account_payment_obj.browse(action_payment["res_id"])
+        payment.action_cancel()
+        self.assertEqual(
+            yearly.amount_income, sum(self.partner.pit_move_ids.mapped("amount_income"))
+        )
+
+        # Rebuilding the table gives the same figures
+        amounts = (yearly.amount_income, yearly.amount_wht)
+        pit_yearly_obj.search([]).unlink()
+        pit_yearly_obj._refresh(None)
+        yearly = pit_yearly_obj.search([("partner_id", "=", self.partner.id)])
+        self.assertEqual((yearly.amount_income, yearly.amount_wht), amounts)
+
+    @freeze_time("2001-02-01")
+    def test_05_pit_yearly_income_non_admin(self):
+        """Yearly PIT rows are maintained for users without access to them"""
+        self._create_pit("2001")
+        pit_yearly_obj = self.env["personal.income.tax.yearly"]
+        invoice = self._create_invoice(
+            [{"price_unit": 1000.0, "wht_tax_id": self.wht_pit.id}]
+        )
+        invoice.action_post()
+        with Form.from_action(self.env, invoice.action_register_payment()) as wiz_form:
+            wiz_form.save().action_create_payments()
+        self.assertTrue(pit_yearly_obj.search([("partner_id", "=", self.partner.id)]))
+
+        billing_user = new_test_user(
+            self.env, login="pit_billing", groups="account.group_account_invoice"
+        )
+        # Removing the PIT moves empties the yearly row, which is then deleted
+        self.partner.pit_move_ids.with_user(billing_user).unlink()
+        self.assertFalse(pit_yearly_obj.search([("partner_id", "=", self.partner.id)]))
@@ -21,7 +21,7 @@
 #############################################################################
 {
     'name': "buz Product Low Stock Alert",
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.1.0',
     "category": 'Warehouse,Point of Sale',
     'summary': """Product Low Stock Alert Display in Point of Sale and 
     Product Views""",
@@ -48,6 +48,7 @@
         ],
     },
     'images': ['static/description/banner.jpg'],
+    'post_init_hook': 'post_init_hook',
     'license': "LGPL-3",
     'installable': True,
     'application': False,
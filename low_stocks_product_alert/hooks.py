@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+
+
+def post_init_hook(env):
+    """Stores the low stock alert state of the existing products"""
+    env['product.product']._update_all_low_stock_alerts()
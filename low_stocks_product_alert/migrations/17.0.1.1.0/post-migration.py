@@ -0,0 +1,17 @@
+"""
+Post-migration script for low_stocks_product_alert
+Stores the low stock alert state now kept in stored fields
+"""
+
+import logging
+
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Fill the stored alert fields of every product"""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['product.product']._update_all_low_stock_alerts()
+    _logger.info("Low stock alert state stored for all products")
@@ -23,3 +23,4 @@ from . import product_product
 from . import product_template
 from . import pos_session
 from . import res_config_settings
+from . import stock_quant
@@ -19,36 +19,133 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from collections import defaultdict
+
 from odoo import api, fields, models
+from odoo.tools import float_round, split_every
+
+# Background of the product template kanban card for each alert state
+ALERT_COLOR = '#fdc6c673'
+NO_ALERT_COLOR = 'white'
+# Number of products refreshed together when every alert is recomputed
+DEFAULT_ALERT_BATCH_SIZE = 1000
+# Key of the products waiting for an alert refresh in the precommit data
+PENDING_ALERT_KEY = 'low_stocks_product_alert.product_ids'
 
 
 class ProductProduct(models.Model):
     """
     This is an Odoo model for product products. It inherits from the
-    'product.product' model and extends its functionality by adding a
-    computed field for product alert state.
+    'product.product' model and extends its functionality by adding stored
+    fields for the product alert state.
 
      Methods:
-        _compute_alert_tag(): Computes the value of the 'alert_tag' field based on the
-        product's stock quantity and configured low stock alert parameters
+        _update_low_stock_alert(): Stores the alert state of the products and
+        of their templates from the quantities in the warehouses.
+        _register_low_stock_alert(): Refreshes the alert state of products
+        whose quants changed, once before the transaction is committed.
     """
     _inherit = 'product.product'
 
+    is_low_stock = fields.Boolean(
+        string='Low Stock', readonly=True, copy=False, index=True,
+        help='Set when the on hand quantity of the product is at or below '
+             'the low stock alert quantity.')
     alert_tag = fields.Char(
-        string='Product Alert Tag', compute='_compute_alert_tag',
+        string='Product Alert Tag', readonly=True, copy=False,
         help='This field represents the alert tag of the product.')
 
-    @api.depends('qty_available')
-    def _compute_alert_tag(self):
-        """Computes the value of the 'alert_tag' field based on the product's
-        stock quantity and configured low stock alert parameters."""
-        stock_alert = self.env['ir.config_parameter'].sudo().get_param(
-            'low_stocks_product_alert.is_low_stock_alert')
-        for rec in self:
-            if stock_alert:
-                is_low_stock = True if rec.detailed_type == 'product' and rec.qty_available <= int(
-                    self.env['ir.config_parameter'].sudo().get_param(
-                        'low_stocks_product_alert.min_low_stock_alert')) else False
-                rec.alert_tag = rec.qty_available if is_low_stock else False
-            else:
-                rec.alert_tag = False
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Products start without stock, store their alert state."""
+        products = super().create(vals_list)
+        products._update_low_stock_alert()
+        return products
+
+    @api.model
+    def _get_low_stock_alert_threshold(self):
+        """Returns the alert quantity, or None when alerts are disabled."""
+        params = self.env['ir.config_parameter'].sudo()
+        if not params.get_param('low_stocks_product_alert.is_low_stock_alert'):
+            return None
+        return int(params.get_param(
+            'low_stocks_product_alert.min_low_stock_alert') or 0)
+
+    def _get_warehouse_quantities(self):
+        """Returns {product id: quantity} in the warehouse locations, read
+        with one grouped query for all the products."""
+        groups = self.env['stock.quant'].sudo()._read_group(
+            [('product_id', 'in', self.ids),
+             ('location_id.usage', '=', 'internal'),
+             ('location_id.warehouse_id', '!=', False)],
+            ['product_id'], ['quantity:sum'])
+        return {product.id: quantity for product, quantity in groups}
+
+    def _update_low_stock_alert(self):
+        """Stores the alert state of these products and of their templates.
+        Quantities are read with one grouped query and the records are
+        written once per distinct value, only when their state changed."""
+        if not self:
+            return
+        threshold = self._get_low_stock_alert_threshold()
+        templates = self.sudo().product_tmpl_id
+        variants = templates.product_variant_ids | self.sudo()
+        quantities = variants._get_warehouse_quantities()
+        template_quantities = defaultdict(float)
+        variant_values = defaultdict(list)
+        for product in variants:
+            qty = float_round(quantities.get(product.id, 0.0),
+                              precision_rounding=product.uom_id.rounding)
+            if product.active:
+                template_quantities[product.product_tmpl_id] += qty
+            is_low = (threshold is not None
+                      and product.detailed_type == 'product'
+                      and qty <= threshold)
+            values = (is_low, str(qty) if is_low else False)
+            if values != (product.is_low_stock, product.alert_tag or False):
+                variant_values[values].append(product.id)
+        for (is_low, tag), product_ids in variant_values.items():
+            variants.browse(product_ids).write(
+                {'is_low_stock': is_low, 'alert_tag': tag})
+        template_values = defaultdict(list)
+        for template in templates:
+            is_low = (threshold is not None
+                      and template.detailed_type == 'product'
+                      and template_quantities[template] <= threshold)
+            color = ALERT_COLOR if is_low else NO_ALERT_COLOR
+            if (is_low, color) != (template.alert_state, template.color_field):
+                template_values[(is_low, color)].append(template.id)
+        for (is_low, color), template_ids in template_values.items():
+            templates.browse(template_ids).write(
+                {'alert_state': is_low, 'color_field': color})
+
+    @api.model
+    def _update_all_low_stock_alerts(self):
+        """Recomputes the alert state of every product in batches, used when
+        the alert settings change."""
+        product_ids = self.sudo().with_context(active_test=False).search(
+            []).ids
+        for batch_ids in split_every(DEFAULT_ALERT_BATCH_SIZE, product_ids):
+            products = self.sudo().with_context(active_test=False).browse(
+                batch_ids)
+            products._update_low_stock_alert()
+            products.env.flush_all()
+            products.env.invalidate_all()
+
+    @api.model
+    def _register_low_stock_alert(self, product_ids):
+        """Refreshes the alert state of the products once before commit, so
+        the quants written by each move line cost one batch in total."""
+        precommit = self.env.cr.precommit
+        pending = precommit.data.get(PENDING_ALERT_KEY)
+        if pending is None:
+            pending = precommit.data[PENDING_ALERT_KEY] = set()
+            products = self.sudo()
+
+            @precommit.add
+            def update_low_stock_alert():
+                pending_products = products.browse(
+                    precommit.data.pop(PENDING_ALERT_KEY, set())).exists()
+                pending_products._update_low_stock_alert()
+                pending_products.env.flush_all()
+        pending.update(product_ids)
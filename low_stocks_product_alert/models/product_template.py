@@ -19,44 +19,34 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import api, fields, models
+from odoo import fields, models
 
 
 class ProductTemplate(models.Model):
     """
     This is an Odoo model for product templates. It inherits from the
-    'product.template' model and extends its functionality by adding computed
-    fields for product alert state and color field.
+    'product.template' model and extends its functionality by adding stored
+    fields for product alert state and color field, maintained by
+    'product.product._update_low_stock_alert'.
 
     Methods:
-         _compute_alert_state: Computes the 'alert_state' and 'color_field'
-         fields based on the product's stock quantity and low stock
-    alert parameters
-
+         write: Refreshes the alert state when the product type changes
     """
     _inherit = 'product.template'
 
     alert_state = fields.Boolean(string='Product Alert State',
-                                 compute='_compute_alert_state',
+                                 readonly=True, copy=False, index=True,
                                  help='This field represents the alert state'
                                       'of the product')
     color_field = fields.Char(string='Background color',
+                              readonly=True, copy=False, default='white',
                               help='This field represents the background '
                                    'color of the product.')
 
-    @api.depends('qty_available')
-    def _compute_alert_state(self):
-        """ Computes the 'alert_state' and 'color_field' fields based on
-        the product's stock quantity and low stock alert parameters."""
-        stock_alert = self.env['ir.config_parameter'].sudo().get_param(
-            'low_stocks_product_alert.is_low_stock_alert')
-        for rec in self:
-            if stock_alert:
-                rec.alert_state, rec.color_field = (False, 'white') if \
-                    rec.detailed_type != 'product' or rec.qty_available > int(
-                        rec.env['ir.config_parameter'].sudo().get_param(
-                            'low_stocks_product_alert.min_low_stock_alert')) \
-                    else (True, '#fdc6c673')
-            else:
-                rec.alert_state = False
-                rec.color_field = 'white'
+    def write(self, vals):
+        """ Only storable products raise alerts, refresh them when the
+        product type changes."""
+        res = super().write(vals)
+        if 'detailed_type' in vals or 'type' in vals:
+            self.product_variant_ids._update_low_stock_alert()
+        return res
@@ -42,3 +42,14 @@ class ResConfigSettings(models.TransientModel):
         help='Change the background color for the product based'
              'on the Alert Quant.',
         config_parameter='low_stocks_product_alert.min_low_stock_alert')
+
+    def set_values(self):
+        """ Recomputes the alert state of every product when the alert
+        settings change."""
+        params = self.env['ir.config_parameter'].sudo()
+        keys = ('low_stocks_product_alert.is_low_stock_alert',
+                'low_stocks_product_alert.min_low_stock_alert')
+        before = [params.get_param(key) for key in keys]
+        super().set_values()
+        if before != [params.get_param(key) for key in keys]:
+            self.env['product.product']._update_all_low_stock_alerts()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Sadique Kottekkat (<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+from odoo import api, models
+
+
+class StockQuant(models.Model):
+    """
+    This is an Odoo model for stock quants. It inherits from the
+    'stock.quant' model to refresh the low stock alert of the products whose
+    quantity changed.
+    """
+    _inherit = 'stock.quant'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """ Registers the products of the new quants for an alert refresh."""
+        quants = super().create(vals_list)
+        self.env['product.product']._register_low_stock_alert(
+            quants.product_id.ids)
+        return quants
+
+    def write(self, vals):
+        """ Registers the products whose quantity changed for an alert
+        refresh."""
+        res = super().write(vals)
+        if 'quantity' in vals or 'location_id' in vals:
+            self.env['product.product']._register_low_stock_alert(
+                self.product_id.ids)
+        return res
+
+    def unlink(self):
+        """ Registers the products of the removed quants for an alert
+        refresh."""
+        product_ids = self.product_id.ids
+        res = super().unlink()
+        self.env['product.product']._register_low_stock_alert(product_ids)
+        return res
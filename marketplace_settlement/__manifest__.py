@@ -17,6 +17,7 @@
         'security/marketplace_settlement_security.xml',
         'security/ir.model.access.csv',
         'data/ir_sequence_data.xml',
+        'data/ir_cron_data.xml',
         'data/marketplace_settlement_profile_data.xml',
         'views/settlement_views.xml',
         'views/marketplace_vendor_bill_views.xml',
@@ -0,0 +1,85 @@
+import base64
+import csv
+import io
+import logging
+import time
+
+from odoo import models, api, _
+
+_logger = logging.getLogger(__name__)
+
+# Number of records handed to a single create() call
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+
+
+class MarketplaceCsvImportMixin(models.AbstractModel):
+    """Shared engine for the marketplace CSV import wizards
+
+    Rows are parsed incrementally from the uploaded file, validated as a whole
+    before anything is written, and created in batches.
+    """
+    _name = 'marketplace.csv.import.mixin'
+    _description = 'Marketplace CSV Import Engine'
+
+    @api.model
+    def _get_import_batch_size(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'marketplace_settlement.import_batch_size', DEFAULT_IMPORT_BATCH_SIZE))
+
+    @api.model
+    def _iter_csv_rows(self, csv_file, delimiter, as_dict=False):
+        """Yield ``(row_number, row)`` from a base64 encoded CSV file
+
+        The file is decoded through a text stream so rows are parsed one at a
+        time instead of materialising the whole content as a string. Row
+        numbers match the line numbers a user sees in a spreadsheet.
+        """
+        stream = io.TextIOWrapper(io.BytesIO(base64.b64decode(csv_file)),
+                                  encoding='utf-8-sig', newline='')
+        if as_dict:
+            reader = csv.DictReader(stream, delimiter=delimiter)
+            first_row = 2
+        else:
+            reader = csv.reader(stream, delimiter=delimiter)
+            first_row = 1
+        for row_num, row in enumerate(reader, start=first_row):
+            yield row_num, row
+
+    @api.model
+    def _iter_batches(self, items, size=None):
+        """Yield lists of at most ``size`` items"""
+        size = size or self._get_import_batch_size()
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @api.model
+    def _parse_amount(self, value):
+        """Parse a CSV amount, blank cells count as zero"""
+        value = (value or '').strip()
+        return float(value) if value else 0.0
+
+    @api.model
+    def _create_in_batches(self, model_name, vals_list):
+        """Create records of ``model_name`` with one create() per batch"""
+        Model = self.env[model_name]
+        records = Model.browse()
+        started = time.monotonic()
+        for batch in self._iter_batches(vals_list):
+            records |= Model.create(batch)
+            _logger.info('%s: created %s records (%.1fs)', model_name, len(records),
+                         time.monotonic() - started)
+        return records
+
+    @api.model
+    def _format_import_errors(self, errors):
+        """Build the full error report shown when validation fails"""
+        lines = [_('Validation failed, nothing was imported.'),
+                 _('Errors encountered: %s') % len(errors), '']
+        lines.extend(errors)
+        return '\n'.join(lines)
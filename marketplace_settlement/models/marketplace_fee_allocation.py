@@ -14,6 +14,9 @@ class MarketplaceFeeAllocation(models.Model):
     invoice_id = fields.Many2one('account.move', string='Invoice', required=True, 
                                 domain="[('move_type', 'in', ['out_invoice', 'out_refund'])]")
     
+    marketplace_order_ref = fields.Char('Marketplace Order No.', index=True, copy=False,
+                                        help='Order number from the marketplace CSV, used as key on re-import')
+    
     # Invoice Information (for reporting convenience)
     invoice_number = fields.Char(related='invoice_id.name', string='Invoice Number', readonly=True, store=True)
     invoice_date = fields.Date(related='invoice_id.invoice_date', string='Invoice Date', readonly=True, store=True)
@@ -175,23 +178,29 @@ class MarketplaceFeeAllocation(models.Model):
         for record in self:
             record.total_deductions_alloc = (record.base_fee_alloc or 0.0) + (record.vat_input_alloc or 0.0) + (record.wht_alloc or 0.0)
 
-    @api.model
-    def create(self, vals):
+    @api.model_create_multi
+    def create(self, vals_list):
         # Auto-populate allocation base amount from invoice if not provided
-        if not vals.get('allocation_base_amount') and vals.get('invoice_id'):
-            invoice = self.env['account.move'].browse(vals['invoice_id'])
-            vals['allocation_base_amount'] = invoice.amount_untaxed
+        invoice_ids = [vals['invoice_id'] for vals in vals_list
+                       if not vals.get('allocation_base_amount') and vals.get('invoice_id')]
+        amounts = {inv.id: inv.amount_untaxed for inv in self.env['account.move'].browse(invoice_ids)}
+        for vals in vals_list:
+            if not vals.get('allocation_base_amount') and vals.get('invoice_id'):
+                vals['allocation_base_amount'] = amounts[vals['invoice_id']]
         
-        return super().create(vals)
+        return super().create(vals_list)
 
     @api.constrains('settlement_id', 'invoice_id')
     def _check_invoice_in_settlement(self):
         """Ensure invoice is part of the settlement"""
+        settlement_invoice_ids = {}
         for record in self:
             if not record.settlement_id or not record.invoice_id:
                 continue  # Skip validation if required fields are not yet set
                 
-            if record.invoice_id not in record.settlement_id.invoice_ids:
+            if record.settlement_id.id not in settlement_invoice_ids:
+                settlement_invoice_ids[record.settlement_id.id] = set(record.settlement_id.invoice_ids.ids)
+            if record.invoice_id.id not in settlement_invoice_ids[record.settlement_id.id]:
                 raise ValidationError(_("Invoice %s is not part of settlement %s") % 
                                     (record.invoice_id.name, record.settlement_id.name))
 
@@ -65,11 +65,12 @@ class MarketplaceVendorBill(models.Model):
     
     notes = fields.Text('Notes')
 
-    @api.model
-    def create(self, vals):
-        if vals.get('name', 'New') == 'New':
-            vals['name'] = self.env['ir.sequence'].next_by_code('marketplace.vendor.bill') or 'New'
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', 'New') == 'New':
+                vals['name'] = self.env['ir.sequence'].next_by_code('marketplace.vendor.bill') or 'New'
+        return super().create(vals_list)
 
     @api.depends('line_ids.amount', 'line_ids.vat_amount', 'line_ids.wht_amount')
     def _compute_amounts(self):
@@ -81,18 +82,22 @@ class MarketplaceVendorBill(models.Model):
 
     @api.constrains('document_reference', 'document_type')
     def _check_unique_document_reference(self):
-        for record in self:
-            if record.document_reference:
-                existing = self.search([
-                    ('document_reference', '=', record.document_reference),
-                    ('document_type', '=', record.document_type),
-                    ('id', '!=', record.id)
-                ])
-                if existing:
-                    raise ValidationError(
-                        _('Document reference %s already exists for document type %s') % 
-                        (record.document_reference, dict(record._fields['document_type'].selection)[record.document_type])
-                    )
+        # One query for the whole batch instead of one search per record
+        records = self.filtered('document_reference')
+        counts = {}
+        if records:
+            groups = self.read_group(
+                [('document_reference', 'in', records.mapped('document_reference'))],
+                ['document_reference', 'document_type'],
+                ['document_reference', 'document_type'], lazy=False)
+            counts = {(group['document_reference'], group['document_type']): group['__count']
+                      for group in groups}
+        for record in records:
+            if counts.get((record.document_reference, record.document_type), 0) > 1:
+                raise ValidationError(
+                    _('Document reference %s already exists for document type %s') % 
+                    (record.document_reference, dict(record._fields['document_type'].selection)[record.document_type])
+                )
 
     @api.constrains('document_reference', 'document_type')
     def _check_document_reference_format(self):
@@ -425,6 +430,8 @@ class MarketplaceVendorBillLine(models.Model):
     sequence = fields.Integer('Sequence', default=10)
     
     description = fields.Char('Description', required=True)
+    order_ref = fields.Char('Marketplace Order No.', index=True,
+                            help='Order number from the imported CSV, used as key on re-import')
     account_id = fields.Many2one('account.account', string='Account', required=True,
                                domain="[('account_type', 'in', ['expense', 'asset_expense'])]")
     amount = fields.Monetary('Amount', currency_field='currency_id', required=True)
@@ -1,4 +1,6 @@
 from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools.sql import create_index
 
 
 class SaleOrder(models.Model):
@@ -39,6 +41,72 @@ class AccountMove(models.Model):
                                            help='Indicates if this vendor bill can be linked to a settlement')
     linked_settlement_state = fields.Selection(related='x_settlement_id.state', string='Settlement State', readonly=True)
 
+    def init(self):
+        super().init()
+        # Partial index backing the settlement wizard invoice selector: only
+        # open customer invoices are indexed, so it stays small on busy channels
+        create_index(
+            self._cr, 'account_move_trade_channel_open_index', self._table,
+            ['trade_channel', 'invoice_date'],
+            where="state = 'posted' AND move_type IN ('out_invoice', 'out_refund') "
+                  "AND payment_state NOT IN ('paid', 'in_payment', 'reversed')",
+        )
+
+    @api.model
+    def _get_open_marketplace_invoices(self, trade_channel, date_from=None, date_to=None):
+        """Return open customer invoices of a trade channel in a single query
+
+        Selects posted invoices and credit notes of the allowed companies with a
+        residual amount and no reconciled receivable line, optionally restricted
+        to an invoice date range.
+
+        :return: list of ``(invoice_id, amount_residual)`` tuples ordered by date
+        """
+        self.flush_model(['state', 'move_type', 'payment_state', 'trade_channel',
+                          'company_id', 'amount_residual', 'invoice_date'])
+        self.env['account.move.line'].flush_model(['move_id', 'account_id', 'reconciled'])
+        where_date = ''
+        params = {
+            'trade_channel': trade_channel,
+            'company_ids': self.env.companies.ids,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
+        if date_from:
+            where_date += ' AND m.invoice_date >= %(date_from)s'
+        if date_to:
+            where_date += ' AND m.invoice_date <= %(date_to)s'
+        self.env.cr.execute("""
+            SELECT m.id, m.amount_residual
+              FROM account_move m
+             WHERE m.state = 'posted'
+               AND m.move_type IN ('out_invoice', 'out_refund')
+               AND m.payment_state NOT IN ('paid', 'in_payment', 'reversed')
+               AND m.trade_channel = %(trade_channel)s
+               AND m.company_id = ANY(%(company_ids)s)
+               AND m.amount_residual != 0
+               {where_date}
+               AND NOT EXISTS (
+                    SELECT 1
+                      FROM account_move_line l
+                      JOIN account_account a ON a.id = l.account_id
+                     WHERE l.move_id = m.id
+                       AND a.account_type = 'asset_receivable'
+                       AND l.reconciled
+               )
+          ORDER BY m.invoice_date, m.id
+        """.format(where_date=where_date), params)
+        return self.env.cr.fetchall()
+
+    def _filter_fully_reconciled_receivable(self):
+        """Return the moves of ``self`` whose receivable lines are all reconciled"""
+        receivable_lines = self.env['account.move.line'].search([
+            ('move_id', 'in', self.ids),
+            ('account_id.account_type', '=', 'asset_receivable'),
+        ])
+        open_move_ids = set(receivable_lines.filtered(lambda l: not l.reconciled).move_id.ids)
+        return receivable_lines.move_id.filtered(lambda m: m.id not in open_move_ids)
+
     def _compute_is_refund(self):
         for rec in self:
             rec.is_refund = (rec.move_type == 'out_refund')
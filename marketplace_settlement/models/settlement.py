@@ -1,4 +1,6 @@
 import logging
+from collections import defaultdict
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, AccessError
 from odoo.tools.float_utils import float_is_zero
@@ -6,6 +8,13 @@ from odoo.tools import float_compare
 
 _logger = logging.getLogger(__name__)
 
+# Settlements with at least this many invoices are reconciled by the cron
+DEFAULT_BACKGROUND_RECONCILE_THRESHOLD = 2000
+# Number of (partner, account) groups handed to one reconciliation batch
+DEFAULT_RECONCILE_CHUNK_SIZE = 500
+# Cron runs after which a settlement that still fails is left for manual reconciliation
+DEFAULT_MAX_RECONCILE_ATTEMPTS = 5
+
 
 class MarketplaceSettlement(models.Model):
     _name = 'marketplace.settlement'
@@ -48,6 +57,11 @@ class MarketplaceSettlement(models.Model):
                                 help='Indicates if this settlement has been posted and cannot be modified')
     can_modify = fields.Boolean('Can Modify', compute='_compute_settlement_status',
                                 help='Indicates if settlement can still be modified')
+    reconcile_pending = fields.Boolean('Reconciliation Pending', copy=False, readonly=True,
+                                       help='Settlement move is posted and invoices are being '
+                                            'reconciled in the background')
+    reconcile_attempt_count = fields.Integer('Reconciliation Attempts', copy=False, readonly=True)
+    reconcile_last_attempt = fields.Datetime('Last Reconciliation Attempt', copy=False, readonly=True)
     
     # AR/AP Netting fields
     vendor_bill_ids = fields.One2many('account.move', 'x_settlement_id',
@@ -143,12 +157,16 @@ class MarketplaceSettlement(models.Model):
 
     @api.depends('vendor_bill_ids')
     def _compute_vendor_bill_count(self):
+        totals = self._get_settlement_totals()
         for record in self:
             # Count only posted vendor bills with residual amounts
-            posted_bills = record.vendor_bill_ids.filtered(
-                lambda b: b.state == 'posted' and b.amount_residual > 0
-            )
-            record.vendor_bill_count = len(posted_bills)
+            if record.id in totals:
+                record.vendor_bill_count = totals[record.id]['open_bill_count']
+            else:
+                posted_bills = record.vendor_bill_ids.filtered(
+                    lambda b: b.state == 'posted' and b.amount_residual > 0
+                )
+                record.vendor_bill_count = len(posted_bills)
 
     @api.depends('vendor_bill_ids')
     def _compute_old_vendor_bill_ids(self):
@@ -321,33 +339,86 @@ class MarketplaceSettlement(models.Model):
                     'Please configure these accounts in the partner\'s Accounting tab.'
                 ) % (partner.name, '\n'.join('• ' + acc for acc in missing_accounts)))
 
+    def _get_settlement_totals(self):
+        """Aggregate invoice and vendor bill amounts of saved settlements in SQL
+
+        Two grouped queries cover every settlement of ``self``: one over the
+        invoice relation table and one over the linked vendor bills. Records
+        that are not saved yet (onchange) are left out, callers compute those
+        from the cache instead.
+
+        :return: dict ``{settlement_id: totals}``
+        """
+        ids = [record.id for record in self if isinstance(record.id, int)]
+        if not ids:
+            return {}
+        self.flush_model(['invoice_ids'])
+        self.env['account.move'].flush_model(['move_type', 'state', 'amount_total',
+                                              'amount_residual', 'x_settlement_id'])
+        totals = {
+            settlement_id: {
+                'total_invoice': 0.0,
+                'bills_residual': 0.0,
+                'bills_total': 0.0,
+                'bills_netted': 0.0,
+                'open_bill_count': 0,
+            } for settlement_id in ids
+        }
+
+        field = self._fields['invoice_ids']
+        # For fee allocation purposes, use total amount not residual
+        # This ensures fee allocation works even after settlement reconciliation
+        self.env.cr.execute(f"""
+            SELECT rel.{field.column1},
+                   SUM(CASE WHEN m.move_type = 'out_refund'
+                            THEN -ABS(m.amount_total) ELSE ABS(m.amount_total) END)
+              FROM {field.relation} rel
+              JOIN account_move m ON m.id = rel.{field.column2}
+             WHERE rel.{field.column1} = ANY(%s)
+          GROUP BY rel.{field.column1}
+        """, [ids])
+        for settlement_id, total_invoice in self.env.cr.fetchall():
+            totals[settlement_id]['total_invoice'] = total_invoice or 0.0
+
+        # Handle both regular bills (positive) and credit notes (negative)
+        self.env.cr.execute("""
+            SELECT m.x_settlement_id,
+                   SUM(CASE WHEN m.move_type = 'in_refund'
+                            THEN -ABS(m.amount_residual) ELSE ABS(m.amount_residual) END),
+                   SUM(CASE WHEN m.move_type = 'in_refund'
+                            THEN -ABS(m.amount_total) ELSE ABS(m.amount_total) END),
+                   SUM(CASE WHEN m.move_type = 'in_refund'
+                            THEN -(ABS(m.amount_total) - ABS(m.amount_residual))
+                            ELSE ABS(m.amount_total) - ABS(m.amount_residual) END),
+                   COUNT(*) FILTER (WHERE m.amount_residual > 0)
+              FROM account_move m
+             WHERE m.x_settlement_id = ANY(%s)
+               AND m.state = 'posted'
+          GROUP BY m.x_settlement_id
+        """, [ids])
+        for settlement_id, residual, total, netted, open_count in self.env.cr.fetchall():
+            totals[settlement_id].update({
+                'bills_residual': residual or 0.0,
+                'bills_total': total or 0.0,
+                'bills_netted': netted or 0.0,
+                'open_bill_count': open_count,
+            })
+        return totals
+
     @api.depends('invoice_ids', 'vendor_bill_ids')
     def _compute_amounts(self):
+        totals = self._get_settlement_totals()
         for record in self:
-            total_invoice = 0.0
-            for inv in record.invoice_ids:
-                # For fee allocation purposes, use total amount not residual
-                # This ensures fee allocation works even after settlement reconciliation
-                if inv.move_type == 'out_refund':
-                    total_invoice -= abs(inv.amount_total)
+            if record.id in totals:
+                total_invoice = totals[record.id]['total_invoice']
+                # For netting calculations, use amount_residual (what's still outstanding)
+                # This ensures we don't count already-netted amounts twice
+                if record.is_netted:
+                    total_vendor_bills = totals[record.id]['bills_total']
                 else:
-                    total_invoice += abs(inv.amount_total)
-            
-            # Calculate total vendor bills
-            # Use amount_residual for current outstanding amounts (important for netting)
-            # Use amount_total only when showing original pre-netting amounts
-            total_vendor_bills = 0.0
-            for bill in record.vendor_bill_ids:
-                if bill.state == 'posted':
-                    # For netting calculations, use amount_residual (what's still outstanding)
-                    # This ensures we don't count already-netted amounts twice
-                    bill_amount = bill.amount_residual if not record.is_netted else bill.amount_total
-                    
-                    # Handle both regular bills (positive) and credit notes (negative)
-                    if bill.move_type == 'in_refund':
-                        total_vendor_bills -= abs(bill_amount)
-                    else:
-                        total_vendor_bills += abs(bill_amount)
+                    total_vendor_bills = totals[record.id]['bills_residual']
+            else:
+                total_invoice, total_vendor_bills = record._compute_amounts_from_cache()
             
             record.total_invoice_amount = total_invoice
             record.total_vendor_bills = total_vendor_bills
@@ -355,21 +426,42 @@ class MarketplaceSettlement(models.Model):
             record.net_settlement_amount = total_invoice  # Full invoice amount
             
             # Net payout calculation considers netting status
-            if record.is_netted:
-                # After netting, net payout is the actual remaining amount
-                # This could be calculated from netting move if needed
-                record.net_payout_amount = record.net_settlement_amount - total_vendor_bills
+            # After netting, net payout is the actual remaining amount
+            record.net_payout_amount = record.net_settlement_amount - total_vendor_bills
+
+    def _compute_amounts_from_cache(self):
+        """Compute invoice and vendor bill totals of an unsaved settlement"""
+        self.ensure_one()
+        total_invoice = 0.0
+        for inv in self.invoice_ids:
+            if inv.move_type == 'out_refund':
+                total_invoice -= abs(inv.amount_total)
             else:
-                # Before netting, show the calculated net amount
-                record.net_payout_amount = record.net_settlement_amount - total_vendor_bills
+                total_invoice += abs(inv.amount_total)
+        
+        # Use amount_residual for current outstanding amounts (important for netting)
+        # Use amount_total only when showing original pre-netting amounts
+        total_vendor_bills = 0.0
+        for bill in self.vendor_bill_ids:
+            if bill.state == 'posted':
+                bill_amount = bill.amount_residual if not self.is_netted else bill.amount_total
+                if bill.move_type == 'in_refund':
+                    total_vendor_bills -= abs(bill_amount)
+                else:
+                    total_vendor_bills += abs(bill_amount)
+        return total_invoice, total_vendor_bills
 
     @api.depends('vendor_bill_ids', 'vendor_bill_ids.amount_residual', 'is_netted', 'netting_move_id')
     def _compute_netted_amount(self):
         """Calculate the amount that has been netted"""
+        totals = self._get_settlement_totals()
         for record in self:
             if record.is_netted and record.netting_move_id and record.vendor_bill_ids:
                 # Calculate netted amount from the difference between original and residual
                 # This shows how much has actually been netted/reconciled
+                if record.id in totals:
+                    record.netted_amount = totals[record.id]['bills_netted']
+                    continue
                 netted = 0.0
                 for bill in record.vendor_bill_ids:
                     if bill.state == 'posted':
@@ -385,18 +477,25 @@ class MarketplaceSettlement(models.Model):
             else:
                 record.netted_amount = 0.0
 
-    @api.depends('move_id', 'move_id.state', 'netting_move_id', 'netting_move_id.state', 
-                 'vendor_bill_ids', 'vendor_bill_ids.state', 'vendor_bill_ids.amount_residual', 'state')
+    # Depend on payment_state rather than amount_residual: a bill only changes
+    # "has an open residual" when its payment state changes, so partial
+    # payments no longer trigger a recompute of every linked settlement.
+    @api.depends('move_id.state', 'netting_move_id.state',
+                 'vendor_bill_ids.state', 'vendor_bill_ids.payment_state', 'state')
     def _compute_netting_state(self):
+        totals = self._get_settlement_totals()
         for record in self:
             # Can perform netting if:
             # 1. Settlement is posted
             # 2. Has posted vendor bills with outstanding amounts
             # 3. No netting move exists yet (or existing one is cancelled)
             # 4. Settlement move has outstanding receivables
-            posted_bills_with_residual = record.vendor_bill_ids.filtered(
-                lambda b: b.state == 'posted' and b.amount_residual > 0
-            )
+            if record.id in totals:
+                has_open_bills = totals[record.id]['open_bill_count'] > 0
+            else:
+                has_open_bills = bool(record.vendor_bill_ids.filtered(
+                    lambda b: b.state == 'posted' and b.amount_residual > 0
+                ))
             
             has_valid_netting = record.netting_move_id and record.netting_move_id.state == 'posted'
             
@@ -404,7 +503,7 @@ class MarketplaceSettlement(models.Model):
                 record.state == 'posted' and 
                 record.move_id and
                 record.move_id.state == 'posted' and
-                len(posted_bills_with_residual) > 0 and 
+                has_open_bills and 
                 not has_valid_netting
             )
             
@@ -489,15 +588,8 @@ class MarketplaceSettlement(models.Model):
             raise UserError(_('Please select invoices to settle.'))
 
         # Check for already reconciled invoices
-        reconciled_invoices = []
-        for invoice in self.invoice_ids:
-            # Check if invoice has unreconciled receivable lines
-            receivable_lines = invoice.line_ids.filtered(
-                lambda l: l.account_id.account_type == 'asset_receivable'
-            )
-            # Check if ALL receivable lines are reconciled
-            if receivable_lines and all(line.reconciled for line in receivable_lines):
-                reconciled_invoices.append(invoice.name)
+        # Invoices whose receivable lines are ALL reconciled
+        reconciled_invoices = self.invoice_ids._filter_fully_reconciled_receivable().mapped('name')
         
         if reconciled_invoices:
             raise UserError(_(
@@ -675,30 +767,20 @@ class MarketplaceSettlement(models.Model):
         }
 
     def _create_settlement_move(self):
-        """Create the settlement journal entry - simplified without deductions"""
+        """Create the settlement journal entry - simplified without deductions
+
+        Customer receivable lines are aggregated per (partner, receivable account)
+        so a payout covering thousands of orders produces one line per customer
+        instead of one line per invoice.
+        """
         self.ensure_one()
 
         # Remove deduction validation - fees handled through vendor bills
 
-        # prepare move lines
-        lines = []
-        total_amount = 0.0
-        currency = self.invoice_ids[0].currency_id
-
-        # helper to detect receivable account across Odoo versions
-        def _is_receivable_account(account):
-            if not account:
-                return False
-            # new style: account.user_type_id.type == 'receivable'
-            if hasattr(account, 'user_type_id') and getattr(account.user_type_id, 'type', False):
-                return account.user_type_id.type == 'receivable'
-            # fallback: account.internal_type == 'receivable'
-            if hasattr(account, 'internal_type'):
-                return account.internal_type == 'receivable'
-            # fallback: account.account_type_id.internal_type
-            if hasattr(account, 'account_type_id') and getattr(account.account_type_id, 'internal_type', False):
-                return account.account_type_id.internal_type == 'receivable'
-            return False
+        invoices = self.invoice_ids
+        not_posted = invoices.filtered(lambda inv: inv.state != 'posted')
+        if not_posted:
+            raise UserError(_('Invoice %s must be posted.') % not_posted[0].name)
 
         # Determine marketplace receivable account (AR-Shopee)
         # Settlement should be Dr AR-Shopee / Cr AR-Customer
@@ -713,41 +795,62 @@ class MarketplaceSettlement(models.Model):
         if not mp_receivable_account:
             raise UserError(_('Settlement account must be configured either in the settlement or in the profile. Marketplace partner %s must have receivable account configured.') % self.marketplace_partner_id.name)
 
-        # No longer use settlement account for this line - use AR account directly
+        # Prefetch partners and their receivable accounts for all invoices at once
+        invoices.mapped('commercial_partner_id.property_account_receivable_id')
 
-        for inv in self.invoice_ids:
-            if inv.state != 'posted':
-                raise UserError(_('Invoice %s must be posted.') % inv.name)
-            # compute residual amount (amount due)
-            residual = inv.amount_residual
+        # Aggregate residual amounts per (commercial partner, receivable account),
+        # the partner carried by the invoice receivable lines
+        groups = {}
+        total_amount = 0.0
+        for inv in invoices:
             # support refunds (credit notes) with negative residual
-            sign = 1
-            if inv.move_type == 'out_refund':
-                sign = -1
-            amt = residual * sign
-            if not float_is_zero(amt, precision_digits=2):
-                total_amount += amt
-                # credit/debit to customer's receivable
-                cust_account = inv.partner_id.property_account_receivable_id
-                if not cust_account:
-                    raise UserError(_('Customer %s must have receivable account.') % inv.partner_id.name)
-                # create line for that customer's receivable (reverse of invoice residual)
-                lines.append((0, 0, {
-                    'name': inv.name + ' - settlement',
-                    'account_id': cust_account.id,
-                    'partner_id': inv.partner_id.id,
-                    'credit': amt if amt > 0 else 0.0,
-                    'debit': -amt if amt < 0 else 0.0,
-                }))
-
-        # No deduction lines - these are now handled through vendor bills
-        # This ensures proper VAT recovery and WHT documentation
+            sign = -1 if inv.move_type == 'out_refund' else 1
+            amt = inv.amount_residual * sign
+            if float_is_zero(amt, precision_digits=2):
+                continue
+            partner = inv.commercial_partner_id
+            cust_account = partner.property_account_receivable_id
+            if not cust_account:
+                raise UserError(_('Customer %s must have receivable account.') % partner.name)
+            group = groups.setdefault((partner.id, cust_account.id), {
+                'partner': partner,
+                'account': cust_account,
+                'amount': 0.0,
+                'invoice_names': [],
+            })
+            group['amount'] += amt
+            group['invoice_names'].append(inv.name)
+            total_amount += amt
 
         # marketplace receivable line (Dr AR-Shopee)
         # This represents the amount marketplace owes us after settlement
-        if total_amount == 0.0:
+        if float_is_zero(total_amount, precision_digits=2):
             raise UserError(_('Total settlement amount is zero.'))
 
+        # credit/debit to customer's receivable (reverse of invoice residual)
+        lines = []
+        for group in groups.values():
+            amt = group['amount']
+            if float_is_zero(amt, precision_digits=2):
+                # Invoices and credit notes of this customer cancel out, they
+                # are reconciled with each other by _reconcile_invoices
+                continue
+            if len(group['invoice_names']) == 1:
+                name = group['invoice_names'][0] + ' - settlement'
+            else:
+                name = _('%(settlement)s - %(partner)s (%(count)s invoices)') % {
+                    'settlement': self.name,
+                    'partner': group['partner'].name,
+                    'count': len(group['invoice_names']),
+                }
+            lines.append((0, 0, {
+                'name': name,
+                'account_id': group['account'].id,
+                'partner_id': group['partner'].id,
+                'credit': amt if amt > 0 else 0.0,
+                'debit': -amt if amt < 0 else 0.0,
+            }))
+
         lines.append((0, 0, {
             'name': f'{self.name} - Settlement',
             'account_id': mp_receivable_account.id,
@@ -769,47 +872,179 @@ class MarketplaceSettlement(models.Model):
         elif hasattr(move, 'post'):
             move.post()
 
-        # Reconcile invoices
-        self._reconcile_invoices(move)
+        # Large settlements are reconciled by the background cron in committed chunks
+        if len(invoices) >= self._get_background_reconcile_threshold():
+            self.write({
+                'reconcile_pending': True,
+                'reconcile_attempt_count': 0,
+                'reconcile_last_attempt': False,
+            })
+            _logger.info('Settlement %s: %s invoices queued for background reconciliation',
+                         self.name, len(invoices))
+        else:
+            self._reconcile_invoices(move)
         
         return move
 
-    def _reconcile_invoices(self, move):
-        """Reconcile invoices with settlement move"""
-        for inv in self.invoice_ids:
-            # find invoice receivable line that is NOT reconciled
-            inv_rec_lines = inv.line_ids.filtered(
-                lambda l: l.account_id.account_type == 'asset_receivable' 
-                and not l.reconciled 
-                and abs(l.amount_residual) > 0.01  # Use small threshold for float precision
-            )
-            
-            if not inv_rec_lines:
-                # Skip if no unreconciled receivable lines
-                continue
-                
-            # find settlement move line for this customer
-            settle_lines = move.line_ids.filtered(
-                lambda l: l.partner_id == inv.partner_id 
-                and l.account_id.account_type == 'asset_receivable'
-                and not l.reconciled
-                and abs(l.amount_residual) > 0.01
-            )
-            
-            if settle_lines and inv_rec_lines:
-                try:
-                    # reconcile only unreconciled lines
-                    lines_to_reconcile = inv_rec_lines + settle_lines
-                    if len(lines_to_reconcile) >= 2:  # Need at least 2 lines to reconcile
-                        # Use sudo to bypass any access restrictions during reconciliation
-                        lines_to_reconcile.sudo().reconcile()
-                        _logger.info(f'Successfully reconciled invoice {inv.name} with settlement {self.name}')
-                except Exception as e:
-                    # Log the error but don't fail the settlement creation
-                    import logging
-                    _logger = logging.getLogger(__name__)
-                    _logger.warning(f'Failed to reconcile invoice {inv.name}: {str(e)}')
-                    # Continue with settlement creation even if reconciliation fails
+    @api.model
+    def _get_background_reconcile_threshold(self):
+        """Number of invoices from which reconciliation is deferred to the cron"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'marketplace_settlement.background_reconcile_threshold',
+            DEFAULT_BACKGROUND_RECONCILE_THRESHOLD))
+
+    @api.model
+    def _get_reconcile_chunk_size(self):
+        """Number of (partner, account) groups reconciled per batch"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'marketplace_settlement.reconcile_chunk_size',
+            DEFAULT_RECONCILE_CHUNK_SIZE))
+
+    @api.model
+    def _get_max_reconcile_attempts(self):
+        """Number of cron runs before a failing settlement is left for manual action"""
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'marketplace_settlement.max_reconcile_attempts',
+            DEFAULT_MAX_RECONCILE_ATTEMPTS))
+
+    def _get_reconcile_plan(self, move):
+        """Build the reconciliation plan between invoices and the settlement move
+
+        Returns a list of ``account.move.line`` recordsets, one per
+        (commercial partner, receivable account), each holding the open invoice
+        lines and the open settlement lines of that customer. A customer whose
+        invoices and credit notes net to zero has no settlement line; its
+        invoice lines are reconciled with each other. Lines already reconciled
+        are left out, so the plan of a partially reconciled settlement only
+        covers what remains.
+        """
+        self.ensure_one()
+        AccountMoveLine = self.env['account.move.line'].sudo()
+        open_receivable_domain = [
+            ('account_id.account_type', '=', 'asset_receivable'),
+            ('reconciled', '=', False),
+        ]
+        invoice_lines = AccountMoveLine.search(
+            [('move_id', 'in', self.invoice_ids.ids)] + open_receivable_domain)
+        settlement_lines = AccountMoveLine.search(
+            [('move_id', '=', move.id)] + open_receivable_domain)
+
+        def _group(lines):
+            grouped = defaultdict(lambda: AccountMoveLine)
+            for line in lines:
+                # Use small threshold for float precision
+                if abs(line.amount_residual) > 0.01:
+                    # Settlement lines carry the commercial partner of the invoices
+                    partner = line.move_id.commercial_partner_id or line.partner_id
+                    grouped[(partner.id, line.account_id.id)] |= line
+            return grouped
+
+        invoice_groups = _group(invoice_lines)
+        settlement_groups = _group(settlement_lines)
+        plan = []
+        for key, lines in invoice_groups.items():
+            if key in settlement_groups:
+                plan.append(lines | settlement_groups[key])
+            elif float_is_zero(sum(lines.mapped('amount_residual')), precision_digits=2):
+                plan.append(lines)
+            else:
+                _logger.warning('Settlement %s: no settlement line matches %s',
+                                self.name, ', '.join(lines.move_id.mapped('name')))
+        return plan
+
+    def _reconcile_invoices(self, move, commit=False):
+        """Reconcile invoices with settlement move in partner batches
+
+        Each chunk of the plan is reconciled in its own savepoint. When a chunk
+        fails, its groups are retried one by one so a single problematic
+        customer does not block the rest of the settlement. With ``commit`` set
+        (background mode) the transaction is committed after every chunk, which
+        makes the process resumable.
+
+        Returns the plan groups (``account.move.line`` recordsets) that could
+        not be reconciled.
+        """
+        self.ensure_one()
+        AccountMoveLine = self.env['account.move.line'].sudo()
+        plan = self._get_reconcile_plan(move)
+        chunk_size = self._get_reconcile_chunk_size()
+        failed = []
+
+        def _reconcile(batch):
+            if hasattr(AccountMoveLine, '_reconcile_plan'):
+                AccountMoveLine._reconcile_plan(batch)
+            else:
+                for lines in batch:
+                    lines.reconcile()
+
+        for start in range(0, len(plan), chunk_size):
+            batch = plan[start:start + chunk_size]
+            try:
+                with self.env.cr.savepoint():
+                    _reconcile(batch)
+            except Exception as e:
+                _logger.warning('Settlement %s: batch reconciliation failed (%s), retrying per partner',
+                                self.name, e)
+                for lines in batch:
+                    try:
+                        with self.env.cr.savepoint():
+                            _reconcile([lines])
+                    except Exception as e:
+                        # Log the error but don't fail the settlement creation
+                        _logger.warning('Failed to reconcile %s with settlement %s: %s',
+                                        ', '.join(lines.move_id.mapped('name')), self.name, e)
+                        failed.append(lines)
+            _logger.info('Settlement %s: reconciled %s/%s partner groups',
+                         self.name, min(start + chunk_size, len(plan)), len(plan))
+            if commit:
+                self.env.cr.commit()
+        return failed
+
+    @api.model
+    def _cron_reconcile_pending_settlements(self, limit=10):
+        """Reconcile settlements whose reconciliation was deferred to the background
+
+        Settlements are taken least recently attempted first, so settlements
+        that keep failing do not starve the others. After
+        ``_get_max_reconcile_attempts`` failed runs the flag is cleared and a
+        to-do activity is scheduled on the settlement move for manual action.
+        """
+        settlements = self.search([
+            ('reconcile_pending', '=', True),
+            ('move_id', '!=', False),
+        ], order='reconcile_last_attempt asc nulls first, id', limit=limit)
+        max_attempts = self._get_max_reconcile_attempts()
+        for settlement in settlements:
+            settlement.write({
+                'reconcile_attempt_count': settlement.reconcile_attempt_count + 1,
+                'reconcile_last_attempt': fields.Datetime.now(),
+            })
+            failed = settlement._reconcile_invoices(settlement.move_id, commit=True)
+            if not failed:
+                settlement.reconcile_pending = False
+            elif settlement.reconcile_attempt_count >= max_attempts:
+                _logger.warning('Settlement %s: %s partner groups still fail after %s attempts, '
+                                'left for manual reconciliation',
+                                settlement.name, len(failed), settlement.reconcile_attempt_count)
+                settlement.reconcile_pending = False
+                settlement.move_id.activity_schedule(
+                    'mail.mail_activity_data_todo',
+                    user_id=settlement.create_uid.id or self.env.uid,
+                    summary=_('Reconcile settlement manually'),
+                    note=_('Automatic reconciliation of settlement %(settlement)s failed '
+                           '%(attempts)s times for: %(moves)s') % {
+                        'settlement': settlement.name,
+                        'attempts': settlement.reconcile_attempt_count,
+                        'moves': ', '.join(
+                            name for lines in failed for name in lines.move_id.mapped('name')),
+                    },
+                )
+            else:
+                # Keep the flag so the failed groups are retried on a later run
+                _logger.warning('Settlement %s: %s partner groups left to reconcile (attempt %s/%s)',
+                                settlement.name, len(failed),
+                                settlement.reconcile_attempt_count, max_attempts)
+            self.env.cr.commit()
 
     def _open_settlement_move_with_banner(self):
         """Open settlement move with reconciliation banner"""
@@ -902,7 +1137,12 @@ class MarketplaceSettlement(models.Model):
             
             # Clear the settlement link to allow recreation
             old_move_id = self.move_id.id
-            self.sudo().write({'move_id': False})
+            self.sudo().write({
+                'move_id': False,
+                'reconcile_pending': False,
+                'reconcile_attempt_count': 0,
+                'reconcile_last_attempt': False,
+            })
             
             # Update invoice settlement status
             for invoice in self.invoice_ids:
@@ -1,14 +1,20 @@
 from odoo import models, fields, api, _
-from odoo.exceptions import UserError, ValidationError
+from odoo.exceptions import UserError
 import base64
 import csv
 import io
 import re
 from datetime import datetime
 
+DOCUMENT_REFERENCE_PATTERNS = {
+    'shopee_tr': r'^TR[A-Z0-9]+$',
+    'spx_rc': r'^RC[A-Z0-9]+$',
+}
+
 
 class MarketplaceDocumentImportWizard(models.TransientModel):
     _name = 'marketplace.document.import.wizard'
+    _inherit = ['marketplace.csv.import.mixin']
     _description = 'Marketplace Document Import Wizard'
 
     document_type = fields.Selection([
@@ -41,6 +47,7 @@ class MarketplaceDocumentImportWizard(models.TransientModel):
     
     # Preview data
     preview_data = fields.Text('Preview Data', readonly=True)
+    import_summary = fields.Text('Import Summary', readonly=True)
     
     notes = fields.Text('Notes')
 
@@ -128,7 +135,17 @@ class MarketplaceDocumentImportWizard(models.TransientModel):
         if not self.csv_file:
             raise UserError(_('Please upload a CSV file'))
         
-        created_bills = self._process_csv_import()
+        errors, created_bills = self._process_csv_import()
+        if errors:
+            self.import_summary = self._format_import_errors(errors)
+            return {
+                'type': 'ir.actions.act_window',
+                'name': _('Import Marketplace Documents'),
+                'res_model': 'marketplace.document.import.wizard',
+                'res_id': self.id,
+                'view_mode': 'form',
+                'target': 'new',
+            }
         
         # Return action to view created bills
         return {
@@ -242,98 +259,162 @@ class MarketplaceDocumentImportWizard(models.TransientModel):
             ('account_type', 'in', ['expense', 'asset_expense'])
         ], limit=1)
 
-    def _process_csv_import(self):
-        """Process CSV file and create vendor bills"""
-        csv_data = base64.b64decode(self.csv_file).decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(csv_data), delimiter=self.csv_delimiter)
-        
-        created_bills = self.env['marketplace.vendor.bill']
+    def _parse_csv_rows(self):
+        """Parse and validate the whole CSV file before creating anything
+
+        Expected CSV columns:
+        document_reference, date, partner_name, description, amount, vat_rate,
+        wht_rate, account_code and optionally order_number (marketplace order
+        number, used as key to update lines on re-import).
+
+        :return: tuple ``(rows, errors)``
+        """
+        ref_pattern = DOCUMENT_REFERENCE_PATTERNS.get(self.document_type)
+        today = fields.Date.context_today(self)
+        rows = []
         errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):
-            try:
-                bill = self._create_bill_from_csv_row(row)
-                created_bills |= bill
-            except Exception as e:
-                errors.append(f'Row {row_num}: {str(e)}')
-        
-        if errors:
-            error_msg = '\n'.join(errors[:10])  # Show first 10 errors
-            if len(errors) > 10:
-                error_msg += f'\n... and {len(errors) - 10} more errors'
-            raise UserError(_('Import completed with errors:\n%s') % error_msg)
-        
-        return created_bills
+        seen_keys = {}
+        for row_num, row in self._iter_csv_rows(self.csv_file, self.csv_delimiter, as_dict=True):
+            document_reference = (row.get('document_reference') or '').strip()
+            if not document_reference:
+                errors.append(_('Row %s: Document reference is required') % row_num)
+                continue
+            if ref_pattern and not re.match(ref_pattern, document_reference):
+                errors.append(_('Row %s: Invalid document reference %s for %s')
+                              % (row_num, document_reference, self.document_type))
+                continue
 
-    def _create_bill_from_csv_row(self, row):
-        """Create vendor bill from CSV row"""
-        # Expected CSV columns:
-        # document_reference, date, partner_name, description, amount, vat_rate, wht_rate, account_code
-        
-        document_reference = row.get('document_reference', '').strip()
-        if not document_reference:
-            raise ValidationError(_('Document reference is required'))
-        
-        # Parse date
-        date_str = row.get('date', '').strip()
-        try:
-            bill_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
+            # Parse date
+            date_str = (row.get('date') or '').strip()
+            bill_date = today
+            for date_format in ('%Y-%m-%d', '%d/%m/%Y'):
+                try:
+                    bill_date = datetime.strptime(date_str, date_format).date()
+                    break
+                except ValueError:
+                    continue
+
+            values = {
+                'row_num': row_num,
+                'document_reference': document_reference,
+                'date': bill_date,
+                'partner_name': (row.get('partner_name') or '').strip(),
+                'description': (row.get('description') or '').strip(),
+                'account_code': (row.get('account_code') or '').strip(),
+                'order_ref': (row.get('order_number') or '').strip(),
+            }
             try:
-                bill_date = datetime.strptime(date_str, '%d/%m/%Y').date()
+                for column in ('amount', 'vat_rate', 'wht_rate'):
+                    values[column] = self._parse_amount(row.get(column))
             except ValueError:
-                bill_date = fields.Date.context_today(self)
-        
-        # Find or create partner
-        partner_name = row.get('partner_name', '').strip()
-        if partner_name:
-            partner = self.env['res.partner'].search([('name', 'ilike', partner_name)], limit=1)
-            if not partner:
-                partner = self.env['res.partner'].create({'name': partner_name, 'is_company': True})
-        else:
-            partner = self.partner_id
-        
-        # Create or find existing vendor bill
-        existing_bill = self.env['marketplace.vendor.bill'].search([
-            ('document_reference', '=', document_reference),
-            ('document_type', '=', self.document_type)
-        ])
-        
-        if existing_bill:
-            vendor_bill = existing_bill
-        else:
-            vendor_bill = self.env['marketplace.vendor.bill'].create({
-                'document_reference': document_reference,
+                errors.append(_('Row %s: Invalid %s') % (row_num, column))
+                continue
+
+            if values['order_ref']:
+                key = (document_reference, values['order_ref'])
+                if key in seen_keys:
+                    errors.append(_('Row %s: Order %s of document %s already listed on row %s')
+                                  % (row_num, values['order_ref'], document_reference, seen_keys[key]))
+                    continue
+                seen_keys[key] = row_num
+            rows.append(values)
+        return rows, errors
+
+    def _get_csv_partners(self, rows):
+        """Resolve partner names of all rows with a handful of queries"""
+        Partner = self.env['res.partner']
+        names = {row['partner_name'] for row in rows if row['partner_name']}
+        partners = {}
+        for partner in Partner.search([('name', 'in', list(names))]):
+            partners.setdefault(partner.name, partner)
+        missing = []
+        for name in names - set(partners):
+            partner = Partner.search([('name', 'ilike', name)], limit=1)
+            if partner:
+                partners[name] = partner
+            else:
+                missing.append(name)
+        if missing:
+            new_partners = Partner.create([{'name': name, 'is_company': True} for name in missing])
+            partners.update(zip(missing, new_partners))
+        return partners
+
+    def _process_csv_import(self):
+        """Process CSV file and create vendor bills
+
+        Partners, accounts, existing documents and existing lines are looked up
+        once for the whole file; bills and lines are then created in batches.
+        Lines carrying an order number update the matching line of a previous
+        import instead of being duplicated.
+        """
+        try:
+            rows, errors = self._parse_csv_rows()
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise UserError(_('Error reading CSV: %s') % str(e))
+        if errors:
+            return errors, self.env['marketplace.vendor.bill']
+
+        VendorBill = self.env['marketplace.vendor.bill']
+        BillLine = self.env['marketplace.vendor.bill.line']
+        partners = self._get_csv_partners(rows)
+
+        codes = {row['account_code'] for row in rows if row['account_code']}
+        accounts = {account.code: account for account in
+                    self.env['account.account'].search([('code', 'in', list(codes))])}
+        default_account = self._get_default_account('commission')
+
+        # Create or find existing vendor bills
+        references = list(dict.fromkeys(row['document_reference'] for row in rows))
+        bills = {bill.document_reference: bill for bill in VendorBill.search([
+            ('document_reference', 'in', references),
+            ('document_type', '=', self.document_type),
+        ])}
+        new_bill_vals = {}
+        for row in rows:
+            reference = row['document_reference']
+            if reference in bills or reference in new_bill_vals:
+                continue
+            partner = partners.get(row['partner_name']) or self.partner_id
+            new_bill_vals[reference] = {
+                'document_reference': reference,
                 'document_type': self.document_type,
                 'partner_id': partner.id,
-                'date': bill_date,
+                'date': row['date'],
                 'journal_id': self.journal_id.id,
                 'notes': self.notes,
-            })
-        
-        # Add line
-        description = row.get('description', '').strip()
-        amount = float(row.get('amount', 0))
-        vat_rate = float(row.get('vat_rate', 0))
-        wht_rate = float(row.get('wht_rate', 0))
-        account_code = row.get('account_code', '').strip()
-        
-        # Find account
-        if account_code:
-            account = self.env['account.account'].search([('code', '=', account_code)], limit=1)
-        if not account_code or not account:
-            account = self._get_default_account('commission')
-        
-        self.env['marketplace.vendor.bill.line'].create({
-            'bill_id': vendor_bill.id,
-            'description': description or 'Imported line',
-            'account_id': account.id,
-            'amount': amount,
-            'vat_rate': vat_rate,
-            'wht_rate': wht_rate,
-        })
-        
-        return vendor_bill
+            }
+        if new_bill_vals:
+            new_bills = self._create_in_batches('marketplace.vendor.bill', list(new_bill_vals.values()))
+            bills.update(zip(new_bill_vals, new_bills))
+
+        # Lines of a previous import of the same file, keyed on order number
+        all_bills = VendorBill.browse([bill.id for bill in bills.values()])
+        order_refs = [row['order_ref'] for row in rows if row['order_ref']]
+        existing_lines = {}
+        if order_refs:
+            for line in BillLine.search([('bill_id', 'in', all_bills.ids), ('order_ref', 'in', order_refs)]):
+                existing_lines[(line.bill_id.id, line.order_ref)] = line
+
+        line_vals_list = []
+        for row in rows:
+            bill = bills[row['document_reference']]
+            line_vals = {
+                'description': row['description'] or 'Imported line',
+                'account_id': accounts.get(row['account_code'], default_account).id,
+                'amount': row['amount'],
+                'vat_rate': row['vat_rate'],
+                'wht_rate': row['wht_rate'],
+            }
+            line = existing_lines.get((bill.id, row['order_ref'])) if row['order_ref'] else None
+            if line:
+                line.write(line_vals)
+            else:
+                line_vals.update({'bill_id': bill.id, 'order_ref': row['order_ref'] or False})
+                line_vals_list.append(line_vals)
+        if line_vals_list:
+            self._create_in_batches('marketplace.vendor.bill.line', line_vals_list)
+
+        return [], all_bills
 
     def action_download_template(self):
         """Download CSV template"""
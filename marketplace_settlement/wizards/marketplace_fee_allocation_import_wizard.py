@@ -8,6 +8,7 @@ from odoo.tools.float_utils import float_is_zero
 
 class MarketplaceFeeAllocationImportWizard(models.TransientModel):
     _name = 'marketplace.fee.allocation.import.wizard'
+    _inherit = ['marketplace.csv.import.mixin']
     _description = 'Import Fee Allocation from CSV'
 
     settlement_id = fields.Many2one('marketplace.settlement', string='Settlement', required=True)
@@ -64,8 +65,88 @@ class MarketplaceFeeAllocationImportWizard(models.TransientModel):
         except Exception as e:
             self.preview_data = f"Error reading CSV: {str(e)}"
 
+    def _parse_allocation_rows(self):
+        """Parse and validate the whole CSV file before importing anything
+
+        Rows are keyed on the marketplace order number, which may be either the
+        invoice number or the invoice reference (customer order reference copied
+        from the sale order).
+
+        :return: tuple ``(rows, errors)`` where ``rows`` is a list of dicts
+                 ready for allocation values and ``errors`` lists every problem
+                 found in the file
+        """
+        settlement = self.settlement_id
+        invoice_by_key = {}
+        for invoice in settlement.invoice_ids:
+            invoice_by_key[invoice.name] = invoice
+            if invoice.ref:
+                invoice_by_key.setdefault(invoice.ref.strip(), invoice)
+
+        min_columns = max(self.invoice_column, self.base_fee_column or 0,
+                          self.vat_input_column or 0, self.wht_column or 0)
+        amount_columns = [
+            ('base_fee_alloc', self.base_fee_column, _('base fee')),
+            ('vat_input_alloc', self.vat_input_column, _('VAT input')),
+            ('wht_alloc', self.wht_column, _('WHT')),
+        ]
+
+        rows = []
+        errors = []
+        seen = {}
+        row_iter = self._iter_csv_rows(self.csv_file, self.delimiter)
+        for row_num, row in row_iter:
+            if self.has_header and row_num == 1:
+                continue
+            if not any(cell.strip() for cell in row):
+                continue  # Skip empty rows
+            if len(row) < min_columns:
+                errors.append(_('Row %s: Not enough columns') % row_num)
+                continue
+
+            order_ref = row[self.invoice_column - 1].strip()
+            if not order_ref:
+                continue
+
+            invoice = invoice_by_key.get(order_ref)
+            if not invoice:
+                errors.append(_('Row %s: Invoice %s not found in settlement') % (row_num, order_ref))
+                continue
+            if invoice.id in seen:
+                errors.append(_('Row %s: Invoice %s already imported from row %s')
+                              % (row_num, order_ref, seen[invoice.id]))
+                continue
+            seen[invoice.id] = row_num
+
+            values = {
+                'invoice': invoice,
+                'marketplace_order_ref': order_ref,
+                'base_fee_alloc': 0.0,
+                'vat_input_alloc': 0.0,
+                'wht_alloc': 0.0,
+            }
+            valid = True
+            for field_name, column, label in amount_columns:
+                if not column:
+                    continue
+                try:
+                    values[field_name] = self._parse_amount(row[column - 1])
+                except ValueError:
+                    errors.append(_('Row %s: Invalid %s amount') % (row_num, label))
+                    valid = False
+            if not valid:
+                continue
+            rows.append(values)
+        return rows, errors
+
     def action_import_allocations(self):
-        """Import fee allocations from CSV file"""
+        """Import fee allocations from CSV file
+
+        The file is validated as a whole first; when it contains errors the full
+        report is shown and nothing is imported. Valid files are imported with
+        batched create() calls. In update mode, allocations are matched on
+        invoice, so importing the same file twice leaves the same result.
+        """
         self.ensure_one()
         
         if not self.csv_file:
@@ -75,145 +156,74 @@ class MarketplaceFeeAllocationImportWizard(models.TransientModel):
             raise UserError(_("Please select a settlement"))
         
         try:
-            # Decode CSV data
-            csv_data = base64.b64decode(self.csv_file).decode('utf-8')
-            csv_reader = csv.reader(io.StringIO(csv_data), delimiter=self.delimiter)
-            
-            # Skip header if present
-            if self.has_header:
-                next(csv_reader)
-            
-            # Process data
-            imported_count = 0
-            updated_count = 0
-            errors = []
-            
-            # Get existing allocations if updating
-            existing_allocations = {}
-            if self.import_mode == 'update':
-                for allocation in self.settlement_id.fee_allocation_ids:
-                    existing_allocations[allocation.invoice_number] = allocation
-            elif self.import_mode == 'replace':
-                # Clear existing allocations
-                self.settlement_id.fee_allocation_ids.unlink()
-            
-            # Get settlement invoices for validation
-            settlement_invoices = {inv.name: inv for inv in self.settlement_id.invoice_ids}
-            
-            for row_num, row in enumerate(csv_reader, start=1):
-                try:
-                    if len(row) < max(self.invoice_column, self.base_fee_column or 0, 
-                                     self.vat_input_column or 0, self.wht_column or 0):
-                        errors.append(f"Row {row_num}: Not enough columns")
-                        continue
-                    
-                    # Extract data
-                    invoice_number = row[self.invoice_column - 1].strip()
-                    
-                    if not invoice_number:
-                        continue  # Skip empty rows
-                    
-                    # Validate invoice exists in settlement
-                    if invoice_number not in settlement_invoices:
-                        errors.append(f"Row {row_num}: Invoice {invoice_number} not found in settlement")
-                        continue
-                    
-                    # Extract amounts
-                    base_fee = 0.0
-                    vat_input = 0.0
-                    wht = 0.0
-                    
-                    if self.base_fee_column and self.base_fee_column <= len(row):
-                        try:
-                            base_fee = float(row[self.base_fee_column - 1] or 0)
-                        except ValueError:
-                            errors.append(f"Row {row_num}: Invalid base fee amount")
-                            continue
-                    
-                    if self.vat_input_column and self.vat_input_column <= len(row):
-                        try:
-                            vat_input = float(row[self.vat_input_column - 1] or 0)
-                        except ValueError:
-                            errors.append(f"Row {row_num}: Invalid VAT input amount")
-                            continue
-                    
-                    if self.wht_column and self.wht_column <= len(row):
-                        try:
-                            wht = float(row[self.wht_column - 1] or 0)
-                        except ValueError:
-                            errors.append(f"Row {row_num}: Invalid WHT amount")
-                            continue
-                    
-                    # Create or update allocation
-                    invoice = settlement_invoices[invoice_number]
-                    
-                    if self.import_mode == 'update' and invoice_number in existing_allocations:
-                        # Update existing allocation
-                        allocation = existing_allocations[invoice_number]
-                        allocation.write({
-                            'base_fee_alloc': base_fee,
-                            'vat_input_alloc': vat_input,
-                            'wht_alloc': wht,
-                            'allocation_method': 'exact',
-                        })
-                        # Recalculate net payout
-                        allocation.net_payout_alloc = allocation.allocation_base_amount - allocation.total_deductions_alloc
-                        updated_count += 1
-                    else:
-                        # Create new allocation
-                        allocation_vals = {
-                            'settlement_id': self.settlement_id.id,
-                            'invoice_id': invoice.id,
-                            'allocation_method': 'exact',
-                            'allocation_base_amount': invoice.amount_untaxed,
-                            'base_fee_alloc': base_fee,
-                            'vat_input_alloc': vat_input,
-                            'wht_alloc': wht,
-                        }
-                        
-                        allocation = self.env['marketplace.fee.allocation'].create(allocation_vals)
-                        # Calculate net payout
-                        allocation.net_payout_alloc = allocation.allocation_base_amount - allocation.total_deductions_alloc
-                        imported_count += 1
-                        
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-            
-            # Generate summary
-            summary_lines = [
-                f"Import completed:",
-                f"- New allocations created: {imported_count}",
-                f"- Existing allocations updated: {updated_count}",
-            ]
-            
-            if errors:
-                summary_lines.extend([
-                    f"- Errors encountered: {len(errors)}",
-                    "",
-                    "Errors:",
-                ] + errors[:10])  # Show first 10 errors
-                
-                if len(errors) > 10:
-                    summary_lines.append(f"... and {len(errors) - 10} more errors")
-            
-            self.import_summary = '\n'.join(summary_lines)
-            
-            if imported_count + updated_count == 0:
-                raise UserError(_("No valid data found to import. Please check your CSV file and column settings."))
-            
-            return {
-                'type': 'ir.actions.act_window',
-                'name': _('Import Results'),
-                'res_model': 'marketplace.fee.allocation.import.wizard',
-                'res_id': self.id,
-                'view_mode': 'form',
-                'target': 'new',
-                'context': {'show_results': True},
-            }
-            
-        except Exception as e:
+            rows, errors = self._parse_allocation_rows()
+        except (UnicodeDecodeError, csv.Error) as e:
             raise UserError(_("Error processing CSV file: %s") % str(e))
 
+        if errors:
+            self.import_summary = self._format_import_errors(errors)
+            return self._action_show_results()
+
+        if not rows:
+            raise UserError(_("No valid data found to import. Please check your CSV file and column settings."))
+
+        Allocation = self.env['marketplace.fee.allocation']
+        existing_allocations = {}
+        if self.import_mode == 'update':
+            for allocation in self.settlement_id.fee_allocation_ids:
+                existing_allocations.setdefault(allocation.invoice_id.id, allocation)
+        elif self.import_mode == 'replace':
+            # Clear existing allocations
+            self.settlement_id.fee_allocation_ids.unlink()
+
+        create_vals = []
+        updated_count = 0
+        for values in rows:
+            invoice = values['invoice']
+            amounts = {
+                'marketplace_order_ref': values['marketplace_order_ref'],
+                'base_fee_alloc': values['base_fee_alloc'],
+                'vat_input_alloc': values['vat_input_alloc'],
+                'wht_alloc': values['wht_alloc'],
+                'allocation_method': 'exact',
+            }
+            deductions = values['base_fee_alloc'] + values['vat_input_alloc'] + values['wht_alloc']
+            allocation = existing_allocations.get(invoice.id)
+            if allocation:
+                amounts['net_payout_alloc'] = allocation.allocation_base_amount - deductions
+                allocation.write(amounts)
+                updated_count += 1
+            else:
+                amounts.update({
+                    'settlement_id': self.settlement_id.id,
+                    'invoice_id': invoice.id,
+                    'allocation_base_amount': invoice.amount_untaxed,
+                    'net_payout_alloc': invoice.amount_untaxed - deductions,
+                })
+                create_vals.append(amounts)
+
+        created = Allocation.browse()
+        if create_vals:
+            created = self._create_in_batches('marketplace.fee.allocation', create_vals)
+
+        self.import_summary = '\n'.join([
+            _("Import completed:"),
+            _("- New allocations created: %s") % len(created),
+            _("- Existing allocations updated: %s") % updated_count,
+        ])
+        return self._action_show_results()
+
+    def _action_show_results(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Import Results'),
+            'res_model': 'marketplace.fee.allocation.import.wizard',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'show_results': True},
+        }
+
     def action_view_allocations(self):
         """View the imported/updated allocations"""
         self.ensure_one()
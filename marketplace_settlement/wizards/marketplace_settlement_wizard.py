@@ -1,6 +1,10 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+# Above this many matching invoices the wizard keeps only a summary and
+# resolves the invoices when the settlement is created
+DEFAULT_WIZARD_INVOICE_LIMIT = 500
+
 
 class MarketplaceSettlementWizard(models.TransientModel):
     _name = 'marketplace.settlement.wizard'
@@ -29,6 +33,11 @@ class MarketplaceSettlementWizard(models.TransientModel):
     total_deductions = fields.Monetary('Total Deductions', compute='_compute_total_amount', currency_field='currency_id')
     net_settlement_amount = fields.Monetary('Net Settlement Amount', compute='_compute_total_amount', currency_field='currency_id')
     currency_id = fields.Many2one('res.currency', default=lambda self: self.env.company.currency_id)
+    lazy_invoices = fields.Boolean('Invoices Loaded Lazily',
+                                   help='Too many invoices match the filter to list them here. '
+                                        'They are selected when the settlement is created.')
+    matched_invoice_count = fields.Integer('Matched Invoice Count')
+    matched_amount = fields.Monetary('Matched Amount', currency_field='currency_id')
     
     # Note: Deduction fields removed - fees should be handled through vendor bills for proper tax documentation
     
@@ -70,15 +79,21 @@ class MarketplaceSettlementWizard(models.TransientModel):
                 
         return res
 
-    @api.depends('invoice_ids')
+    @api.depends('invoice_ids', 'lazy_invoices', 'matched_invoice_count')
     def _compute_invoice_count(self):
         for record in self:
-            record.invoice_count = len(record.invoice_ids)
+            if record.lazy_invoices:
+                record.invoice_count = record.matched_invoice_count
+            else:
+                record.invoice_count = len(record.invoice_ids)
 
-    @api.depends('invoice_ids')
+    @api.depends('invoice_ids', 'lazy_invoices', 'matched_amount')
     def _compute_total_amount(self):
         for record in self:
-            record.total_amount = sum(record.invoice_ids.mapped('amount_residual'))
+            if record.lazy_invoices:
+                record.total_amount = record.matched_amount
+            else:
+                record.total_amount = sum(record.invoice_ids.mapped('amount_residual'))
             record.total_deductions = 0.0  # Deductions now handled through vendor bills
             record.net_settlement_amount = record.total_amount
 
@@ -115,34 +130,19 @@ class MarketplaceSettlementWizard(models.TransientModel):
                 #     self.fee_account_id = prof.commission_account_id
 
         if self.trade_channel and self.auto_filter:
-            # Build domain for filtering invoices
-            domain = [
-                ('state', '=', 'posted'),
-                ('move_type', 'in', ['out_invoice', 'out_refund']),
-                ('trade_channel', '=', self.trade_channel),
-                ('amount_residual', '!=', 0.0),
-                ('payment_state', 'not in', ['paid', 'in_payment'])  # Exclude reconciled invoices
-            ]
-
-            # Add date filters if specified
-            if self.date_from:
-                domain.append(('invoice_date', '>=', self.date_from))
-            if self.date_to:
-                domain.append(('invoice_date', '<=', self.date_to))
-
-            # Find matching invoices
-            matching_invoices = self.env['account.move'].search(domain)
-            
-            # Additional check for reconciled invoices
-            unreconciled_invoices = []
-            for invoice in matching_invoices:
-                receivable_lines = invoice.line_ids.filtered(
-                    lambda l: l.account_id.account_type == 'asset_receivable'
-                )
-                if not any(line.reconciled for line in receivable_lines):
-                    unreconciled_invoices.append(invoice.id)
-            
-            self.invoice_ids = [(6, 0, unreconciled_invoices)]
+            # One indexed query instead of loading and filtering every invoice
+            matches = self.env['account.move']._get_open_marketplace_invoices(
+                self.trade_channel, self.date_from, self.date_to)
+            limit = int(self.env['ir.config_parameter'].sudo().get_param(
+                'marketplace_settlement.wizard_invoice_limit', DEFAULT_WIZARD_INVOICE_LIMIT))
+            self.matched_invoice_count = len(matches)
+            self.matched_amount = sum(amount for _id, amount in matches)
+            self.lazy_invoices = len(matches) > limit
+            if self.lazy_invoices:
+                # Don't send thousands of invoices to the browser
+                self.invoice_ids = [(5, 0, 0)]
+            else:
+                self.invoice_ids = [(6, 0, [invoice_id for invoice_id, _amount in matches])]
 
             # Update settlement reference name if not manually set
             if not self.name or self.name.startswith('SETTLE-'):
@@ -181,6 +181,7 @@ class MarketplaceSettlementWizard(models.TransientModel):
             self._onchange_trade_channel()
         elif not self.auto_filter:
             self.invoice_ids = [(5, 0, 0)]  # Clear invoices
+            self.lazy_invoices = False
 
     @api.onchange('profile_id')
     def _onchange_profile(self):
@@ -209,21 +210,23 @@ class MarketplaceSettlementWizard(models.TransientModel):
         self.auto_filter = True
         self._onchange_trade_channel()
 
+    def _get_invoices_to_settle(self):
+        """Return the invoices to settle, resolving lazily loaded selections"""
+        self.ensure_one()
+        if not self.lazy_invoices:
+            return self.invoice_ids
+        matches = self.env['account.move']._get_open_marketplace_invoices(
+            self.trade_channel, self.date_from, self.date_to)
+        return self.env['account.move'].browse([invoice_id for invoice_id, _amount in matches])
+
     def action_create(self):
         self.ensure_one()
-        if not self.invoice_ids:
+        invoices = self._get_invoices_to_settle()
+        if not invoices:
             raise UserError(_('Please select invoices to settle.'))
 
         # Check for already reconciled invoices
-        reconciled_invoices = []
-        for invoice in self.invoice_ids:
-            # Check if invoice has unreconciled receivable lines
-            receivable_lines = invoice.line_ids.filtered(
-                lambda l: l.account_id.account_type == 'asset_receivable'
-            )
-            # Check if ALL receivable lines are reconciled
-            if receivable_lines and all(line.reconciled for line in receivable_lines):
-                reconciled_invoices.append(invoice.name)
+        reconciled_invoices = invoices._filter_fully_reconciled_receivable().mapped('name')
         
         if reconciled_invoices:
             raise UserError(_(
@@ -241,7 +244,7 @@ class MarketplaceSettlementWizard(models.TransientModel):
             'journal_id': self.journal_id.id,
             'date': self.date,
             'trade_channel': self.trade_channel,
-            'invoice_ids': [(6, 0, self.invoice_ids.ids)],
+            'invoice_ids': [(6, 0, invoices.ids)],
             'settlement_account_id': self.settlement_account_id.id if self.settlement_account_id else False,
             # Store profile reference for future use
             'profile_id': self.profile_id.id if self.profile_id else False,
@@ -2,6 +2,9 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import calendar
+import logging
+import time
+from collections import defaultdict
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 
@@ -10,6 +13,10 @@ from odoo.exceptions import UserError, ValidationError
 from odoo.tools import float_compare, float_is_zero
 from markupsafe import Markup
 
+_logger = logging.getLogger(__name__)
+
+# Number of depreciation lines turned into journal entries per chunk
+DEFAULT_DEPRECIATION_BATCH_SIZE = 500
 
 class AccountAssetCategory(models.Model):
     _name = 'account.asset.category'
@@ -195,22 +202,61 @@ class AccountAssetAsset(models.Model):
 
     @api.model
     def _cron_generate_entries(self):
-        self.compute_generated_entries(datetime.today())
+        time_limit = int(self.env['ir.config_parameter'].sudo().get_param(
+            'om_account_asset.depreciation_time_limit', 0))
+        self.compute_generated_entries(datetime.today(), commit=True, time_limit=time_limit)
 
     @api.model
-    def compute_generated_entries(self, date, asset_type=None):
-        # Entries generated : one by grouped category and one by asset from ungrouped category
-        created_move_ids = []
-        type_domain = []
-        if asset_type:
-            type_domain = [('type', '=', asset_type)]
+    def _get_depreciation_batch_size(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'om_account_asset.depreciation_batch_size', DEFAULT_DEPRECIATION_BATCH_SIZE))
 
-        ungrouped_assets = self.env['account.asset.asset'].search(type_domain + [('state', '=', 'open'), ('category_id.group_entries', '=', False)])
-        created_move_ids += ungrouped_assets._compute_entries(date, group_entries=False)
+    @api.model
+    def compute_generated_entries(self, date, asset_type=None, commit=False, time_limit=0):
+        """Generate the entries of all depreciation lines due at ``date``
+
+        Entries generated : one by grouped category and one by asset from
+        ungrouped category. Due lines are selected with a single search and
+        turned into moves by chunks. With ``commit`` each chunk is committed,
+        lines already linked to a move are skipped on the next run, so an
+        interrupted run resumes where it stopped. When ``time_limit`` (seconds)
+        is exceeded the run stops after the current chunk and the cron is
+        triggered again to continue.
+        """
+        date = fields.Date.to_date(date)
+        started = time.monotonic()
+        lines = self.env['account.asset.depreciation.line']._get_due_lines(date, asset_type)
+        grouped_lines = lines.filtered(lambda l: l.asset_id.category_id.group_entries)
+        ungrouped_lines = lines - grouped_lines
+
+        # Ungrouped lines get one move per line, grouped categories one move each
+        batch_size = self._get_depreciation_batch_size()
+        chunks = [(ungrouped_lines[index:index + batch_size], False)
+                  for index in range(0, len(ungrouped_lines), batch_size)]
+        lines_by_category = defaultdict(lambda: self.env['account.asset.depreciation.line'])
+        for line in grouped_lines:
+            lines_by_category[line.asset_id.category_id] |= line
+        chunks += [(category_lines, True) for category_lines in lines_by_category.values()]
 
-        for grouped_category in self.env['account.asset.category'].search(type_domain + [('group_entries', '=', True)]):
-            assets = self.env['account.asset.asset'].search([('state', '=', 'open'), ('category_id', '=', grouped_category.id)])
-            created_move_ids += assets._compute_entries(date, group_entries=True)
+        created_move_ids = []
+        done = 0
+        for chunk, group_entries in chunks:
+            if group_entries:
+                created_move_ids += chunk.create_grouped_move()
+            else:
+                created_move_ids += chunk.create_move()
+            done += len(chunk)
+            if commit:
+                self.env.cr.commit()
+            elapsed = time.monotonic() - started
+            _logger.info('Asset entries: %s/%s depreciation lines, %s moves (%.1f lines/s)',
+                         done, len(lines), len(created_move_ids), done / elapsed if elapsed else 0.0)
+            if time_limit and elapsed > time_limit and done < len(lines):
+                _logger.info('Asset entries: time limit reached, %s lines left for the next run',
+                             len(lines) - done)
+                if commit:
+                    self.env.ref('om_account_asset.account_asset_cron')._trigger()
+                break
         return created_move_ids
 
     def _compute_board_amount(self, sequence, residual_amount, amount_to_depr,
@@ -260,74 +306,103 @@ class AccountAssetAsset(models.Model):
             undone_dotation_number += 1
         return undone_dotation_number
 
-    def compute_depreciation_board(self):
-        self.ensure_one()
-
-        posted_depreciation_line_ids = self.depreciation_line_ids.filtered(lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
-        unposted_depreciation_line_ids = self.depreciation_line_ids.filtered(lambda x: not x.move_check)
-
-        # Remove old unposted depreciation lines. We cannot use unlink() with One2many field
-        commands = [(2, line_id.id, False) for line_id in unposted_depreciation_line_ids]
-
-        if self.value_residual != 0.0:
-            amount_to_depr = residual_amount = self.value_residual
-
-            # if we already have some previous validated entries, starting date is last entry + method period
-            if posted_depreciation_line_ids and posted_depreciation_line_ids[-1].depreciation_date:
-                last_depreciation_date = fields.Date.from_string(posted_depreciation_line_ids[-1].depreciation_date)
-                depreciation_date = last_depreciation_date + relativedelta(months=+self.method_period)
-            else:
-                # depreciation_date computed from the purchase date
-                depreciation_date = self.date
-                if self.date_first_depreciation == 'last_day_period':
-                    # depreciation_date = the last day of the month
-                    depreciation_date = depreciation_date + relativedelta(day=31)
-                    # ... or fiscalyear depending the number of period
-                    if self.method_period == 12:
-                        depreciation_date = depreciation_date + relativedelta(month=int(self.company_id.fiscalyear_last_month))
-                        depreciation_date = depreciation_date + relativedelta(day=int(self.company_id.fiscalyear_last_day))
-                        if depreciation_date < self.date:
-                            depreciation_date = depreciation_date + relativedelta(years=1)
-                elif self.first_depreciation_manual_date and self.first_depreciation_manual_date != self.date:
-                    # depreciation_date set manually from the 'first_depreciation_manual_date' field
-                    depreciation_date = self.first_depreciation_manual_date
-            total_days = (depreciation_date.year % 4) and 365 or 366
-            month_day = depreciation_date.day
-            undone_dotation_number = self._compute_board_undone_dotation_nb(depreciation_date, total_days)
-
-            for x in range(len(posted_depreciation_line_ids), undone_dotation_number):
-                sequence = x + 1
-                amount = self._compute_board_amount(sequence, residual_amount, amount_to_depr,
-                                                    undone_dotation_number, posted_depreciation_line_ids,
-                                                    total_days, depreciation_date)
-                amount = self.currency_id.round(amount)
-                if float_is_zero(amount, precision_rounding=self.currency_id.rounding):
-                    continue
-                residual_amount -= amount
-                vals = {
-                    'amount': amount,
-                    'asset_id': self.id,
-                    'sequence': sequence,
-                    'name': (self.code or '') + '/' + str(sequence),
-                    'remaining_value': residual_amount,
-                    'depreciated_value': self.value - (self.salvage_value + residual_amount),
-                    'depreciation_date': depreciation_date,
-                }
-                commands.append((0, False, vals))
-
+    def _get_depreciation_dates(self, depreciation_date, count, cache):
+        """Dates of the next ``count`` depreciations starting at ``depreciation_date``
+
+        Assets sharing a start date and period share the same schedule, it is
+        computed once per run and kept in ``cache``.
+        """
+        month_day = depreciation_date.day
+        fix_month_day = month_day > 28 and self.date_first_depreciation == 'manual'
+        last_day = not self.prorata and self.method_period % 12 != 0 and self.date_first_depreciation == 'last_day_period'
+        key = ('dates', depreciation_date, count, self.method_period, fix_month_day, last_day)
+        if key not in cache:
+            dates = []
+            for _i in range(count):
+                dates.append(depreciation_date)
                 depreciation_date = depreciation_date + relativedelta(months=+self.method_period)
 
-                if month_day > 28 and self.date_first_depreciation == 'manual':
+                if fix_month_day:
                     max_day_in_month = calendar.monthrange(depreciation_date.year, depreciation_date.month)[1]
                     depreciation_date = depreciation_date.replace(day=min(max_day_in_month, month_day))
 
                 # datetime doesn't take into account that the number of days is not the same for each month
-                if not self.prorata and self.method_period % 12 != 0 and self.date_first_depreciation == 'last_day_period':
+                if last_day:
                     max_day_in_month = calendar.monthrange(depreciation_date.year, depreciation_date.month)[1]
                     depreciation_date = depreciation_date.replace(day=max_day_in_month)
+            cache[key] = dates
+        return cache[key]
 
-        self.write({'depreciation_line_ids': commands})
+    def _get_depreciation_board(self, cache):
+        """Values of the unposted depreciation lines of the asset"""
+        self.ensure_one()
+        board = []
+        if self.value_residual == 0.0:
+            return board
+
+        posted_depreciation_line_ids = self.depreciation_line_ids.filtered(lambda x: x.move_check).sorted(key=lambda l: l.depreciation_date)
+        amount_to_depr = residual_amount = self.value_residual
+
+        # if we already have some previous validated entries, starting date is last entry + method period
+        if posted_depreciation_line_ids and posted_depreciation_line_ids[-1].depreciation_date:
+            last_depreciation_date = fields.Date.from_string(posted_depreciation_line_ids[-1].depreciation_date)
+            depreciation_date = last_depreciation_date + relativedelta(months=+self.method_period)
+        else:
+            # depreciation_date computed from the purchase date
+            depreciation_date = self.date
+            if self.date_first_depreciation == 'last_day_period':
+                # depreciation_date = the last day of the month
+                depreciation_date = depreciation_date + relativedelta(day=31)
+                # ... or fiscalyear depending the number of period
+                if self.method_period == 12:
+                    depreciation_date = depreciation_date + relativedelta(month=int(self.company_id.fiscalyear_last_month))
+                    depreciation_date = depreciation_date + relativedelta(day=int(self.company_id.fiscalyear_last_day))
+                    if depreciation_date < self.date:
+                        depreciation_date = depreciation_date + relativedelta(years=1)
+            elif self.first_depreciation_manual_date and self.first_depreciation_manual_date != self.date:
+                # depreciation_date set manually from the 'first_depreciation_manual_date' field
+                depreciation_date = self.first_depreciation_manual_date
+        total_days = (depreciation_date.year % 4) and 365 or 366
+        undone_key = ('undone', depreciation_date, self.method_time, self.method_end,
+                      self.method_number, self.method_period, self.prorata)
+        if undone_key not in cache:
+            cache[undone_key] = self._compute_board_undone_dotation_nb(depreciation_date, total_days)
+        undone_dotation_number = cache[undone_key]
+
+        # The date only moves forward when a line is kept, the n-th kept line gets the n-th date
+        dates = self._get_depreciation_dates(
+            depreciation_date, max(undone_dotation_number - len(posted_depreciation_line_ids), 0), cache)
+        for x in range(len(posted_depreciation_line_ids), undone_dotation_number):
+            sequence = x + 1
+            depreciation_date = dates[len(board)]
+            amount = self._compute_board_amount(sequence, residual_amount, amount_to_depr,
+                                                undone_dotation_number, posted_depreciation_line_ids,
+                                                total_days, depreciation_date)
+            amount = self.currency_id.round(amount)
+            if float_is_zero(amount, precision_rounding=self.currency_id.rounding):
+                continue
+            residual_amount -= amount
+            board.append({
+                'amount': amount,
+                'asset_id': self.id,
+                'sequence': sequence,
+                'name': (self.code or '') + '/' + str(sequence),
+                'remaining_value': residual_amount,
+                'depreciated_value': self.value - (self.salvage_value + residual_amount),
+                'depreciation_date': depreciation_date,
+            })
+        return board
 
+    def compute_depreciation_board(self):
+        """Recompute the unposted depreciation lines of the assets
+
+        The boards of all assets are computed first and then compared with the
+        existing unposted lines, only the lines that changed are written.
+        """
+        self.mapped('depreciation_line_ids')
+        cache = {}
+        boards = {asset: asset._get_depreciation_board(cache) for asset in self}
+        self.env['account.asset.depreciation.line']._sync_depreciation_board(boards)
         return True
 
     def validate(self):
@@ -493,15 +568,13 @@ class AccountAssetAsset(models.Model):
     @api.model_create_multi
     def create(self, vals_list):
         assets = super(AccountAssetAsset, self.with_context(mail_create_nolog=True)).create(vals_list)
-        for asset in assets:
-            asset.sudo().compute_depreciation_board()
+        assets.sudo().compute_depreciation_board()
         return assets
 
     def write(self, vals):
         res = super(AccountAssetAsset, self).write(vals)
         if 'depreciation_line_ids' not in vals and 'state' not in vals:
-            for rec in self:
-                rec.compute_depreciation_board()
+            self.compute_depreciation_board()
         return res
 
     def open_entries(self):
@@ -557,15 +630,71 @@ class AccountAssetDepreciationLine(models.Model):
         for line in self:
             line.move_posted_check = True if line.move_id and line.move_id.state == 'posted' else False
 
+    def _get_board_changes(self, vals):
+        """Fields of ``vals`` that differ from the line"""
+        self.ensure_one()
+        changes = {}
+        for fname in ('amount', 'remaining_value', 'depreciated_value'):
+            if self.currency_id.compare_amounts(self[fname], vals[fname]):
+                changes[fname] = vals[fname]
+        if self.depreciation_date != vals['depreciation_date']:
+            changes['depreciation_date'] = vals['depreciation_date']
+        if self.name != vals['name']:
+            changes['name'] = vals['name']
+        return changes
+
+    @api.model
+    def _sync_depreciation_board(self, boards):
+        """Apply computed boards ``{asset: [line values]}`` to the unposted lines
+
+        Existing lines are matched by sequence. Unchanged lines are left
+        untouched, changed lines are updated, missing lines are created and the
+        remaining ones are removed, each with a single ORM call.
+        """
+        to_create = []
+        to_unlink = self.browse()
+        to_write = defaultdict(lambda: self.browse())
+        for asset, board in boards.items():
+            unposted = {}
+            for line in asset.depreciation_line_ids.filtered(lambda x: not x.move_check):
+                if line.sequence in unposted:
+                    to_unlink |= line
+                else:
+                    unposted[line.sequence] = line
+            for vals in board:
+                line = unposted.pop(vals['sequence'], None)
+                if not line:
+                    to_create.append(vals)
+                    continue
+                changes = line._get_board_changes(vals)
+                if changes:
+                    to_write[tuple(sorted(changes.items()))] |= line
+            for line in unposted.values():
+                to_unlink |= line
+        to_unlink.unlink()
+        for changes, lines in to_write.items():
+            lines.write(dict(changes))
+        return self.create(to_create)
+
+    @api.model
+    def _get_due_lines(self, date, asset_type=None):
+        """Depreciation lines of running assets due at ``date`` without an entry"""
+        domain = [
+            ('move_check', '=', False),
+            ('depreciation_date', '<=', date),
+            ('asset_id.state', '=', 'open'),
+            ('asset_id.active', '=', True),
+        ]
+        if asset_type:
+            domain.append(('asset_id.category_id.type', '=', asset_type))
+        return self.search(domain, order='asset_id, depreciation_date, id')
+
     def create_move(self, post_move=True):
-        created_moves = self.env['account.move']
-        for line in self:
-            if line.move_id:
-                raise UserError(_('This depreciation is already linked to a journal entry. Please post or delete it.'))
-            move_vals = self._prepare_move(line)
-            move = self.env['account.move'].create(move_vals)
+        if any(line.move_id for line in self):
+            raise UserError(_('This depreciation is already linked to a journal entry. Please post or delete it.'))
+        created_moves = self.env['account.move'].create([self._prepare_move(line) for line in self])
+        for line, move in zip(self, created_moves):
             line.write({'move_id': move.id, 'move_check': True})
-            created_moves |= move
 
         if post_move and created_moves:
             created_moves.filtered(lambda m: any(m.asset_depreciation_ids.mapped('asset_id.category_id.open_asset'))).action_post()
@@ -666,12 +795,11 @@ class AccountAssetDepreciationLine(models.Model):
 
     def post_lines_and_close_asset(self):
         # we re-evaluate the assets to determine whether we can close them
-        for line in self:
-            line.log_message_when_posted()
-            asset = line.asset_id
-            if asset.currency_id.is_zero(asset.value_residual):
-                asset.message_post(body=_("Document closed."))
-                asset.write({'state': 'close'})
+        self.log_message_when_posted()
+        to_close = self.mapped('asset_id').filtered(lambda asset: asset.currency_id.is_zero(asset.value_residual))
+        for asset in to_close:
+            asset.message_post(body=_("Document closed."))
+        to_close.write({'state': 'close'})
 
     def log_message_when_posted(self):
         def _format_message(message_description, tracked_values):
@@ -19,8 +19,18 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+from datetime import timedelta
+
 from odoo import api, fields, models
 from odoo.fields import Command
+from odoo.osv import expression
+from odoo.tools.sql import create_index
+
+# Number of booked orders sent to the PoS per page
+DEFAULT_BOOKED_ORDER_PAGE_SIZE = 80
+# Seconds re-read before a refresh cursor, covers the orders written by
+# transactions that were still running when the cursor was taken
+BOOKED_ORDER_CURSOR_OVERLAP = 60
 
 
 class BookOrder(models.Model):
@@ -30,6 +40,12 @@ class BookOrder(models.Model):
     _name = 'book.order'
     _description = "Point of Sale Booked Orders"
 
+    def init(self):
+        """ Index the draft bookings listed in the PoS by date"""
+        super().init()
+        create_index(self._cr, 'book_order_state_date_quotation_index',
+                     self._table, ['state', 'date_quotation'])
+
     @api.model
     def _amount_line_tax(self, line, fiscal_position_id):
         """ Calculates the tax amount of the order line.
@@ -167,32 +183,99 @@ class BookOrder(models.Model):
             order.write({'deliver_date': delivery_date + ' 00:00:00'})
         return order.name
 
+    @api.model
+    def _get_booked_orders_domain(self, search=None):
+        """ Domain of the draft orders listed in PoS, matching the search
+            text on the reference, customer or phone
+            :param search: text typed in the PoS search bar
+            :return list: domain on book.order
+        """
+        domain = [('state', '=', 'draft')]
+        if search:
+            domain = expression.AND([domain, expression.OR([
+                [('name', 'ilike', search)],
+                [('partner_id.name', 'ilike', search)],
+                [('phone', 'ilike', search)],
+            ])])
+        return domain
+
+    def _prepare_booked_orders_data(self):
+        """ Values of the orders shown on the PoS Booked orders screen, read
+            with one query per model for the whole page
+            :return list: A list of dictionaries containing information
+                        about each order
+        """
+        orders = self.read([
+            'name', 'partner_id', 'delivery_address', 'note', 'phone',
+            'date_quotation', 'pickup_date', 'deliver_date', 'amount_total',
+        ], load=None)
+        lines = self.env['book.order.line'].search_read(
+            [('order_id', 'in', self.ids)],
+            ['order_id', 'product_id', 'qty', 'price_unit'], load=None)
+        products = {order_id: [] for order_id in self.ids}
+        for line in lines:
+            products[line['order_id']].append({
+                'id': line['product_id'],
+                'qty': line['qty'],
+                'price': line['price_unit'],
+            })
+        partner_names = {
+            partner['id']: partner['name']
+            for partner in self.partner_id.read(['name'])
+        }
+        return [{'id': order['id'],
+                 'name': order['name'],
+                 'partner_id': order['partner_id'],
+                 'partner_name': partner_names.get(order['partner_id']),
+                 'address': order['delivery_address'],
+                 'note': order['note'],
+                 'phone': order['phone'],
+                 'date': order['date_quotation'],
+                 'pickup': order['pickup_date'],
+                 'deliver': order['deliver_date'],
+                 'products': products[order['id']],
+                 'total': order['amount_total'],
+                 } for order in orders]
+
+    @api.model
+    def search_booked_orders(self, search=None, offset=0,
+                             limit=DEFAULT_BOOKED_ORDER_PAGE_SIZE,
+                             since=None):
+        """ Fetch one page of draft orders to PoS Booked orders screen
+            :param search: text to match on reference, customer or phone
+            :param offset: number of orders already loaded by the PoS
+            :param limit: size of the page, None for every order
+            :param since: cursor of a previous call, only the orders
+                          changed since are returned
+            :return dict: 'orders' of the page, 'removed_ids' of orders no
+                          longer in draft since the cursor, 'total' number
+                          of matching orders and 'cursor' for the next
+                          refresh
+        """
+        cursor = fields.Datetime.to_string(self.env.cr.now())
+        domain = self._get_booked_orders_domain(search)
+        removed_ids = []
+        if since:
+            changed = [('write_date', '>', fields.Datetime.to_datetime(
+                since) - timedelta(seconds=BOOKED_ORDER_CURSOR_OVERLAP))]
+            removed_ids = self.search(
+                changed + [('state', '!=', 'draft')]).ids
+            orders = self.search(expression.AND([domain, changed]),
+                                 order='date_quotation desc, id desc')
+        else:
+            orders = self.search(domain, offset=offset, limit=limit,
+                                 order='date_quotation desc, id desc')
+        return {
+            'orders': orders._prepare_booked_orders_data(),
+            'removed_ids': removed_ids,
+            'total': self.search_count(domain),
+            'cursor': cursor,
+        }
+
     @api.model
     def all_orders(self):
         """ To fetch all draft stage orders to PoS Booked orders screen
             :return dict: A list of dictionaries containing information
                         about each order
         """
-        values = []
-        for rec in self.search([('state', '=', 'draft')]):
-            products = []
-            for line in rec.book_line_ids:
-                products.append({
-                    'id': line.product_id.id,
-                    'qty': line.qty,
-                    'price': line.price_unit
-                })
-            values.append({'id': rec.id,
-                           'name': rec.name,
-                           'partner_id': rec.partner_id.id,
-                           'partner_name': rec.partner_id.name,
-                           'address': rec.delivery_address,
-                           'note': rec.note,
-                           'phone': rec.phone,
-                           'date': rec.date_quotation,
-                           'pickup': rec.pickup_date,
-                           'deliver': rec.deliver_date,
-                           'products': products,
-                           'total': rec.amount_total
-                           })
-        return values
+        return self.search_booked_orders(limit=None)['orders']
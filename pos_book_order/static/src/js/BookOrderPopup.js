@@ -77,14 +77,9 @@ export class BookOrderPopup extends AbstractAwaitablePopup {
         ).then(function(book_order) {
                     self.order.booking_ref_id=book_order
         })
-        await this.orm.call(
-        "book.order", "all_orders", [], {}
-        ).then(function(result) {
-            self.pos.showScreen('BookedOrdersScreen', {
-                data: result,
-                new_order:true
-            });
-        })
+        this.pos.showScreen('BookedOrdersScreen', {
+            new_order: true
+        });
         this.cancel();
     }
 
@@ -14,16 +14,10 @@ static template = 'pos_book_order.BookedOrdersButton';
         this.pos = usePos();
     }
     async onClick() {
-    // fetch all booked order in draft stage to screen
-       var self = this
-       await this.orm.call(
-            "book.order", "all_orders", [], {}
-        ).then(function(result) {
-            self.pos.showScreen('BookedOrdersScreen', {
-                data: result,
-                new_order:false
-            });
-        })
+    // open the booked orders screen, it fetches the draft orders page by page
+       this.pos.showScreen('BookedOrdersScreen', {
+           new_order: false
+       });
     }
 }
 ProductScreen.addControlButton({
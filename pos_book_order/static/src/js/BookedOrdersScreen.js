@@ -2,6 +2,7 @@
 /*
  * This file is used to register a new screen for Booked orders.
  */
+import { onWillStart, useState } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { TicketScreen } from "@point_of_sale/app/screens/ticket_screen/ticket_screen";
 import { usePos } from "@point_of_sale/app/store/pos_hook";
@@ -13,6 +14,39 @@ class BookedOrdersScreen extends TicketScreen {
         super.setup();
         this.pos = usePos();
         this.orm = useService("orm");
+        this.booked = useState({ orders: [], total: 0, cursor: false, search: "" });
+        onWillStart(() => this.loadBookedOrders());
+    }
+    async loadBookedOrders(offset = 0) {
+    // fetch one page of booked orders in draft stage, the first page replaces the list
+        const result = await this.orm.call("book.order", "search_booked_orders", [], {
+            search: this.booked.search,
+            offset: offset,
+        });
+        this.booked.orders = offset ? [...this.booked.orders, ...result.orders] : result.orders;
+        this.booked.total = result.total;
+        this.booked.cursor = result.cursor;
+    }
+    loadMoreBookedOrders() {
+        return this.loadBookedOrders(this.booked.orders.length);
+    }
+    onSearchBookedOrders(ev) {
+        this.booked.search = ev.target.value;
+        return this.loadBookedOrders();
+    }
+    async refreshBookedOrders() {
+    // fetch only the orders changed since the last load and merge them in the list
+        const result = await this.orm.call("book.order", "search_booked_orders", [], {
+            search: this.booked.search,
+            since: this.booked.cursor,
+        });
+        const changedIds = new Set([...result.removed_ids, ...result.orders.map((order) => order.id)]);
+        this.booked.orders = [
+            ...result.orders,
+            ...this.booked.orders.filter((order) => !changedIds.has(order.id)),
+        ];
+        this.booked.total = result.total;
+        this.booked.cursor = result.cursor;
     }
     back() {
         this.pos.showScreen('ProductScreen');
@@ -15,15 +15,9 @@ patch(TicketScreen.prototype, {
             ),
             });
             if (confirmed) {
-            var self = this
-            await this.orm.call(
-            "book.order", "all_orders", [], {}
-            ).then(function(result) {
-            self.pos.showScreen('BookedOrdersScreen', {
-            data: result,
-            new_order:false
+            this.pos.showScreen('BookedOrdersScreen', {
+                new_order: false
             });
-            })
             }
             }
             else{
@@ -39,15 +33,9 @@ patch(TicketScreen.prototype, {
             ),
             });
             if (confirmed) {
-            var self = this
-            await this.orm.call(
-            "book.order", "all_orders", [], {}
-            ).then(function(result) {
-            self.pos.showScreen('BookedOrdersScreen', {
-            data: result,
-            new_order:false
+            this.pos.showScreen('BookedOrdersScreen', {
+                new_order: false
             });
-            })
             }
             }
             else{
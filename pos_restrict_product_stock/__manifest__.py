@@ -20,7 +20,7 @@
 #############################################################################
 {
     'name': 'buz Display Stock in POS | Restrict Out-of-Stock Products in POS',
-    'version': '17.0.2.1.1',
+    'version': '17.0.2.2.0',
     'category': 'Point of Sale',
     'summary': """Enhance your Point of Sale experience by preventing the 
     ordering of out-of-stock products during your session""",
@@ -36,6 +36,7 @@
     'assets': {
         'point_of_sale._assets_pos': [
             '/pos_restrict_product_stock/static/src/js/RestrictStockPopup.js',
+            '/pos_restrict_product_stock/static/src/js/ProductStock.js',
             '/pos_restrict_product_stock/static/src/js/ProductScreen.js',
             '/pos_restrict_product_stock/static/src/js/OrderScreen.js',
             '/pos_restrict_product_stock/static/src/css/display_stock.css',
@@ -21,3 +21,4 @@
 from . import pos_config
 from . import pos_session
 from . import res_config_settings
+from . import stock_move
@@ -18,19 +18,143 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
-from odoo import models
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+# Seconds re-scanned before a cursor, covers the moves written by
+# transactions that were still running when the cursor was taken
+STOCK_CURSOR_OVERLAP = 60
+# Seconds between two polls of the stock changes, 0 disables polling
+DEFAULT_STOCK_POLL_INTERVAL = 60
+# Move states counted in the forecasted quantity
+FORECAST_MOVE_STATES = ('waiting', 'confirmed', 'partially_available',
+                        'assigned')
 
 
 class PosSession(models.Model):
-    """Inherited pos session for loading quantity fields from product"""
+    """Inherited pos session for loading the stock of the session warehouse"""
     _inherit = 'pos.session'
 
-    def _loader_params_product_product(self):
-        """Load forcast and on hand quantity field to pos session.
-           :return dict: returns dictionary of field parameters for the
-                        product model
+    def load_pos_data(self):
+        """Add the quantities of the session warehouse to the pos data.
+           :return dict: pos data with the 'pos_product_stock' snapshot
+        """
+        loaded_data = super().load_pos_data()
+        config = self.config_id
+        if config.is_display_stock or config.is_restrict_product:
+            loaded_data['pos_product_stock'] = dict(
+                self._get_pos_product_stock(),
+                poll_interval=self._get_stock_poll_interval())
+        return loaded_data
+
+    @api.model
+    def _get_stock_poll_interval(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'pos_restrict_product_stock.stock_poll_interval',
+            DEFAULT_STOCK_POLL_INTERVAL))
+
+    def _get_pos_stock_location(self):
+        """Location whose children hold the stock sold by the session.
+           :return: view location of the warehouse of the pos operation type
+        """
+        picking_type = self.config_id.picking_type_id
+        return (picking_type.warehouse_id.view_location_id
+                or picking_type.default_location_src_id)
+
+    def _get_pos_product_stock(self, product_ids=None):
+        """Read on hand and forecasted quantities in the session warehouse
+           with one grouped query over quants and pending moves.
+           :param list product_ids: products to read, all the products
+                                    available in pos when not given
+           :return dict: 'cursor' to poll the changes from, 'quantities'
+                         as {product id: [on hand, forecasted]}
+        """
+        self.ensure_one()
+        cursor = fields.Datetime.to_string(self.env.cr.now())
+        location = self._get_pos_stock_location()
+        if not location:
+            return {'cursor': cursor, 'quantities': {}}
+        self.env['stock.quant'].flush_model(
+            ['product_id', 'location_id', 'quantity'])
+        self.env['stock.move'].flush_model(
+            ['product_id', 'location_id', 'location_dest_id', 'product_qty',
+             'state'])
+        product_filter = ''
+        if product_ids is not None:
+            product_filter = 'AND {alias}.product_id = ANY(%(product_ids)s)'
+        self.env.cr.execute("""
+            WITH locations AS (
+                SELECT id
+                  FROM stock_location
+                 WHERE parent_path LIKE %(path)s
+                   AND usage IN ('internal', 'transit')
+            ), on_hand AS (
+                SELECT q.product_id, SUM(q.quantity) AS qty
+                  FROM stock_quant q
+                 WHERE q.location_id IN (SELECT id FROM locations)
+                       {quant_filter}
+                 GROUP BY q.product_id
+            ), pending AS (
+                SELECT m.product_id,
+                       SUM(CASE WHEN dest.id IS NOT NULL
+                                THEN m.product_qty
+                                ELSE -m.product_qty END) AS qty
+                  FROM stock_move m
+                  LEFT JOIN locations src ON src.id = m.location_id
+                  LEFT JOIN locations dest ON dest.id = m.location_dest_id
+                 WHERE m.state IN %(states)s
+                   AND (src.id IS NULL) != (dest.id IS NULL)
+                       {move_filter}
+                 GROUP BY m.product_id
+            )
+            SELECT pp.id,
+                   COALESCE(on_hand.qty, 0),
+                   COALESCE(on_hand.qty, 0) + COALESCE(pending.qty, 0)
+              FROM on_hand
+              FULL OUTER JOIN pending ON pending.product_id = on_hand.product_id
+              JOIN product_product pp
+                ON pp.id = COALESCE(on_hand.product_id, pending.product_id)
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE pt.available_in_pos
+        """.format(quant_filter=product_filter.format(alias='q'),
+                   move_filter=product_filter.format(alias='m')), {
+            'path': location.parent_path + '%',
+            'states': FORECAST_MOVE_STATES,
+            'product_ids': list(product_ids or []),
+        })
+        quantities = {
+            product_id: [float(on_hand), float(forecasted)]
+            for product_id, on_hand, forecasted in self.env.cr.fetchall()
+        }
+        if product_ids is not None:
+            # Products whose stock left the warehouse are reset to zero
+            for product_id in product_ids:
+                quantities.setdefault(product_id, [0.0, 0.0])
+        return {'cursor': cursor, 'quantities': quantities}
+
+    def get_pos_product_stock_changes(self, cursor):
+        """Return the quantities of the products moved in the session
+           warehouse since the cursor, polled by the pos.
+           :param str cursor: cursor of the previous snapshot or poll
+           :return dict: same layout as `_get_pos_product_stock`
         """
-        result = super()._loader_params_product_product()
-        result['search_params']['fields'].append('qty_available')
-        result['search_params']['fields'].append('virtual_available')
-        return result
+        self.ensure_one()
+        location = self._get_pos_stock_location()
+        if not location:
+            return {'cursor': cursor, 'quantities': {}}
+        since = fields.Datetime.to_datetime(cursor) - timedelta(
+            seconds=STOCK_CURSOR_OVERLAP)
+        self.env['stock.move'].flush_model(
+            ['product_id', 'location_id', 'location_dest_id'])
+        self.env.cr.execute("""
+            SELECT DISTINCT m.product_id
+              FROM stock_move m
+              JOIN stock_location src ON src.id = m.location_id
+              JOIN stock_location dest ON dest.id = m.location_dest_id
+             WHERE m.write_date > %(since)s
+               AND (src.parent_path LIKE %(path)s
+                    OR dest.parent_path LIKE %(path)s)
+        """, {'since': since, 'path': location.parent_path + '%'})
+        product_ids = [row[0] for row in self.env.cr.fetchall()]
+        return self._get_pos_product_stock(product_ids)
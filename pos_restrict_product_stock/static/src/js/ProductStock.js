@@ -0,0 +1,56 @@
+/** @odoo-module **/
+/*
+ * Loads the stock quantities of the session warehouse from the snapshot sent
+ * with the pos data, then polls the products whose stock changed since.
+ */
+import { patch } from "@web/core/utils/patch";
+import { PosStore } from "@point_of_sale/app/store/pos_store";
+
+patch(PosStore.prototype, {
+    async _processData(loadedData) {
+        const stock = loadedData["pos_product_stock"];
+        this.productStock = stock ? stock.quantities : {};
+        this.productStockCursor = stock ? stock.cursor : false;
+        this.productStockPollInterval = stock ? stock.poll_interval : 0;
+        await super._processData(...arguments);
+    },
+    _loadProductProduct(products) {
+        // Also called for the products loaded in background during the session
+        for (const product of products) {
+            this._setProductStock(product, this.productStock[product.id]);
+        }
+        return super._loadProductProduct(...arguments);
+    },
+    _setProductStock(product, quantities) {
+        const [qtyAvailable, virtualAvailable] = quantities || [0, 0];
+        product.qty_available = qtyAvailable;
+        product.virtual_available = virtualAvailable;
+    },
+    async afterProcessServerData() {
+        await super.afterProcessServerData(...arguments);
+        if (this.productStockCursor && this.productStockPollInterval > 0) {
+            setInterval(() => this._pollProductStock(), this.productStockPollInterval * 1000);
+        }
+    },
+    async _pollProductStock() {
+        let changes;
+        try {
+            changes = await this.orm.silent.call(
+                "pos.session",
+                "get_pos_product_stock_changes",
+                [[this.pos_session.id], this.productStockCursor]
+            );
+        } catch {
+            // Offline, the next poll starts again from the same cursor
+            return;
+        }
+        this.productStockCursor = changes.cursor;
+        for (const [productId, quantities] of Object.entries(changes.quantities)) {
+            this.productStock[productId] = quantities;
+            const product = this.db.product_by_id[productId];
+            if (product) {
+                this._setProductStock(product, quantities);
+            }
+        }
+    },
+});
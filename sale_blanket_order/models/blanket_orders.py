@@ -1,6 +1,8 @@
 # Copyright 2018 ACSONE SA/NV
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+from collections import defaultdict
+
 from odoo import SUPERUSER_ID, _, api, fields, models
 from odoo.exceptions import UserError
 from odoo.tools import float_is_zero
@@ -25,11 +27,16 @@ class BlanketOrder(models.Model):
 
     @api.depends("line_ids.price_total")
     def _compute_amount_all(self):
-        for order in self.filtered("currency_id"):
-            amount_untaxed = amount_tax = 0.0
-            for line in order.line_ids:
-                amount_untaxed += line.price_subtotal
-                amount_tax += line.price_tax
+        orders = self.filtered("currency_id")
+        # Orders being edited in a form are summed from the cache
+        stored_orders = orders.filtered("id")
+        sums = stored_orders._get_line_sums(["price_subtotal", "price_tax"])
+        for order in orders:
+            if order in stored_orders:
+                amount_untaxed, amount_tax = sums.get(order.id, (0.0, 0.0))
+            else:
+                amount_untaxed = sum(order.line_ids.mapped("price_subtotal"))
+                amount_tax = sum(order.line_ids.mapped("price_tax"))
             order.update(
                 {
                     "amount_untaxed": order.currency_id.round(amount_untaxed),
@@ -162,6 +169,23 @@ class BlanketOrder(models.Model):
     def _get_sale_orders(self):
         return self.mapped("line_ids.sale_lines.order_id")
 
+    def _get_line_sums(self, field_names, domain=None):
+        """Sum stored fields of the lines of these orders in one grouped query
+
+        :param field_names: names of the line fields to sum
+        :param domain: extra domain on the lines
+        :return: {order id: tuple of sums in the order of field_names}, orders
+                 without matching lines are missing
+        """
+        if not self:
+            return {}
+        groups = self.env["sale.blanket.order.line"]._read_group(
+            [("order_id", "in", self.ids)] + (domain or []),
+            ["order_id"],
+            [f"{field_name}:sum" for field_name in field_names],
+        )
+        return {order.id: tuple(sums) for order, *sums in groups}
+
     @api.depends("line_ids")
     def _compute_line_count(self):
         self.line_count = len(self.mapped("line_ids"))
@@ -180,13 +204,23 @@ class BlanketOrder(models.Model):
         precision = self.env["decimal.precision"].precision_get(
             "Product Unit of Measure"
         )
+        stored_orders = self.filtered(
+            lambda order: order.id
+            and order.confirmed
+            and order.validity_date > today
+        )
+        remaining = stored_orders._get_line_sums(
+            ["remaining_uom_qty"], [("display_type", "=", False)]
+        )
         for order in self:
             if not order.confirmed:
                 order.state = "draft"
             elif order.validity_date <= today:
                 order.state = "expired"
             elif float_is_zero(
-                sum(
+                remaining.get(order.id, (0.0,))[0]
+                if order in stored_orders
+                else sum(
                     order.line_ids.filtered(lambda line: not line.display_type).mapped(
                         "remaining_uom_qty"
                     )
@@ -198,12 +232,21 @@ class BlanketOrder(models.Model):
                 order.state = "open"
 
     def _compute_uom_qty(self):
+        field_names = [
+            "original_uom_qty",
+            "ordered_uom_qty",
+            "invoiced_uom_qty",
+            "delivered_uom_qty",
+            "remaining_uom_qty",
+        ]
+        stored_orders = self.filtered("id")
+        sums = stored_orders._get_line_sums(field_names)
         for bo in self:
-            bo.original_uom_qty = sum(bo.mapped("line_ids.original_uom_qty"))
-            bo.ordered_uom_qty = sum(bo.mapped("line_ids.ordered_uom_qty"))
-            bo.invoiced_uom_qty = sum(bo.mapped("line_ids.invoiced_uom_qty"))
-            bo.delivered_uom_qty = sum(bo.mapped("line_ids.delivered_uom_qty"))
-            bo.remaining_uom_qty = sum(bo.mapped("line_ids.remaining_uom_qty"))
+            if bo in stored_orders:
+                values = sums.get(bo.id, (0.0,) * len(field_names))
+            else:
+                values = [sum(bo.mapped("line_ids." + name)) for name in field_names]
+            bo.update(dict(zip(field_names, values)))
 
     @api.onchange("partner_id")
     def onchange_partner_id(self):
@@ -329,50 +372,30 @@ class BlanketOrder(models.Model):
         expired_orders.modified(["validity_date"])
         expired_orders.flush_recordset()
 
+    @api.model
+    def _search_line_quantity(self, field_name, operator, value):
+        # Orders having at least one line matching, resolved as a subquery
+        return [("line_ids." + field_name, operator, value)]
+
     @api.model
     def _search_original_uom_qty(self, operator, value):
-        bo_line_obj = self.env["sale.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("original_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return self._search_line_quantity("original_uom_qty", operator, value)
 
     @api.model
     def _search_ordered_uom_qty(self, operator, value):
-        bo_line_obj = self.env["sale.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("ordered_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return self._search_line_quantity("ordered_uom_qty", operator, value)
 
     @api.model
     def _search_invoiced_uom_qty(self, operator, value):
-        bo_line_obj = self.env["sale.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("invoiced_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return self._search_line_quantity("invoiced_uom_qty", operator, value)
 
     @api.model
     def _search_delivered_uom_qty(self, operator, value):
-        bo_line_obj = self.env["sale.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("delivered_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return self._search_line_quantity("delivered_uom_qty", operator, value)
 
     @api.model
     def _search_remaining_uom_qty(self, operator, value):
-        bo_line_obj = self.env["sale.blanket.order.line"]
-        res = []
-        bo_lines = bo_line_obj.search([("remaining_uom_qty", operator, value)])
-        order_ids = bo_lines.mapped("order_id")
-        res.append(("id", "in", order_ids.ids))
-        return res
+        return self._search_line_quantity("remaining_uom_qty", operator, value)
 
 
 class BlanketOrderLine(models.Model):
@@ -626,6 +649,37 @@ class BlanketOrderLine(models.Model):
             else:
                 self.taxes_id = fpos.map_tax(self.product_id.taxes_id)
 
+    def _get_sale_line_quantities(self):
+        """Return the quantities of the call-off lines of these blanket lines
+
+        The sale order lines are summed in one grouped query per blanket line,
+        product and unit of measure, only the groups are converted to the unit
+        of measure of the blanket line.
+
+        :return: {blanket line id: [ordered, invoiced, delivered]}
+        """
+        quantities = defaultdict(lambda: [0.0, 0.0, 0.0])
+        line_ids = self._origin.ids
+        if not line_ids:
+            return quantities
+        groups = self.env["sale.order.line"]._read_group(
+            [
+                ("blanket_order_line", "in", line_ids),
+                ("order_id.state", "!=", "cancel"),
+            ],
+            ["blanket_order_line", "product_id", "product_uom"],
+            ["product_uom_qty:sum", "qty_invoiced:sum", "qty_delivered:sum"],
+        )
+        for bo_line, product, uom, ordered, invoiced, delivered in groups:
+            if product != bo_line.product_id or not uom:
+                continue
+            line_quantities = quantities[bo_line.id]
+            for index, qty in enumerate((ordered, invoiced, delivered)):
+                line_quantities[index] += uom._compute_quantity(
+                    qty, bo_line.product_uom
+                )
+        return quantities
+
     @api.depends(
         "sale_lines.order_id.state",
         "sale_lines.blanket_order_line",
@@ -637,23 +691,13 @@ class BlanketOrderLine(models.Model):
         "product_uom",
     )
     def _compute_quantities(self):
+        quantities = self._get_sale_line_quantities()
         for line in self:
-            sale_lines = line.sale_lines
-            line.ordered_uom_qty = sum(
-                sl.product_uom._compute_quantity(sl.product_uom_qty, line.product_uom)
-                for sl in sale_lines
-                if sl.order_id.state != "cancel" and sl.product_id == line.product_id
-            )
-            line.invoiced_uom_qty = sum(
-                sl.product_uom._compute_quantity(sl.qty_invoiced, line.product_uom)
-                for sl in sale_lines
-                if sl.order_id.state != "cancel" and sl.product_id == line.product_id
-            )
-            line.delivered_uom_qty = sum(
-                sl.product_uom._compute_quantity(sl.qty_delivered, line.product_uom)
-                for sl in sale_lines
-                if sl.order_id.state != "cancel" and sl.product_id == line.product_id
-            )
+            (
+                line.ordered_uom_qty,
+                line.invoiced_uom_qty,
+                line.delivered_uom_qty,
+            ) = quantities[line._origin.id]
             line.remaining_uom_qty = line.original_uom_qty - line.ordered_uom_qty
             line.remaining_qty = line.product_uom._compute_quantity(
                 line.remaining_uom_qty, line.product_id.uom_id
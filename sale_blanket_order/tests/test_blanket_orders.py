@@ -424,3 +424,69 @@ class TestSaleBlanketOrders(common.TransactionCase):
         view_action = blanket_order.action_view_sale_orders()
         domain_ids = view_action["domain"][0][2]
         self.assertEqual(len(domain_ids), 3)
+
+    def test_07_cancelled_call_off_releases_quantities(self):
+        """Quantities of a cancelled call-off order go back to the blanket
+        order lines and to the order totals"""
+        blanket_order = self.blanket_order_obj.create(
+            {
+                "partner_id": self.partner.id,
+                "validity_date": fields.Date.to_string(self.tomorrow),
+                "payment_term_id": self.payment_term.id,
+                "pricelist_id": self.sale_pricelist.id,
+                "line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.product.id,
+                            "product_uom": self.uom_dozen.id,
+                            "original_uom_qty": 2.0,
+                            "price_unit": 240.0,
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": self.product2.id,
+                            "product_uom": self.product2.uom_id.id,
+                            "original_uom_qty": 20.0,
+                            "price_unit": 60.0,
+                        },
+                    ),
+                ],
+            }
+        )
+        blanket_order.sudo().onchange_partner_id()
+        blanket_order.sudo().action_confirm()
+        self.assertEqual(blanket_order.amount_untaxed, 1680.0)
+
+        wizard = self.blanket_order_wiz_obj.with_context(
+            active_id=blanket_order.id, active_model="sale.blanket.order"
+        ).create({})
+        wizard.line_ids.filtered(lambda line: line.product_id == self.product).write(
+            {"qty": 1.0}
+        )
+        wizard.line_ids.filtered(lambda line: line.product_id == self.product2).write(
+            {"qty": 5.0}
+        )
+        wizard.sudo().create_sale_order()
+
+        dozen_line = blanket_order.line_ids.filtered(
+            lambda line: line.product_id == self.product
+        )
+        self.assertEqual(dozen_line.ordered_uom_qty, 1.0)
+        self.assertEqual(dozen_line.remaining_qty, 12.0)
+        self.assertEqual(blanket_order.ordered_uom_qty, 6.0)
+        self.assertEqual(blanket_order.remaining_uom_qty, 16.0)
+        self.assertIn(
+            blanket_order,
+            self.blanket_order_obj.search([("ordered_uom_qty", "=", 5.0)]),
+        )
+
+        blanket_order._get_sale_orders().action_cancel()
+        self.assertEqual(dozen_line.ordered_uom_qty, 0.0)
+        blanket_order.invalidate_recordset(["ordered_uom_qty"])
+        self.assertEqual(blanket_order.ordered_uom_qty, 0.0)
+        self.assertEqual(blanket_order.state, "open")
@@ -1,2 +1,5 @@
 # -*- coding: utf-8 -*-
 from . import sales_target
+from . import sale_order
+from . import account_move
+from . import account_partial_reconcile
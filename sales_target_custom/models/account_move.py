@@ -0,0 +1,29 @@
+from odoo import models
+
+# Invoice fields used by the sales target achievement queries
+SALES_TARGET_INVOICE_FIELDS = {
+    'state', 'move_type', 'invoice_date', 'invoice_date_due', 'invoice_user_id', 'team_id',
+    'invoice_line_ids', 'line_ids', 'amount_total',
+}
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _get_sales_target_keys(self):
+        keys = []
+        for move in self.filtered(lambda m: m.move_type in ('out_invoice', 'out_refund')):
+            keys.append((move.invoice_user_id.id, move.team_id.id, move.invoice_date))
+            keys.append((move.invoice_user_id.id, move.team_id.id, move.invoice_date_due))
+        return keys
+
+    def _refresh_sales_targets(self, keys):
+        self.env['sales.target']._refresh_targets_for_documents(['invoice_validate', 'invoice_paid'], keys)
+
+    def write(self, vals):
+        if not SALES_TARGET_INVOICE_FIELDS.intersection(vals):
+            return super().write(vals)
+        keys = self._get_sales_target_keys()
+        res = super().write(vals)
+        self._refresh_sales_targets(keys + self._get_sales_target_keys())
+        return res
@@ -0,0 +1,25 @@
+from odoo import api, models
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    def _get_sales_target_moves(self):
+        return (self.debit_move_id | self.credit_move_id).move_id
+
+    def _refresh_paid_sales_targets(self, moves):
+        # Payment state changes on reconciliation without a write on the move
+        self.env['sales.target']._refresh_targets_for_documents(
+            ['invoice_paid'], moves._get_sales_target_keys())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        self._refresh_paid_sales_targets(partials._get_sales_target_moves())
+        return partials
+
+    def unlink(self):
+        moves = self._get_sales_target_moves()
+        res = super().unlink()
+        self._refresh_paid_sales_targets(moves)
+        return res
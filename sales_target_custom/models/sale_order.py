@@ -0,0 +1,31 @@
+from odoo import models, api
+
+# Sale order fields used by the sales target achievement queries
+SALES_TARGET_ORDER_FIELDS = {'state', 'date_order', 'user_id', 'team_id', 'order_line', 'amount_total'}
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    def _get_sales_target_keys(self):
+        return [(order.user_id.id, order.team_id.id, order.date_order and order.date_order.date())
+                for order in self]
+
+    def _refresh_sales_targets(self, keys):
+        self.env['sales.target']._refresh_targets_for_documents(['sale_order'], keys)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        confirmed = orders.filtered(lambda o: o.state in ('sale', 'done'))
+        if confirmed:
+            confirmed._refresh_sales_targets(confirmed._get_sales_target_keys())
+        return orders
+
+    def write(self, vals):
+        if not SALES_TARGET_ORDER_FIELDS.intersection(vals):
+            return super().write(vals)
+        keys = self._get_sales_target_keys()
+        res = super().write(vals)
+        self._refresh_sales_targets(keys + self._get_sales_target_keys())
+        return res
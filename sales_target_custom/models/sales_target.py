@@ -6,6 +6,26 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# Stored fields refreshed when the orders or invoices of a target change
+ACHIEVEMENT_FIELDS = (
+    'achieved_amount', 'percent_achieved',
+    'theoretical_amount', 'theoretical_percent', 'theoretical_status',
+)
+
+EMPTY_ACHIEVEMENT = {'amount': 0.0, 'count': 0, 'line_count': 0}
+
+# Extra invoice conditions per target point, mirrors _get_invoice_domain
+INVOICE_POINT_CONDITIONS = {
+    'invoice_validate': """
+               AND am.invoice_date >= t.date_start
+               AND am.invoice_date <= t.date_end""",
+    'invoice_paid': """
+               AND am.state = 'posted'
+               AND am.payment_state IN ('paid', 'in_payment')
+               AND am.invoice_date_due >= t.date_start
+               AND am.invoice_date_due <= t.date_end""",
+}
+
 class SalesTarget(models.Model):
     _name = 'sales.target'
     _description = 'Sales Target'
@@ -92,34 +112,16 @@ class SalesTarget(models.Model):
 
     @api.depends('target_point', 'date_start', 'date_end', 'user_id', 'team_id')
     def _compute_achieved_amount(self):
-        for record in self:
-            if not record.date_start or not record.date_end:
-                record.achieved_amount = 0.0
-                continue
-                
-            try:
-                if record.target_point == 'sale_order':
-                    # Get sale orders
-                    domain = record._get_sale_order_domain()
-                    sale_orders = self.env['sale.order'].search(domain)
-                    _logger.info(f"Sales Target {record.name}: Found {len(sale_orders)} sale orders with domain {domain}")
-                    _logger.info(f"Sale order amounts: {sale_orders.mapped('amount_total')}")
-                    record.achieved_amount = sum(sale_orders.mapped('amount_total'))
-                    
-                elif record.target_point in ['invoice_validate', 'invoice_paid']:
-                    # Get invoices
-                    domain = record._get_invoice_domain()
-                    invoices = self.env['account.move'].search(domain)
-                    _logger.info(f"Sales Target {record.name}: Found {len(invoices)} invoices with domain {domain}")
-                    _logger.info(f"Invoice amounts: {invoices.mapped('amount_total')}")
-                    record.achieved_amount = sum(invoices.mapped('amount_total'))
-                    
-                else:
-                    record.achieved_amount = 0.0
-                    
-            except Exception as e:
-                _logger.error(f"Error computing achieved amount: {e}")
-                record.achieved_amount = 0.0
+        for target_point in ('sale_order', 'invoice_validate', 'invoice_paid'):
+            targets = self.filtered(lambda t: t.target_point == target_point)
+            if target_point == 'sale_order':
+                totals = targets._read_sale_achievements()
+            else:
+                totals = targets._read_invoice_achievements(target_point)
+            for record in targets:
+                record.achieved_amount = totals[record]['amount']
+        for record in self.filtered(lambda t: not t.target_point):
+            record.achieved_amount = 0.0
 
     @api.depends('achieved_amount', 'target_amount')
     def _compute_percent_achieved(self):
@@ -167,48 +169,119 @@ class SalesTarget(models.Model):
 
     @api.depends('target_point', 'date_start', 'date_end', 'user_id', 'team_id')
     def _compute_counters(self):
+        sale_totals = self._read_sale_achievements()
+        invoice_totals = {}
+        for target_point in set(self.mapped('target_point')):
+            targets = self.filtered(lambda t: t.target_point == target_point)
+            invoice_totals.update(targets._read_invoice_achievements(target_point))
         for record in self:
-            if not record.date_start or not record.date_end:
-                record.sale_order_count = 0
-                record.sale_order_line_count = 0
-                record.invoice_count = 0
-                record.invoice_line_count = 0
-                continue
-                
-            try:
-                # Sale orders
-                sale_domain = record._get_sale_order_domain()
-                sale_orders = self.env['sale.order'].search(sale_domain)
-                record.sale_order_count = len(sale_orders)
-                
-                # Sale order lines
-                if sale_orders:
-                    sale_lines = self.env['sale.order.line'].search([('order_id', 'in', sale_orders.ids)])
-                    record.sale_order_line_count = len(sale_lines)
-                else:
-                    record.sale_order_line_count = 0
-                    
-                # Invoices
-                invoice_domain = record._get_invoice_domain()
-                invoices = self.env['account.move'].search(invoice_domain)
-                record.invoice_count = len(invoices)
-                
-                # Invoice lines
-                if invoices:
-                    invoice_lines = self.env['account.move.line'].search([
-                        ('move_id', 'in', invoices.ids),
-                        ('display_type', 'not in', ['line_section', 'line_note'])
-                    ])
-                    record.invoice_line_count = len(invoice_lines)
-                else:
-                    record.invoice_line_count = 0
-                    
-            except Exception as e:
-                _logger.error(f"Error computing counters: {e}")
-                record.sale_order_count = 0
-                record.sale_order_line_count = 0
-                record.invoice_count = 0
-                record.invoice_line_count = 0
+            sale = sale_totals[record]
+            invoice = invoice_totals.get(record, EMPTY_ACHIEVEMENT)
+            record.sale_order_count = sale['count']
+            record.sale_order_line_count = sale['line_count']
+            record.invoice_count = invoice['count']
+            record.invoice_line_count = invoice['line_count']
+
+    # Achievement Engine
+    def _get_achievement_values(self):
+        """SQL VALUES rows ``(index, user_id, team_id, date_start, date_end)`` of the targets
+
+        Values are read from the records (not the table) so unsaved targets in
+        a form are computed as well. Targets without a date window are skipped.
+        """
+        rows = []
+        for index, record in enumerate(self):
+            if record.date_start and record.date_end:
+                rows.append((index, record.user_id.id or None, record.team_id.id or None,
+                             record.date_start, record.date_end))
+        return rows
+
+    def _read_achievements(self, query, models_to_flush):
+        """Run a grouped achievement query for all targets at once
+
+        ``query`` must select ``(index, amount, count, line_count)`` grouped by
+        the target index and contain a ``{targets}`` placeholder for the
+        VALUES table of the targets. Returns ``{target: totals}``.
+        """
+        totals = {record: dict(EMPTY_ACHIEVEMENT) for record in self}
+        rows = self._get_achievement_values()
+        if not rows:
+            return totals
+        for model_name in models_to_flush:
+            self.env[model_name].flush_model()
+        targets_sql = 'SELECT * FROM (VALUES %s) AS t(idx, user_id, team_id, date_start, date_end)' % ', '.join(
+            ['(%s, %s::int, %s::int, %s::date, %s::date)'] * len(rows))
+        params = [value for row in rows for value in row]
+        self.env.cr.execute(query.format(targets=targets_sql), params)
+        for index, amount, count, line_count in self.env.cr.fetchall():
+            totals[self[index]] = {'amount': float(amount or 0.0), 'count': count, 'line_count': line_count}
+        return totals
+
+    def _read_sale_achievements(self):
+        """Confirmed sale order totals per target, see ``_get_sale_order_domain``"""
+        return self._read_achievements("""
+            SELECT t.idx, SUM(so.amount_total), COUNT(so.id), COALESCE(SUM(sol.line_count), 0)
+              FROM ({targets}) t
+              JOIN sale_order so
+                ON so.state IN ('sale', 'done')
+               AND so.date_order >= t.date_start
+               AND so.date_order < t.date_end + 1
+               AND CASE WHEN t.user_id IS NOT NULL THEN so.user_id = t.user_id
+                        ELSE so.team_id = t.team_id END
+              LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS line_count
+                      FROM sale_order_line
+                     WHERE order_id = so.id
+              ) sol ON TRUE
+             GROUP BY t.idx
+        """, ['sale.order', 'sale.order.line'])
+
+    def _read_invoice_achievements(self, target_point):
+        """Customer invoice totals per target, see ``_get_invoice_domain``"""
+        return self._read_achievements("""
+            SELECT t.idx, SUM(am.amount_total), COUNT(am.id), COALESCE(SUM(aml.line_count), 0)
+              FROM ({targets}) t
+              JOIN account_move am
+                ON am.move_type IN ('out_invoice', 'out_refund')
+               AND am.state NOT IN ('draft', 'cancel')
+               AND CASE WHEN t.user_id IS NOT NULL THEN am.invoice_user_id = t.user_id
+                        ELSE am.team_id = t.team_id END
+               %s
+              LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS line_count
+                      FROM account_move_line
+                     WHERE move_id = am.id
+                       AND COALESCE(display_type, '') NOT IN ('line_section', 'line_note')
+              ) aml ON TRUE
+             GROUP BY t.idx
+        """ % INVOICE_POINT_CONDITIONS.get(target_point, ''), ['account.move', 'account.move.line'])
+
+    def _mark_achievements_to_recompute(self):
+        """Schedule the stored achievement fields of these targets for recomputation"""
+        for fname in ACHIEVEMENT_FIELDS:
+            self.env.add_to_compute(self._fields[fname], self)
+
+    @api.model
+    def _refresh_targets_for_documents(self, target_points, keys):
+        """Recompute the targets affected by changed orders or invoices
+
+        ``keys`` is an iterable of ``(user_id, team_id, date)`` of the changed
+        documents, taken before and after the change.
+        """
+        keys = [key for key in keys if key[2]]
+        if not keys:
+            return
+        user_ids = {key[0] for key in keys if key[0]}
+        team_ids = {key[1] for key in keys if key[1]}
+        dates = [key[2] for key in keys]
+        targets = self.sudo().search([
+            ('target_point', 'in', target_points),
+            ('date_start', '<=', max(dates)),
+            ('date_end', '>=', min(dates)),
+            '|', ('user_id', 'in', list(user_ids)), ('team_id', 'in', list(team_ids)),
+        ])
+        if targets:
+            targets._mark_achievements_to_recompute()
 
     def _get_sale_order_domain(self):
         """Get domain for sale orders based on target configuration."""
@@ -253,6 +326,14 @@ class SalesTarget(models.Model):
             
         return base_domain
 
+    @api.model
+    def _prefix_domain(self, domain, prefix):
+        """Evaluate a document domain on its lines, e.g. ``order_id.state``"""
+        return [
+            (f'{prefix}.{leaf[0]}', leaf[1], leaf[2]) if isinstance(leaf, (list, tuple)) else leaf
+            for leaf in domain
+        ]
+
     # Action Methods
     def action_view_sale_orders(self):
         """View related sale orders."""
@@ -271,10 +352,7 @@ class SalesTarget(models.Model):
 
     def action_view_sale_order_lines(self):
         """View related sale order lines."""
-        sale_domain = self._get_sale_order_domain()
-        sale_orders = self.env['sale.order'].search(sale_domain)
-        
-        domain = [('order_id', 'in', sale_orders.ids)]
+        domain = self._prefix_domain(self._get_sale_order_domain(), 'order_id')
         return {
             'type': 'ir.actions.act_window',
             'name': _('Sale Order Lines'),
@@ -302,11 +380,7 @@ class SalesTarget(models.Model):
 
     def action_view_invoice_lines(self):
         """View related invoice lines."""
-        invoice_domain = self._get_invoice_domain()
-        invoices = self.env['account.move'].search(invoice_domain)
-        
-        domain = [
-            ('move_id', 'in', invoices.ids),
+        domain = self._prefix_domain(self._get_invoice_domain(), 'move_id') + [
             ('display_type', 'not in', ['line_section', 'line_note'])
         ]
         return {
@@ -355,11 +429,8 @@ class SalesTarget(models.Model):
 
     def action_recompute_achievement(self):
         """Manually recompute achievement amounts."""
-        for record in self:
-            record._compute_achieved_amount()
-            record._compute_percent_achieved()
-            record._compute_theoretical_achievement()
-            record._compute_counters()
+        self._mark_achievements_to_recompute()
+        self.flush_recordset()
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
@@ -369,6 +440,14 @@ class SalesTarget(models.Model):
             }
         }
 
+    @api.model
+    def recompute_all_targets(self):
+        """Recompute the achievements of every target with one query per target point"""
+        targets = self.search([])
+        targets._mark_achievements_to_recompute()
+        targets.flush_recordset()
+        return len(targets)
+
     # Validation Methods
     @api.constrains('date_start', 'date_end')
     def _check_dates(self):
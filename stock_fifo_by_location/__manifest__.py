@@ -1,6 +1,6 @@
 {
     'name': 'Buz Stock FIFO by Warehouse',
-    'version': '17.0.1.2.6',
+    'version': '17.0.1.2.7',
     'category': 'Inventory/Stock',
     'author': 'APC Ball',
     'website': 'https://github.com/apcball/apcball',
@@ -16,6 +16,7 @@
         'data/edge_case_config.xml',
         'data/logging_config.xml',
         'data/concurrency_config.xml',
+        'data/fifo_migration_cron.xml',
         'views/stock_quant_views.xml',
         'wizard/stock_valuation_recalculate_wizard_views.xml',
         'wizard/stock_shortage_resolution_wizard_views.xml',
@@ -82,6 +83,16 @@ Requirements:
 - stock_landed_costs module for landed cost functionality
 
 Version History:
+- 17.0.1.2.7: Background warehouse migration for existing valuation layers
+  * Upgrade only adds warehouse_id and registers a pending marker
+    (stock_fifo_by_location.warehouse_migration)
+  * Cron "FIFO by Warehouse: Migrate Valuation Layers" fills the layers in
+    chunks of ids with one SQL update per chunk, committing after each chunk
+  * Resumable: progress (last id, updated layers, elapsed time) is saved
+    with every chunk and logged
+  * Config parameters: migration_chunk_size (20000), migration_time_budget (240s)
+  * FIFO queries migrate the pending layers of their product on the fly
+    until the background job is complete
 - 17.0.1.2.6: CRITICAL FIX - Override product._get_fifo_candidates()
   * Root cause found: Odoo calls product._run_fifo() → product._get_fifo_candidates()
   * Our stock.valuation.layer._run_fifo() override was NEVER called!
@@ -30,6 +30,10 @@ def post_init_hook(env):
     _logger.info("="*80)
     
     try:
+        # Layers created before the install get their warehouse from the
+        # background migration job (stock.fifo.migration)
+        env['stock.fifo.migration']._register_warehouse_migration()
+        
         # Step 1: Fix NULL remaining values
         _logger.info("Step 1: Fixing NULL remaining values...")
         null_fixed = _fix_null_remaining_values(env)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-migration script for stock_fifo_by_location 17.0.1.2.7
+
+Only prepares the schema and registers the pending warehouse migration.
+The valuation layers themselves are filled afterwards by the cron job
+"FIFO by Warehouse: Migrate Valuation Layers" (stock.fifo.migration), in
+committed chunks, so the upgrade stays short on large databases.
+"""
+
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+WAREHOUSE_MIGRATION_PARAM = 'stock_fifo_by_location.warehouse_migration'
+
+
+def migrate(cr, version):
+    """
+    Pre-migration: ensure warehouse_id exists and mark existing layers as pending
+    """
+    _logger.info("Starting pre-migration for stock_fifo_by_location 17.0.1.2.7")
+    
+    cr.execute("""
+        ALTER TABLE stock_valuation_layer
+        ADD COLUMN IF NOT EXISTS warehouse_id INTEGER
+    """)
+    cr.execute("""
+        CREATE INDEX IF NOT EXISTS stock_valuation_layer_warehouse_id_index
+        ON stock_valuation_layer(warehouse_id)
+    """)
+    
+    cr.execute("""
+        SELECT MAX(id),
+               EXISTS(SELECT 1 FROM stock_valuation_layer
+                       WHERE warehouse_id IS NULL AND stock_move_id IS NOT NULL)
+          FROM stock_valuation_layer
+    """)
+    max_id, has_pending = cr.fetchone()
+    if not has_pending:
+        _logger.info("All valuation layers already have a warehouse, nothing to migrate")
+        return
+    
+    state = {
+        'max_id': max_id,
+        'last_id': 0,
+        'updated': 0,
+        'started_at': None,
+        'elapsed': 0.0,
+    }
+    cr.execute("""
+        INSERT INTO ir_config_parameter (key, value, create_uid, create_date, write_uid, write_date)
+        VALUES (%s, %s, 1, now() at time zone 'UTC', 1, now() at time zone 'UTC')
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, write_date = EXCLUDED.write_date
+    """, (WAREHOUSE_MIGRATION_PARAM, json.dumps(state)))
+    _logger.info(
+        "Warehouse migration registered for valuation layers up to id %s; "
+        "it runs in the background after the upgrade", max_id
+    )
@@ -53,6 +53,13 @@ Analysis before migration:
     >>> print(f"Transit locations: {stats['transit_locations']}")
     >>> print(f"Layers needing migration: {stats['transit_missing']}")
 
+Background warehouse migration (upgrade to 17.0.1.2.7 and later):
+    The upgrade only registers pending layers; the cron job
+    "FIFO by Warehouse: Migrate Valuation Layers" fills warehouse_id in
+    committed chunks. To run the remaining chunks at once from a shell:
+    >>> from odoo.addons.stock_fifo_by_location.migrations import populate_location_id
+    >>> populate_location_id.run_warehouse_migration(env)
+
 Server Action (from UI):
     Can be created via create_migration_server_action(env) to allow
     running migration from Settings → Technical → Server Actions
@@ -249,6 +256,26 @@ def populate_location_id(env):
     }
 
 
+def run_warehouse_migration(env, chunk_size=None):
+    """
+    Run the pending warehouse migration to completion.
+    
+    Same work as the cron job (stock.fifo.migration), without time budget.
+    Every chunk is committed, so the call can be interrupted and resumed.
+    
+    Args:
+        env: Odoo environment
+        chunk_size: int - layer ids per chunk (defaults to the
+            stock_fifo_by_location.migration_chunk_size parameter)
+    """
+    Migration = env['stock.fifo.migration']
+    if not Migration._get_warehouse_migration_state():
+        print("No pending warehouse migration.")
+        return
+    Migration._run_warehouse_migration(chunk_size=chunk_size)
+    print("Warehouse migration complete.")
+
+
 def populate_location_id_by_context(env, only_missing=True):
     """
     Alternative migration that uses move context more carefully.
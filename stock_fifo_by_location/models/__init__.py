@@ -1,5 +1,6 @@
 from . import fifo_logger
 from . import fifo_base_mixin
+from . import fifo_migration
 from . import fifo_validators
 from . import fifo_concurrency
 from . import stock_valuation_layer
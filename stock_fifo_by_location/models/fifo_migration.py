@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+FIFO Data Migration Runner
+
+Fills warehouse_id on existing valuation layers after an upgrade.
+
+The upgrade itself only adds the column and registers a "pending" marker
+(see migrations/17.0.1.2.7/pre-migrate.py). The data is filled afterwards by
+a cron job in chunks of layer ids, committing after every chunk, so the work
+is spread over several short transactions and resumes where it stopped.
+Until the migration is complete, FIFO queries migrate the layers of the
+products they read on the fly.
+"""
+
+import json
+import logging
+import time
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# ir.config_parameter holding the state of a pending migration, absent when done
+WAREHOUSE_MIGRATION_PARAM = 'stock_fifo_by_location.warehouse_migration'
+DEFAULT_MIGRATION_CHUNK_SIZE = 20000
+# Seconds a single cron run keeps migrating before yielding to the next run
+DEFAULT_MIGRATION_TIME_BUDGET = 240
+
+# Same rule as StockValuationLayer.create(): incoming layers belong to the
+# destination warehouse, outgoing layers to the source warehouse when the
+# source is internal/transit, otherwise to the destination warehouse.
+MIGRATE_WAREHOUSE_QUERY = """
+    WITH resolved AS (
+        SELECT svl.id,
+               CASE
+                   WHEN svl.quantity > 0 THEN dest.warehouse_id
+                   WHEN src.usage IN ('internal', 'transit') THEN src.warehouse_id
+                   WHEN dest.usage IN ('internal', 'transit') THEN dest.warehouse_id
+               END AS warehouse_id
+          FROM stock_valuation_layer svl
+          JOIN stock_move sm ON sm.id = svl.stock_move_id
+          JOIN stock_location src ON src.id = sm.location_id
+          JOIN stock_location dest ON dest.id = sm.location_dest_id
+         WHERE svl.warehouse_id IS NULL
+           AND svl.id > %(from_id)s AND svl.id <= %(to_id)s
+           {product_clause}
+    )
+    UPDATE stock_valuation_layer svl
+       SET warehouse_id = resolved.warehouse_id
+      FROM resolved
+     WHERE svl.id = resolved.id
+       AND resolved.warehouse_id IS NOT NULL
+"""
+
+
+class StockFifoMigration(models.AbstractModel):
+    """
+    Resumable, chunked data migration for per-warehouse FIFO.
+
+    State is kept as JSON in WAREHOUSE_MIGRATION_PARAM:
+    - max_id: highest layer id that existed at upgrade time
+    - last_id: highest layer id already processed
+    - updated: number of layers filled so far
+    - started_at / elapsed: progress statistics
+    """
+
+    _name = 'stock.fifo.migration'
+    _inherit = 'fifo.base.mixin'
+    _description = 'FIFO Data Migration Runner'
+
+    @api.model
+    def _get_warehouse_migration_state(self):
+        """Return the pending migration state, or None when nothing is pending."""
+        value = self.env['ir.config_parameter'].sudo().get_param(WAREHOUSE_MIGRATION_PARAM)
+        return json.loads(value) if value else None
+
+    @api.model
+    def _set_warehouse_migration_state(self, state):
+        self.env['ir.config_parameter'].sudo().set_param(
+            WAREHOUSE_MIGRATION_PARAM, json.dumps(state) if state else False)
+
+    @api.model
+    def _register_warehouse_migration(self):
+        """Mark the layers existing now as pending, if any lacks a warehouse."""
+        self.env.cr.execute("""
+            SELECT MAX(id),
+                   EXISTS(SELECT 1 FROM stock_valuation_layer
+                           WHERE warehouse_id IS NULL AND stock_move_id IS NOT NULL)
+              FROM stock_valuation_layer
+        """)
+        max_id, has_pending = self.env.cr.fetchone()
+        if not has_pending:
+            return False
+        self._set_warehouse_migration_state({
+            'max_id': max_id,
+            'last_id': 0,
+            'updated': 0,
+            'started_at': fields.Datetime.to_string(fields.Datetime.now()),
+            'elapsed': 0.0,
+        })
+        _logger.info("Warehouse migration registered for valuation layers up to id %s", max_id)
+        return True
+
+    @api.model
+    def _migrate_warehouse_range(self, from_id, to_id, product_ids=None):
+        """Fill warehouse_id of layers with from_id < id <= to_id in SQL.
+
+        Returns the number of layers updated.
+        """
+        params = {'from_id': from_id, 'to_id': to_id}
+        product_clause = ''
+        if product_ids:
+            product_clause = 'AND svl.product_id = ANY(%(product_ids)s)'
+            params['product_ids'] = list(product_ids)
+        self.env.cr.execute(MIGRATE_WAREHOUSE_QUERY.format(product_clause=product_clause), params)
+        return self.env.cr.rowcount
+
+    @api.model
+    def _run_warehouse_migration(self, chunk_size=None, time_budget=None):
+        """Process pending layers chunk by chunk, committing after each chunk.
+
+        Stops when every registered layer is processed, or once ``time_budget``
+        seconds are spent (the next call resumes from the saved state).
+        Returns the state, or None when the migration is complete.
+        """
+        state = self._get_warehouse_migration_state()
+        if not state:
+            return None
+        chunk_size = chunk_size or self._get_config_int(
+            'stock_fifo_by_location.migration_chunk_size', DEFAULT_MIGRATION_CHUNK_SIZE)
+        if not state.get('started_at'):
+            state['started_at'] = fields.Datetime.to_string(fields.Datetime.now())
+        Layer = self.env['stock.valuation.layer']
+        Layer.flush_model(['warehouse_id'])
+
+        started = time.monotonic()
+        while state['last_id'] < state['max_id']:
+            to_id = min(state['last_id'] + chunk_size, state['max_id'])
+            chunk_started = time.monotonic()
+            state['updated'] += self._migrate_warehouse_range(state['last_id'], to_id)
+            state['last_id'] = to_id
+            state['elapsed'] += time.monotonic() - chunk_started
+            self._set_warehouse_migration_state(state)
+            self.env.cr.commit()
+            _logger.info(
+                "Warehouse migration: id %s/%s (%.1f%%), %s layers updated, %.1fs",
+                state['last_id'], state['max_id'],
+                100.0 * state['last_id'] / state['max_id'],
+                state['updated'], state['elapsed'],
+            )
+            if time_budget and time.monotonic() - started >= time_budget:
+                Layer.invalidate_model(['warehouse_id'])
+                return state
+
+        self.env.cr.execute("""
+            SELECT COUNT(*) FROM stock_valuation_layer
+             WHERE warehouse_id IS NULL AND stock_move_id IS NOT NULL AND id <= %s
+        """, [state['max_id']])
+        unresolved = self.env.cr.fetchone()[0]
+        self._set_warehouse_migration_state(None)
+        self.env.cr.commit()
+        Layer.invalidate_model(['warehouse_id'])
+        _logger.info(
+            "Warehouse migration complete: %s layers updated in %.1fs, %s layers left without warehouse",
+            state['updated'], state['elapsed'], unresolved,
+        )
+        return None
+
+    @api.model
+    def _cron_run_warehouse_migration(self):
+        """Scheduled action: advance the pending migration within the time budget."""
+        self._run_warehouse_migration(time_budget=self._get_config_int(
+            'stock_fifo_by_location.migration_time_budget', DEFAULT_MIGRATION_TIME_BUDGET))
+
+    @api.model
+    def _ensure_warehouse_migrated(self, product_ids):
+        """Migrate the pending layers of ``product_ids`` in the current transaction.
+
+        Called by FIFO queries so that layers not reached by the background
+        job yet are still found in their warehouse queue. No-op once the
+        migration is complete.
+        """
+        state = self._get_warehouse_migration_state()
+        if not state or not product_ids:
+            return 0
+        Layer = self.env['stock.valuation.layer']
+        Layer.flush_model(['warehouse_id'])
+        updated = self._migrate_warehouse_range(state['last_id'], state['max_id'], product_ids)
+        if updated:
+            Layer.invalidate_model(['warehouse_id'])
+        return updated
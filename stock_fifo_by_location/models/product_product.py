@@ -48,6 +48,9 @@ class ProductProduct(models.Model):
             # Fallback to standard behavior
             return super()._get_fifo_candidates(company)
         
+        # Layers not reached by the background warehouse migration yet
+        self.env['stock.fifo.migration']._ensure_warehouse_migrated(self.ids)
+        
         _logger.error(
             f"🔍 _get_fifo_candidates() for Product={self.display_name}, "
             f"Warehouse ID={warehouse_id}, Company={company.name}"
@@ -209,6 +209,9 @@ class StockValuationLayer(models.Model):
         # Handle both recordset and id
         wh_id = warehouse_id.id if hasattr(warehouse_id, 'id') else warehouse_id
         
+        # Layers not reached by the background warehouse migration yet
+        self.env['stock.fifo.migration']._ensure_warehouse_migrated(product_id.ids)
+        
         domain = [
             ('product_id', '=', product_id.id),
             ('warehouse_id', '=', wh_id),
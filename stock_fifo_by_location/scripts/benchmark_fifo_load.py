@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load-test and Benchmark Suite for stock_fifo_by_location
+
+Generates a synthetic catalog (N products x M warehouses x K receipt layers)
+and measures the main FIFO code paths:
+
+- stock.move._action_done (receipts, deliveries, inter-warehouse transfers)
+- stock.move._create_out_svl
+- stock.move._ensure_inter_warehouse_valuation_layers
+- fifo.service.calculate_fifo_cost_batch
+- fifo.concurrency.helper.safe_consume_fifo_layers with concurrent workers
+
+For every measured operation the suite records the number of calls, wall
+time and SQL query count. The concurrent scenario also records lock waits,
+lock timeouts and deadlocks per worker. Results are written to a JSON file
+which can be compared against a previous run to detect regressions.
+
+⚠️ Generated data is committed (workers need their own cursors).
+   Always run this script against a scratch copy of the database.
+
+Usage:
+    python3 benchmark_fifo_load.py --database=bench_db \\
+        --products=200 --warehouses=4 --layers=5 --workers=8 \\
+        --output=fifo_bench_17.0.1.2.6.json
+
+    # Compare with a previous run (exit code 1 on regression)
+    python3 benchmark_fifo_load.py --database=bench_db --compare=fifo_bench_old.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import odoo
+    from odoo import api, SUPERUSER_ID
+    from odoo.modules.registry import Registry
+    from psycopg2 import OperationalError, errorcodes
+except ImportError:
+    print("Error: Odoo not found. Run this script from Odoo environment.")
+    sys.exit(1)
+
+
+# ========== MEASUREMENT ==========
+
+class Probe:
+    """Accumulates calls, wall time and SQL queries of a measured operation."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.records = 0
+        self.wall = 0.0
+        self.queries = 0
+
+    @contextmanager
+    def measure(self, cr, records=0):
+        queries_before = cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wall += time.perf_counter() - start
+            self.queries += cr.sql_log_count - queries_before
+            self.calls += 1
+            self.records += records
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'records': self.records,
+            'wall_s': round(self.wall, 4),
+            'queries': self.queries,
+            'ms_per_record': round(self.wall * 1000 / self.records, 3) if self.records else None,
+            'queries_per_record': round(self.queries / self.records, 2) if self.records else None,
+        }
+
+
+@contextmanager
+def instrument(env, model_name, method_name, probe):
+    """Temporarily wrap a model method so each call is measured by ``probe``.
+
+    Nested methods (e.g. _create_out_svl inside _action_done) are measured
+    separately while the outer operation runs normally.
+    """
+    cls = type(env[model_name])
+    had_own = method_name in cls.__dict__
+    original = getattr(cls, method_name)
+
+    def wrapper(self, *args, **kwargs):
+        with probe.measure(self.env.cr, records=len(self)):
+            return original(self, *args, **kwargs)
+
+    setattr(cls, method_name, wrapper)
+    try:
+        yield probe
+    finally:
+        if had_own:
+            setattr(cls, method_name, original)
+        else:
+            delattr(cls, method_name)
+
+
+# ========== DATA GENERATION ==========
+
+def get_benchmark_warehouses(env, run_tag, n_warehouses):
+    """Return the benchmark warehouses, creating the missing ones.
+
+    Warehouse codes are unique per company and limited to 5 characters, so
+    the benchmark warehouses (codes B000, B001, ...) are shared by all runs
+    on a database; only the products are specific to a run.
+    """
+    codes = [f'B{i:03d}' for i in range(n_warehouses)]
+    Warehouse = env['stock.warehouse']
+    existing = {
+        warehouse.code: warehouse
+        for warehouse in Warehouse.search([('code', 'in', codes), ('company_id', '=', env.company.id)])
+    }
+    missing = [code for code in codes if code not in existing]
+    if missing:
+        created = Warehouse.create([{
+            'name': f'Benchmark {run_tag} WH{code[1:]}',
+            'code': code,
+        } for code in missing])
+        existing.update(zip(missing, created))
+    return Warehouse.concat(*(existing[code] for code in codes))
+
+
+def create_catalog(env, run_tag, n_products, n_warehouses):
+    """Create FIFO products for this run and get the benchmark warehouses."""
+    category = env['product.category'].create({
+        'name': f'FIFO Benchmark {run_tag}',
+        'property_cost_method': 'fifo',
+        'property_valuation': 'manual_periodic',
+    })
+    warehouses = get_benchmark_warehouses(env, run_tag, n_warehouses)
+    products = env['product.product'].create([{
+        'name': f'Benchmark {run_tag} Product {i}',
+        'default_code': f'{run_tag}-{i:05d}',
+        'type': 'product',
+        'categ_id': category.id,
+        'standard_price': 10.0,
+    } for i in range(n_products)])
+    return products, warehouses
+
+
+def run_moves(env, moves_vals, probe):
+    """Create, confirm and validate moves; measure only _action_done."""
+    moves = env['stock.move'].create(moves_vals)
+    moves._action_confirm()
+    moves._action_assign()
+    for move in moves:
+        move.write({'quantity': move.product_uom_qty, 'picked': True})
+    with probe.measure(env.cr, records=len(moves)):
+        moves._action_done()
+    return moves
+
+
+def move_vals(product, source, dest, qty, name, price_unit=None):
+    vals = {
+        'name': name,
+        'product_id': product.id,
+        'product_uom': product.uom_id.id,
+        'product_uom_qty': qty,
+        'location_id': source.id,
+        'location_dest_id': dest.id,
+    }
+    if price_unit is not None:
+        vals['price_unit'] = price_unit
+    return vals
+
+
+# ========== SCENARIOS ==========
+
+def scenario_receipts(env, products, warehouses, n_layers, qty, probes):
+    print("\n1. Receipts (K layers per product and warehouse)")
+    print("-" * 50)
+    supplier = env.ref('stock.stock_location_suppliers')
+    for layer_index in range(n_layers):
+        vals = [
+            move_vals(product, supplier, warehouse.lot_stock_id, qty,
+                      f'BENCH IN {layer_index}', price_unit=10.0 + layer_index)
+            for product in products for warehouse in warehouses
+        ]
+        run_moves(env, vals, probes['action_done_receipt'])
+    print(f"  {probes['action_done_receipt'].as_dict()}")
+
+
+def scenario_deliveries(env, products, warehouses, qty, probes):
+    print("\n2. Deliveries (_action_done / _create_out_svl)")
+    print("-" * 50)
+    customer = env.ref('stock.stock_location_customers')
+    vals = [
+        move_vals(product, warehouse.lot_stock_id, customer, qty, 'BENCH OUT')
+        for product in products for warehouse in warehouses
+    ]
+    with instrument(env, 'stock.move', '_create_out_svl', probes['create_out_svl']):
+        run_moves(env, vals, probes['action_done_delivery'])
+    print(f"  _action_done:   {probes['action_done_delivery'].as_dict()}")
+    print(f"  _create_out_svl: {probes['create_out_svl'].as_dict()}")
+
+
+def scenario_transfers(env, products, warehouses, qty, probes):
+    print("\n3. Inter-warehouse transfers")
+    print("-" * 50)
+    if len(warehouses) < 2:
+        print("  Skipped: needs at least 2 warehouses")
+        return
+    vals = [
+        move_vals(product, warehouses[i].lot_stock_id,
+                  warehouses[(i + 1) % len(warehouses)].lot_stock_id, qty, 'BENCH TRANSFER')
+        for product in products for i in range(len(warehouses))
+    ]
+    with instrument(env, 'stock.move', '_ensure_inter_warehouse_valuation_layers',
+                    probes['ensure_inter_warehouse_layers']):
+        run_moves(env, vals, probes['action_done_transfer'])
+    print(f"  _action_done: {probes['action_done_transfer'].as_dict()}")
+    print(f"  _ensure_inter_warehouse_valuation_layers: "
+          f"{probes['ensure_inter_warehouse_layers'].as_dict()}")
+
+
+def scenario_batch_cost(env, products, warehouses, qty, probes, iterations):
+    print("\n4. calculate_fifo_cost_batch")
+    print("-" * 50)
+    batch_input = [(product.id, warehouse.id, qty) for product in products for warehouse in warehouses]
+    fifo_service = env['fifo.service']
+    for _ in range(iterations):
+        env.invalidate_all()
+        with probes['calculate_fifo_cost_batch'].measure(env.cr, records=len(batch_input)):
+            fifo_service.calculate_fifo_cost_batch(batch_input)
+    print(f"  {probes['calculate_fifo_cost_batch'].as_dict()}")
+
+
+def scenario_concurrency(db_name, product_ids, warehouse_id, company_id, n_workers,
+                         iterations, qty, hot_ratio):
+    """Run safe_consume_fifo_layers from several workers with their own cursors.
+
+    A share of the operations (``hot_ratio``) hits the same product so workers
+    contend on the same FIFO queue; the rest is spread over the catalog.
+    """
+    print(f"\n5. Concurrent consumption ({n_workers} workers x {iterations} ops)")
+    print("-" * 50)
+    registry = Registry(db_name)
+    barrier = threading.Barrier(n_workers)
+    worker_stats = []
+    stats_lock = threading.Lock()
+
+    def worker(worker_index):
+        rng = random.Random(worker_index)
+        stats = {
+            'worker': worker_index,
+            'ops': 0,
+            'wall_s': 0.0,
+            'lock_wait_s': 0.0,
+            'max_lock_wait_s': 0.0,
+            'queries': 0,
+            'lock_timeouts': 0,
+            'deadlocks': 0,
+            'errors': 0,
+        }
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            helper = env['fifo.concurrency.helper']
+            barrier.wait()
+            for _ in range(iterations):
+                product_id = product_ids[0] if rng.random() < hot_ratio else rng.choice(product_ids)
+                queries_before = cr.sql_log_count
+                start = time.perf_counter()
+                try:
+                    layers = env['fifo.service'].get_valuation_layer_queue(
+                        env['product.product'].browse(product_id),
+                        env['stock.warehouse'].browse(warehouse_id), company_id)
+                    if layers:
+                        # Take the locks first so the wait can be measured on its own;
+                        # safe_consume_fifo_layers re-locks the same rows without waiting.
+                        lock_start = time.perf_counter()
+                        cr.execute("""
+                            SELECT id FROM stock_valuation_layer
+                             WHERE id IN %s ORDER BY create_date ASC, id ASC
+                               FOR UPDATE
+                        """, (tuple(layers.ids),))
+                        lock_wait = time.perf_counter() - lock_start
+                        stats['lock_wait_s'] += lock_wait
+                        stats['max_lock_wait_s'] = max(stats['max_lock_wait_s'], lock_wait)
+                        env.invalidate_all()
+                        helper.safe_consume_fifo_layers(layers, qty)
+                    cr.commit()
+                    stats['ops'] += 1
+                except OperationalError as e:
+                    cr.rollback()
+                    if e.pgcode == errorcodes.LOCK_NOT_AVAILABLE:
+                        stats['lock_timeouts'] += 1
+                    elif e.pgcode in (errorcodes.DEADLOCK_DETECTED, errorcodes.SERIALIZATION_FAILURE):
+                        stats['deadlocks'] += 1
+                    else:
+                        stats['errors'] += 1
+                except Exception:
+                    cr.rollback()
+                    stats['errors'] += 1
+                finally:
+                    stats['wall_s'] += time.perf_counter() - start
+                    stats['queries'] += cr.sql_log_count - queries_before
+        with stats_lock:
+            worker_stats.append(stats)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total_ops = sum(s['ops'] for s in worker_stats)
+    summary = {
+        'workers': n_workers,
+        'iterations_per_worker': iterations,
+        'hot_ratio': hot_ratio,
+        'elapsed_s': round(elapsed, 4),
+        'ops': total_ops,
+        'ops_per_s': round(total_ops / elapsed, 2) if elapsed else None,
+        'lock_wait_s': round(sum(s['lock_wait_s'] for s in worker_stats), 4),
+        'max_lock_wait_s': round(max((s['max_lock_wait_s'] for s in worker_stats), default=0.0), 4),
+        'queries': sum(s['queries'] for s in worker_stats),
+        'lock_timeouts': sum(s['lock_timeouts'] for s in worker_stats),
+        'deadlocks': sum(s['deadlocks'] for s in worker_stats),
+        'errors': sum(s['errors'] for s in worker_stats),
+        'per_worker': sorted(worker_stats, key=lambda s: s['worker']),
+    }
+    for key in ('elapsed_s', 'ops', 'ops_per_s', 'lock_wait_s', 'max_lock_wait_s',
+                'lock_timeouts', 'deadlocks', 'errors'):
+        print(f"  {key}: {summary[key]}")
+    return summary
+
+
+# ========== REPORTING ==========
+
+def get_metadata(env, args, run_tag):
+    env.cr.execute("SHOW server_version")
+    pg_version = env.cr.fetchone()[0]
+    module = env['ir.module.module'].search([('name', '=', 'stock_fifo_by_location')], limit=1)
+    return {
+        'run_tag': run_tag,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'module_version': module.latest_version,
+        'odoo_version': odoo.release.version,
+        'postgresql_version': pg_version,
+        'python_version': platform.python_version(),
+        'host': platform.node(),
+        'params': {
+            'products': args.products,
+            'warehouses': args.warehouses,
+            'layers': args.layers,
+            'workers': args.workers,
+            'worker_iterations': args.worker_iterations,
+            'hot_ratio': args.hot_ratio,
+            'seed': args.seed,
+        },
+    }
+
+
+def compare_results(current, baseline, threshold):
+    """Print relative changes against a previous run; return True on regression."""
+    print("\n" + "=" * 70)
+    print(f"Comparison with {baseline['meta'].get('module_version')} "
+          f"({baseline['meta'].get('run_tag')})")
+    print("=" * 70)
+    if baseline['meta'].get('params') != current['meta'].get('params'):
+        print("  ⚠️  Parameters differ, figures are not directly comparable")
+    regression = False
+    for name, metrics in current['operations'].items():
+        old = baseline.get('operations', {}).get(name)
+        if not old:
+            continue
+        for key in ('wall_s', 'queries'):
+            if not old.get(key):
+                continue
+            change = (metrics[key] - old[key]) / old[key]
+            flag = ''
+            if change > threshold:
+                flag = '  ❌ regression'
+                regression = True
+            print(f"  {name}.{key}: {old[key]} -> {metrics[key]} ({change:+.1%}){flag}")
+    old_conc = baseline.get('concurrency')
+    new_conc = current.get('concurrency')
+    if old_conc and new_conc and old_conc.get('ops_per_s'):
+        change = (new_conc['ops_per_s'] - old_conc['ops_per_s']) / old_conc['ops_per_s']
+        flag = ''
+        if change < -threshold:
+            flag = '  ❌ regression'
+            regression = True
+        print(f"  concurrency.ops_per_s: {old_conc['ops_per_s']} -> {new_conc['ops_per_s']} "
+              f"({change:+.1%}){flag}")
+    return regression
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test stock_fifo_by_location on synthetic data')
+    parser.add_argument('--database', required=True, help='Scratch database name')
+    parser.add_argument('--products', type=int, default=100, help='Number of products (N)')
+    parser.add_argument('--warehouses', type=int, default=3, help='Number of warehouses (M)')
+    parser.add_argument('--layers', type=int, default=5, help='Receipt layers per product and warehouse (K)')
+    parser.add_argument('--qty', type=float, default=10.0, help='Quantity per receipt layer')
+    parser.add_argument('--batch-iterations', type=int, default=5, help='Repetitions of the batch cost call')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent workers (0 = skip)')
+    parser.add_argument('--worker-iterations', type=int, default=50, help='Operations per worker')
+    parser.add_argument('--hot-ratio', type=float, default=0.5,
+                        help='Share of worker operations hitting the same product')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', help='JSON artifact path (default: fifo_bench_<run_tag>.json)')
+    parser.add_argument('--compare', help='Previous JSON artifact to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative change considered a regression (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    odoo.tools.config.parse_config(['--database', args.database])
+    run_tag = 'BM' + datetime.now().strftime('%y%m%d%H%M%S')
+
+    print("=" * 70)
+    print("Load Test - stock_fifo_by_location")
+    print("=" * 70)
+    print(f"Database: {args.database}  Run: {run_tag}")
+    print(f"Catalog: {args.products} products x {args.warehouses} warehouses x {args.layers} layers")
+    print("=" * 70)
+
+    probes = {name: Probe(name) for name in (
+        'action_done_receipt',
+        'action_done_delivery',
+        'create_out_svl',
+        'action_done_transfer',
+        'ensure_inter_warehouse_layers',
+        'calculate_fifo_cost_batch',
+    )}
+
+    registry = Registry(args.database)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        meta = get_metadata(env, args, run_tag)
+        products, warehouses = create_catalog(env, run_tag, args.products, args.warehouses)
+        cr.commit()
+
+        scenario_receipts(env, products, warehouses, args.layers, args.qty, probes)
+        cr.commit()
+        scenario_deliveries(env, products, warehouses, args.qty / 2, probes)
+        cr.commit()
+        scenario_transfers(env, products, warehouses, args.qty / 2, probes)
+        cr.commit()
+        scenario_batch_cost(env, products, warehouses, args.qty * 2, probes, args.batch_iterations)
+        product_ids = products.ids
+        warehouse_id = warehouses[0].id
+        company_id = env.company.id
+
+    concurrency = None
+    if args.workers:
+        concurrency = scenario_concurrency(
+            args.database, product_ids, warehouse_id, company_id, args.workers,
+            args.worker_iterations, args.qty / 10, args.hot_ratio)
+
+    result = {
+        'meta': meta,
+        'operations': {name: probe.as_dict() for name, probe in probes.items()},
+        'concurrency': concurrency,
+    }
+    output = args.output or f'fifo_bench_{run_tag}.json'
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\n📄 Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare_results(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1352,3 +1352,42 @@ class TestLandedCostByLocation(TransactionCase):
             msg=f"Final value should be 0 after full return (got {total_value})"
         )
 
+    
+    def test_pending_warehouse_migration_fallback(self):
+        """
+        Test that FIFO queries still find layers not migrated yet.
+        
+        Scenario:
+        - Receive 10 units in a warehouse stock location
+        - Clear warehouse_id in SQL and register the pending migration
+        - Query the warehouse FIFO queue -> the layer is migrated on the fly
+        """
+        warehouse = self.env['stock.warehouse'].search([
+            ('company_id', '=', self.company.id),
+        ], limit=1)
+        move = self.move_model.create({
+            'name': 'Receipt before migration',
+            'product_id': self.product.id,
+            'product_uom_qty': 10.0,
+            'product_uom': self.product.uom_id.id,
+            'price_unit': 100.0,
+            'location_id': self.supplier_location.id,
+            'location_dest_id': warehouse.lot_stock_id.id,
+        })
+        move._action_confirm()
+        move.quantity = 10.0
+        move.picked = True
+        move._action_done()
+        layer = self.valuation_layer_model.search([('stock_move_id', '=', move.id)])
+        self.assertEqual(layer.warehouse_id, warehouse)
+        
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE stock_valuation_layer SET warehouse_id = NULL WHERE id = %s", [layer.id])
+        layer.invalidate_recordset(['warehouse_id'])
+        migration = self.env['stock.fifo.migration']
+        self.assertTrue(migration._register_warehouse_migration())
+        
+        queue = self.valuation_layer_model._get_fifo_queue(self.product, warehouse, self.company.id)
+        self.assertIn(layer, queue)
+        self.assertEqual(layer.warehouse_id, warehouse)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'FIFO Recalculation by Warehouse',
-    'version': '17.0.3.1.0',
+    'version': '17.0.3.2.1',
     'category': 'Inventory/Stock',
     'author': 'APC Ball',
     'website': 'https://github.com/apcball/apcball',
@@ -35,6 +35,9 @@ This module provides a wizard for recalculating FIFO valuation layers on a per-w
 - Creates proper stock.valuation.layer.usage records for audit trail
 - Handles transit locations properly
 - Comprehensive backup of ALL product layers (including products without moves in date range)
+- Optional parallel mode: product-warehouse groups are replayed by worker jobs,
+  each with its own cursor, committing group by group
+- Backups are copied with a single INSERT ... SELECT
 
 Features:
 - Select date range for recalculation
@@ -47,6 +47,16 @@ class FifoRecalculationBackup(models.Model):
         string='Restore Date',
         readonly=True
     )
+    failed_group_count = fields.Integer(
+        string='Failed Combinations',
+        readonly=True,
+        help='Product-warehouse combinations whose recalculation failed and kept their old layers'
+    )
+    recalc_summary = fields.Text(
+        string='Recalculation Summary',
+        readonly=True,
+        help='JSON summary of the recalculation run: counts and failed combinations'
+    )
 
     @api.depends('create_date', 'company_id')
     def _compute_name(self):
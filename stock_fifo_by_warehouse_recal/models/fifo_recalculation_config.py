@@ -59,6 +59,11 @@ class FifoRecalculationConfig(models.Model):
         string='Batch Size',
         default=100
     )
+    parallel_workers = fields.Integer(
+        string='Parallel Jobs',
+        default=1,
+        help='Number of worker jobs replaying product-warehouse groups in parallel'
+    )
     auto_apply = fields.Boolean(
         string='Auto Apply',
         default=False,
@@ -3,15 +3,53 @@
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import io
 import base64
 import json
+import logging
 try:
     import xlsxwriter
 except ImportError:
     xlsxwriter = None
 
+_logger = logging.getLogger(__name__)
+
+# 1 keeps the sequential single-transaction replay
+DEFAULT_PARALLEL_WORKERS = 1
+# Every worker job holds its own database connection
+MAX_PARALLEL_WORKERS = 8
+
+# Copies the layers of the affected (product, warehouse) combinations into
+# backup lines in one statement. A warehouse id of 0 means all warehouses.
+BACKUP_LAYERS_QUERY = """
+    INSERT INTO fifo_recalculation_backup_line (
+        backup_id, layer_id, product_id, warehouse_id, quantity, unit_cost,
+        value, remaining_qty, remaining_value, stock_move_id, description,
+        layer_data, create_uid, create_date, write_uid, write_date
+    )
+    SELECT %(backup_id)s, svl.id, svl.product_id, svl.warehouse_id,
+           COALESCE(svl.quantity, 0), COALESCE(svl.unit_cost, 0),
+           COALESCE(svl.value, 0), COALESCE(svl.remaining_qty, 0),
+           COALESCE(svl.remaining_value, 0), svl.stock_move_id,
+           COALESCE(svl.description, ''),
+           json_build_object('create_date', svl.create_date,
+                             'write_date', svl.write_date)::text,
+           %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+      FROM stock_valuation_layer svl
+     WHERE svl.company_id = %(company_id)s
+       AND svl.locked IS NOT TRUE
+       AND EXISTS (
+           SELECT 1
+             FROM unnest(%(product_ids)s::int[], %(warehouse_ids)s::int[])
+                  AS combo(product_id, warehouse_id)
+            WHERE combo.product_id = svl.product_id
+              AND (combo.warehouse_id = 0 OR combo.warehouse_id = svl.warehouse_id)
+       )
+       {date_clause}
+"""
+
 
 class FifoRecalculationWizard(models.TransientModel):
     """
@@ -74,6 +112,13 @@ class FifoRecalculationWizard(models.TransientModel):
              'Smaller batches use less memory but take longer. '
              'Recommended: 50-200 for large datasets.'
     )
+    parallel_workers = fields.Integer(
+        string='Parallel Jobs',
+        default=DEFAULT_PARALLEL_WORKERS,
+        help='Number of worker jobs replaying product-warehouse groups in parallel. '
+             'With more than 1, each group is rebuilt and committed in its own '
+             'transaction: a failing group is left untouched and reported in the log.'
+    )
     progress_percent = fields.Float(
         string='Progress (%)',
         readonly=True,
@@ -88,6 +133,7 @@ class FifoRecalculationWizard(models.TransientModel):
         ('preview', 'Preview'),
         ('processing', 'Processing'),
         ('done', 'Done'),
+        ('done_with_errors', 'Done with Errors'),
     ], default='draft', string='State')
     log_text = fields.Text(
         string='Log',
@@ -125,7 +171,7 @@ class FifoRecalculationWizard(models.TransientModel):
         for record in self:
             record.can_rollback = bool(
                 record.backup_id and 
-                record.state == 'done' and
+                record.state in ('done', 'done_with_errors') and
                 record.backup_id.state == 'active'
             )
 
@@ -165,6 +211,14 @@ class FifoRecalculationWizard(models.TransientModel):
                     'Large batch sizes may cause memory issues.'
                 ))
 
+    @api.constrains('parallel_workers')
+    def _check_parallel_workers(self):
+        for record in self:
+            if not 1 <= record.parallel_workers <= MAX_PARALLEL_WORKERS:
+                raise UserError(_(
+                    'Parallel Jobs must be between 1 and %d.'
+                ) % MAX_PARALLEL_WORKERS)
+
     def action_preview(self):
         """
         Generate preview of FIFO recalculation impact.
@@ -674,6 +728,7 @@ class FifoRecalculationWizard(models.TransientModel):
         
         log.append(f"=== Processing ===")
         log.append(f"Batch Size: {self.batch_size}")
+        log.append(f"Parallel Jobs: {self.parallel_workers}")
         log.append("")
         
         # Get affected product-warehouse combinations
@@ -706,14 +761,92 @@ class FifoRecalculationWizard(models.TransientModel):
         moves = self.env['stock.move'].search(move_domain, order='date, id')
         groups = self._group_moves_by_product_warehouse(moves)
         
-        # Process in batches
+        if self.parallel_workers > 1:
+            deleted_count, created_count, failed_groups = self._apply_in_parallel_jobs(
+                affected_combinations, groups, log)
+        else:
+            deleted_count, created_count = self._apply_in_batches(affected_combinations, groups, log)
+            failed_groups = []
+        
+        log.append(f"=== Total Summary ===")
+        log.append(f"Total combinations processed: {total_combinations}")
+        log.append(f"Total deleted layers: {deleted_count}")
+        log.append(f"Total created layers: {created_count}")
+        if failed_groups:
+            log.append(f"Failed combinations (left unchanged): {len(failed_groups)}")
+            for product_id, warehouse_id, error in failed_groups:
+                log.append(f"  Product {product_id} @ warehouse {warehouse_id or 'N/A'}: {error}")
+        log.append(f"Completed at: {datetime.now()}")
+        log.append("")
+        
+        # Keep the run outcome with the backup for rollback decisions
+        if backup:
+            backup.write({
+                'failed_group_count': len(failed_groups),
+                'recalc_summary': json.dumps({
+                    'parallel_workers': self.parallel_workers,
+                    'combinations': total_combinations,
+                    'deleted': deleted_count,
+                    'created': created_count,
+                    'failed_groups': failed_groups,
+                }),
+            })
+        
+        # Update state to done
+        progress_message = f'Processed {total_combinations} combinations, deleted {deleted_count} layers, created {created_count} layers'
+        if failed_groups:
+            progress_message = f'Completed with errors! {progress_message}, {len(failed_groups)} combinations failed (see log)'
+        else:
+            progress_message = f'Completed! {progress_message}'
+        self.write({
+            'state': 'done_with_errors' if failed_groups else 'done',
+            'progress_percent': 100.0,
+            'progress_message': progress_message,
+            'log_text': self.log_text + '\n\n' + '\n'.join(log)
+        })
+        
+        if failed_groups:
+            notification_message = _(
+                'FIFO recalculation completed with errors!\n\n'
+                'Combinations: %d\n'
+                'Deleted: %d layers\n'
+                'Created: %d layers\n'
+                'Failed: %d combinations (left unchanged, see log)'
+            ) % (total_combinations, deleted_count, created_count, len(failed_groups))
+        else:
+            notification_message = _(
+                'FIFO recalculation completed successfully!\n\n'
+                'Combinations: %d\n'
+                'Deleted: %d layers\n'
+                'Created: %d layers'
+            ) % (total_combinations, deleted_count, created_count)
+        
+        # Return action to reload wizard with results
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {
+                'default_show_notification': True,
+                'notification_message': notification_message,
+            }
+        }
+
+    def _apply_in_batches(self, combinations, groups, log):
+        """
+        Delete and recreate layers batch by batch in the current transaction.
+        Returns (deleted_count, created_count).
+        """
+        total_combinations = len(combinations)
         deleted_count = 0
         created_count = 0
         
         # Split combinations into batches
         for batch_num in range(0, total_combinations, self.batch_size):
             batch_end = min(batch_num + self.batch_size, total_combinations)
-            batch_combinations = affected_combinations[batch_num:batch_end]
+            batch_combinations = combinations[batch_num:batch_end]
             
             # Update progress
             batch_number = batch_num // self.batch_size + 1
@@ -745,38 +878,150 @@ class FifoRecalculationWizard(models.TransientModel):
             log.append(f"  Batch deleted: {batch_deleted} layers, created: {batch_created} layers")
             log.append("")
         
-        log.append(f"=== Total Summary ===")
-        log.append(f"Total combinations processed: {total_combinations}")
-        log.append(f"Total deleted layers: {deleted_count}")
-        log.append(f"Total created layers: {created_count}")
-        log.append(f"Completed at: {datetime.now()}")
+        return deleted_count, created_count
+
+    def _apply_in_parallel_jobs(self, combinations, groups, log):
+        """
+        Replay product-warehouse groups in parallel worker jobs.
+        Each job runs with its own cursor and commits group by group.
+        Job results are collected even when the pool is interrupted; groups
+        a job did not report are returned as failed.
+        Returns (deleted_count, created_count, failed_groups).
+        """
+        jobs = self._split_groups_into_jobs(combinations, groups)
+        log.append(f"Running {len(jobs)} parallel jobs")
         log.append("")
+        if not jobs:
+            return 0, 0, []
+        
+        # Workers read the wizard and the layers from their own transactions
+        self.env.cr.commit()
+        # Workers fill their own result dict as they go, so partial results survive
+        results = [self._new_job_result() for _job in jobs]
+        interrupted = False
+        try:
+            with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+                futures = [
+                    executor.submit(self._run_recalculation_job, job_groups, result)
+                    for job_groups, result in zip(jobs, results)
+                ]
+                for future in futures:
+                    future.result()
+        except Exception as e:
+            _logger.exception("FIFO recalculation: parallel jobs interrupted")
+            log.append(f"ERROR: Parallel jobs interrupted: {e}")
+            log.append("")
+            interrupted = str(e)
+        finally:
+            # Layers were changed by the worker transactions
+            self.env.invalidate_all(flush=False)
         
-        # Update state to done
-        self.write({
-            'state': 'done',
-            'progress_percent': 100.0,
-            'progress_message': f'Completed! Processed {total_combinations} combinations, deleted {deleted_count} layers, created {created_count} layers',
-            'log_text': self.log_text + '\n\n' + '\n'.join(log)
-        })
-        
-        # Return action to reload wizard with results
-        return {
-            'type': 'ir.actions.act_window',
-            'res_model': self._name,
-            'res_id': self.id,
-            'view_mode': 'form',
-            'target': 'new',
-            'context': {
-                'default_show_notification': True,
-                'notification_message': _(
-                    'FIFO recalculation completed successfully!\n\n'
-                    'Combinations: %d\n'
-                    'Deleted: %d layers\n'
-                    'Created: %d layers'
-                ) % (total_combinations, deleted_count, created_count),
+        deleted_count = 0
+        created_count = 0
+        failed_groups = []
+        for job_number, (job_groups, result) in enumerate(zip(jobs, results), 1):
+            reported = set(result['done']) | {
+                (product_id, warehouse_id) for product_id, warehouse_id, error in result['failed']
             }
-        }
+            for product_id, warehouse_id in job_groups:
+                if (product_id, warehouse_id) not in reported:
+                    result['failed'].append([
+                        product_id, warehouse_id,
+                        f"Not processed: {interrupted or 'job did not finish'}",
+                    ])
+            log.append(f"--- Job {job_number}/{len(jobs)}: {len(job_groups)} combinations ---")
+            log.extend(result['log'])
+            log.append(
+                f"  Job deleted: {result['deleted']} layers, created: {result['created']} layers, "
+                f"failed: {len(result['failed'])} combinations"
+            )
+            log.append("")
+            deleted_count += result['deleted']
+            created_count += result['created']
+            failed_groups.extend(result['failed'])
+        
+        return deleted_count, created_count, failed_groups
+
+    def _split_groups_into_jobs(self, combinations, groups):
+        """
+        Distribute combinations over at most parallel_workers jobs.
+        All warehouses of a product go to the same job, so two jobs never
+        rebuild layers of the same product. Products with the most moves are
+        placed first, each on the least loaded job.
+        Returns list of dicts {(product_id, warehouse_id): [move ids]}.
+        """
+        combinations_by_product = defaultdict(list)
+        for key in combinations:
+            combinations_by_product[key[0]].append(key)
+        
+        job_count = min(self.parallel_workers, len(combinations_by_product))
+        jobs = [{} for _ in range(job_count)]
+        loads = [0] * job_count
+        product_keys = sorted(
+            combinations_by_product.values(),
+            key=lambda keys: sum(len(groups.get(key, [])) for key in keys),
+            reverse=True,
+        )
+        for keys in product_keys:
+            job_index = loads.index(min(loads))
+            for key in keys:
+                move_ids = [move.id for move in groups.get(key, [])]
+                jobs[job_index][key] = move_ids
+                loads[job_index] += len(move_ids) + 1
+        return jobs
+
+    @api.model
+    def _new_job_result(self):
+        return {'log': [], 'deleted': 0, 'created': 0, 'done': [], 'failed': []}
+
+    def _run_recalculation_job(self, job_groups, result=None):
+        """
+        Delete and recreate the layers of one worker job with its own cursor.
+        Every group is committed on its own, so a failing group only rolls
+        back its own changes and keeps its old layers. If the job itself
+        fails (no cursor, broken connection), its remaining groups are
+        reported as failed.
+        Fills and returns ``result``: the job log, deleted/created counts,
+        and the done and failed groups.
+        """
+        if result is None:
+            result = self._new_job_result()
+        pending = list(job_groups)
+        try:
+            with self.pool.cursor() as cr:
+                wizard = self.with_env(self.env(cr=cr))
+                for (product_id, warehouse_id), move_ids in job_groups.items():
+                    group_log = []
+                    try:
+                        deleted = wizard._delete_old_layers([(product_id, warehouse_id)], group_log)
+                        created = 0
+                        if move_ids:
+                            moves = wizard.env['stock.move'].browse(move_ids)
+                            created = wizard._recreate_layers_for_groups(
+                                {(product_id, warehouse_id): moves}, group_log)
+                        cr.commit()
+                    except Exception as e:
+                        cr.rollback()
+                        _logger.exception(
+                            "FIFO recalculation failed for product %s, warehouse %s",
+                            product_id, warehouse_id,
+                        )
+                        result['log'].append(
+                            f"  FAILED product {product_id} @ warehouse {warehouse_id or 'N/A'}: {e}")
+                        result['failed'].append([product_id, warehouse_id, str(e)])
+                        pending.remove((product_id, warehouse_id))
+                        continue
+                    result['log'].extend(group_log)
+                    result['deleted'] += deleted
+                    result['created'] += created
+                    result['done'].append((product_id, warehouse_id))
+                    pending.remove((product_id, warehouse_id))
+        except Exception as e:
+            _logger.exception("FIFO recalculation job aborted")
+            result['log'].append(f"  JOB ABORTED: {e}")
+            for product_id, warehouse_id in pending:
+                result['failed'].append([product_id, warehouse_id, str(e)])
+        return result
 
     def _delete_old_layers(self, affected_combinations, log):
         """
@@ -1020,160 +1265,46 @@ class FifoRecalculationWizard(models.TransientModel):
                     # No warehouse filter - backup all warehouses for this product
                     affected_combinations.add((product.id, False))
         
-        # Collect all layers that will be affected
-        # Even if we're not deleting, we need to backup because remaining_qty/value will change
-        all_layers_to_backup = self.env['stock.valuation.layer']
-        
-        for product_id, warehouse_id in affected_combinations:
-            layer_domain = [
-                ('product_id', '=', product_id),
-                ('company_id', '=', self.company_id.id),
-                '|',
-                ('locked', '=', False),
-                ('locked', '=', None),
-            ]
-            
-            if warehouse_id:
-                layer_domain.append(('warehouse_id', '=', warehouse_id))
-            
-            # Backup layers based on deletion strategy
-            if self.clear_old_layers == 'range':
-                # Backup only layers in date range that will be deleted
-                layer_domain.extend([
-                    ('create_date', '>=', self.date_from),
-                    ('create_date', '<=', self.date_to),
-                ])
-            elif self.clear_old_layers == 'all_product':
-                # Backup all layers for this product-warehouse (will all be deleted)
-                pass  # No additional filter needed
-            elif self.clear_old_layers == 'none':
-                # Even if not deleting, backup existing layers because remaining values will change
-                # Backup all existing layers for accurate rollback
-                pass  # No additional filter needed
-            
-            layers = self.env['stock.valuation.layer'].search(layer_domain)
-            all_layers_to_backup |= layers
-        
-        layers_to_backup = all_layers_to_backup
-        
-        # Log what we're backing up
-        import logging
-        _logger = logging.getLogger(__name__)
-        _logger.info(f"Backup: Found {len(affected_combinations)} product-warehouse combinations")
-        _logger.info(f"Backup: Total layers to backup: {len(layers_to_backup)}")
-        
-        # Group layers by product for logging
-        product_layer_count = {}
-        for layer in layers_to_backup:
-            product_name = layer.product_id.display_name
-            if product_name not in product_layer_count:
-                product_layer_count[product_name] = 0
-            product_layer_count[product_name] += 1
-        
-        for product_name, count in sorted(product_layer_count.items()):
-            _logger.info(f"Backup:   {product_name}: {count} layers")
+        # Even if we're not deleting, we need to backup because remaining_qty/value will change.
+        # 'range' only backs up the layers in the date range (those will be deleted),
+        # 'all_product' and 'none' back up all unlocked layers of the combination.
+        _logger.info("Backup: Found %s product-warehouse combinations", len(affected_combinations))
         
         # Create backup record (even if no layers to backup, for audit trail)
-        backup_vals = {
+        backup = self.env['fifo.recalculation.backup'].create({
             'date_from': self.date_from,
             'date_to': self.date_to,
             'company_id': self.company_id.id,
-            'layer_count': len(layers_to_backup),
-        }
-        backup = self.env['fifo.recalculation.backup'].create(backup_vals)
+        })
         
-        # Log backup creation
-        if not layers_to_backup:
+        combinations = list(affected_combinations)
+        params = {
+            'backup_id': backup.id,
+            'uid': self.env.uid,
+            'company_id': self.company_id.id,
+            'product_ids': [product_id for product_id, warehouse_id in combinations],
+            'warehouse_ids': [warehouse_id or 0 for product_id, warehouse_id in combinations],
+        }
+        date_clause = ''
+        if self.clear_old_layers == 'range':
+            date_clause = 'AND svl.create_date >= %(date_from)s AND svl.create_date <= %(date_to)s'
+            params.update(date_from=self.date_from, date_to=self.date_to)
+        
+        self.env['stock.valuation.layer'].flush_model()
+        self.env.cr.execute(BACKUP_LAYERS_QUERY.format(date_clause=date_clause), params)
+        backup_line_count = self.env.cr.rowcount
+        self.env['fifo.recalculation.backup.line'].invalidate_model()
+        backup.invalidate_recordset(['line_ids'])
+        backup.write({'layer_count': backup_line_count})
+        
+        if not backup_line_count:
             # No layers to backup (might be clear_old_layers='none')
             _logger.warning("No layers found to backup!")
-            return backup
-        
-        _logger.info(f"Starting to create {len(layers_to_backup)} backup lines...")
-        
-        # Backup layer data - use batch creation for better performance
-        backup_line_count = 0
-        failed_layers = []
-        backup_lines_vals = []
-        
-        for layer in layers_to_backup:
-            try:
-                line_vals = {
-                    'backup_id': backup.id,
-                    'layer_id': layer.id,
-                    'product_id': layer.product_id.id,
-                    'warehouse_id': layer.warehouse_id.id if layer.warehouse_id else False,
-                    'quantity': layer.quantity or 0.0,
-                    'unit_cost': layer.unit_cost or 0.0,
-                    'value': layer.value or 0.0,
-                    'remaining_qty': layer.remaining_qty or 0.0,
-                    'remaining_value': layer.remaining_value or 0.0,
-                    'stock_move_id': layer.stock_move_id.id if layer.stock_move_id else False,
-                    'description': layer.description or '',
-                    'layer_data': json.dumps({
-                        'create_date': layer.create_date.isoformat() if layer.create_date else None,
-                        'write_date': layer.write_date.isoformat() if layer.write_date else None,
-                    }),
-                }
-                backup_lines_vals.append(line_vals)
-            except Exception as e:
-                # Log error but continue with other layers
-                _logger.error(f"Failed to prepare backup for layer {layer.id} (Product: {layer.product_id.display_name}): {str(e)}")
-                import traceback
-                _logger.error(traceback.format_exc())
-                failed_layers.append({
-                    'layer_id': layer.id,
-                    'product': layer.product_id.display_name,
-                    'error': str(e)
-                })
-                continue
-        
-        # Create all backup lines in batch
-        try:
-            if backup_lines_vals:
-                _logger.info(f"Creating {len(backup_lines_vals)} backup lines in batch...")
-                created_lines = self.env['fifo.recalculation.backup.line'].create(backup_lines_vals)
-                backup_line_count = len(created_lines)
-                _logger.info(f"Successfully created {backup_line_count} backup lines")
-        except Exception as e:
-            _logger.error(f"CRITICAL: Failed to create backup lines in batch: {str(e)}")
-            import traceback
-            _logger.error(traceback.format_exc())
-            
-            # Fallback: Try creating one by one
-            _logger.info("Attempting to create backup lines one by one...")
-            for line_vals in backup_lines_vals:
-                try:
-                    self.env['fifo.recalculation.backup.line'].create(line_vals)
-                    backup_line_count += 1
-                except Exception as e2:
-                    layer_id = line_vals.get('layer_id', 'unknown')
-                    _logger.error(f"Failed to create backup line for layer {layer_id}: {str(e2)}")
-                    failed_layers.append({
-                        'layer_id': layer_id,
-                        'error': str(e2)
-                    })
-        
-        # Update backup with actual line count
-        if backup_line_count != backup.layer_count:
-            backup.write({'layer_count': backup_line_count})
         
         # CRITICAL: Commit backup and lines to database immediately
         # This ensures backup is persisted even if wizard transaction is rolled back
-        try:
-            self.env.cr.commit()
-            _logger.info(f"Backup committed to database: {backup.name} with {backup_line_count} lines")
-        except Exception as e:
-            _logger.error(f"Failed to commit backup: {str(e)}")
-            import traceback
-            _logger.error(traceback.format_exc())
-        
-        # Log failed layers if any
-        if failed_layers:
-            import logging
-            _logger = logging.getLogger(__name__)
-            _logger.warning(f"Failed to backup {len(failed_layers)} layers out of {len(layers_to_backup)}")
-            for failed in failed_layers[:10]:  # Log first 10 failures
-                _logger.warning(f"  Layer {failed['layer_id']} ({failed['product']}): {failed['error']}")
+        self.env.cr.commit()
+        _logger.info("Backup committed to database: %s with %s lines", backup.name, backup_line_count)
         
         return backup
 
@@ -1215,6 +1346,7 @@ class FifoRecalculationWizard(models.TransientModel):
             'clear_old_layers': config.clear_old_layers,
             'lock_after_recal': config.lock_after_recal,
             'batch_size': config.batch_size,
+            'parallel_workers': config.parallel_workers,
         })
         
         # Run preview first
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Test Cases for the parallel (job based) FIFO recalculation mode.
+"""
+
+from unittest.mock import patch
+
+import psycopg2
+
+from odoo.tests.common import TransactionCase
+
+
+class TestParallelRecalculation(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        self.wizard = self.env['fifo.recalculation.wizard'].create({
+            'dry_run': False,
+            'parallel_workers': 2,
+        })
+        self.Move = self.env['stock.move']
+
+    def _moves(self, *ids):
+        return [self.Move.browse(move_id) for move_id in ids]
+
+    def test_split_keeps_product_warehouses_in_one_job(self):
+        """All warehouses of a product go to the same job, jobs are balanced by moves"""
+        groups = {
+            (1, 10): self._moves(1, 2, 3),
+            (1, 20): self._moves(4, 5),
+            (2, 10): self._moves(6, 7),
+            (3, 20): self._moves(8),
+        }
+        jobs = self.wizard._split_groups_into_jobs(list(groups), groups)
+
+        self.assertEqual(len(jobs), 2)
+        job_of = {key: index for index, job in enumerate(jobs) for key in job}
+        self.assertEqual(set(job_of), set(groups))
+        self.assertEqual(job_of[(1, 10)], job_of[(1, 20)])
+        # The largest product fills one job, the two smaller ones share the other
+        self.assertEqual(job_of[(2, 10)], job_of[(3, 20)])
+        self.assertNotEqual(job_of[(1, 10)], job_of[(2, 10)])
+        self.assertEqual(jobs[job_of[(1, 10)]][(1, 10)], [1, 2, 3])
+
+    def test_split_never_creates_more_jobs_than_products(self):
+        self.wizard.parallel_workers = 8
+        groups = {(1, 10): self._moves(1), (1, 20): self._moves(2), (2, False): self._moves(3)}
+        jobs = self.wizard._split_groups_into_jobs(list(groups), groups)
+        self.assertEqual(len(jobs), 2)
+        # Combinations without moves are still assigned (their layers are deleted)
+        jobs = self.wizard._split_groups_into_jobs([(4, 10)], {})
+        self.assertEqual(jobs, [{(4, 10): []}])
+
+    def test_job_isolates_failing_group(self):
+        """A failing group is reported and does not stop the rest of the job"""
+        def delete_old_layers(wizard, combinations, log):
+            if combinations[0][0] == 2:
+                raise ValueError('broken layers')
+            return 3
+
+        with patch.object(type(self.wizard), '_delete_old_layers', delete_old_layers):
+            result = self.wizard._run_recalculation_job({(1, 10): [], (2, 10): [], (3, 10): []})
+
+        self.assertEqual(result['done'], [(1, 10), (3, 10)])
+        self.assertEqual(result['deleted'], 6)
+        self.assertEqual(result['created'], 0)
+        self.assertEqual(len(result['failed']), 1)
+        self.assertEqual(result['failed'][0][:2], [2, 10])
+        self.assertIn('broken layers', result['failed'][0][2])
+
+    def test_job_without_cursor_reports_all_groups(self):
+        """When the job cannot get a cursor, every group is reported as failed"""
+        result = self.wizard._new_job_result()
+        with patch.object(type(self.registry), 'cursor',
+                          side_effect=psycopg2.OperationalError('connection pool exhausted')):
+            self.wizard._run_recalculation_job({(1, 10): [], (2, False): []}, result)
+
+        self.assertFalse(result['done'])
+        self.assertEqual(
+            [failed[:2] for failed in result['failed']],
+            [[1, 10], [2, False]],
+        )
+        self.assertIn('JOB ABORTED', result['log'][0])
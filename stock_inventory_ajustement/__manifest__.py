@@ -5,7 +5,7 @@
 
 {
     "name": "buz Stock Inventory Adjustment",
-    "version": "17.0.0.0.0",
+    "version": "17.0.0.0.1",
     "license": "LGPL-3",
     "category": "Inventory/Inventory",
     "summary": "Allows to do an easier follow up of the Inventory Adjustments",
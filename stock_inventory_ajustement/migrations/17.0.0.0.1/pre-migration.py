@@ -0,0 +1,30 @@
+"""
+Pre-migration script for stock_inventory_ajustement
+Stores the difference of inventory lines in SQL before the ORM sees the field
+"""
+
+import logging
+
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Create and fill stock_inventory_line.difference_qty
+
+    Without the column, the ORM would recompute the new stored field line by
+    line on upgrade.
+    """
+    if column_exists(cr, 'stock_inventory_line', 'difference_qty'):
+        return
+    cr.execute("ALTER TABLE stock_inventory_line ADD COLUMN difference_qty numeric")
+    cr.execute("""
+        UPDATE stock_inventory_line line
+           SET difference_qty = ROUND(
+                   (COALESCE(line.product_qty, 0) - COALESCE(line.theoretical_qty, 0)) / uom.rounding
+               ) * uom.rounding
+          FROM uom_uom uom
+         WHERE uom.id = line.product_uom_id
+    """)
+    _logger.info("Stored difference_qty on %s inventory lines", cr.rowcount)
@@ -5,10 +5,15 @@ from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
 from odoo.osv import expression
 from odoo.osv import expression
-from odoo.tools import float_compare, float_is_zero
+from odoo.tools import float_compare, float_round, split_every
+from odoo.tools.sql import create_index
 import logging
+import time
 _logger = logging.getLogger(__name__)
 
+# Number of products whose inventory lines are inserted per statement
+DEFAULT_LINE_BATCH_SIZE = 1000
+
 
 READONLY_STATES = {
     "draft": [("readonly", False)],
@@ -521,39 +526,63 @@ class InventoryAdjustmentsGroup(models.Model):
         result["context"] = {}
         return result
 
-    def _check_inventory_in_progress_not_override(self):
-        for rec in self:
-            if rec.state == "in_progress":
-                location_condition = [
-                    (
-                        "location_ids",
-                        "child_of" if not rec.exclude_sublocation else "in",
-                        rec.location_ids.ids,
+    def _get_overlapping_inventories(self):
+        """Return the in-progress inventories sharing a location with these ones
+
+        When an inventory has products, only inventories sharing one of them
+        are returned. Runs one query for the whole recordset on the relation
+        tables of `location_ids` and `product_ids`.
+        """
+        records = self.filtered(lambda rec: rec.state == "in_progress")
+        if not records:
+            return self.browse()
+        self.flush_model(["state", "location_ids", "product_ids"])
+        locations = self._fields["location_ids"]
+        products = self._fields["product_ids"]
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT other.id
+              FROM {loc_rel} rec_loc
+              JOIN {loc_rel} other_loc
+                ON other_loc.{loc_col2} = rec_loc.{loc_col2}
+               AND other_loc.{loc_col1} != rec_loc.{loc_col1}
+              JOIN stock_inventory other
+                ON other.id = other_loc.{loc_col1}
+               AND other.state = 'in_progress'
+             WHERE rec_loc.{loc_col1} = ANY(%s)
+               AND (
+                    NOT EXISTS (
+                        SELECT 1 FROM {prod_rel} rp WHERE rp.{prod_col1} = rec_loc.{loc_col1}
                     )
-                ]
-                if rec.product_ids:
-                    product_condition = [
-                        ("state", "=", "in_progress"),
-                        ("id", "!=", rec.id),
-                        ("product_ids", "in", rec.product_ids.ids),
-                    ] + location_condition
-                    inventories = self.search(product_condition)
-                else:
-                    inventories = self.search(
-                        [("state", "=", "in_progress"), ("id", "!=", rec.id)]
-                        + location_condition
+                    OR EXISTS (
+                        SELECT 1
+                          FROM {prod_rel} rp
+                          JOIN {prod_rel} op ON op.{prod_col2} = rp.{prod_col2}
+                         WHERE rp.{prod_col1} = rec_loc.{loc_col1}
+                           AND op.{prod_col1} = other.id
                     )
-                for inventory in inventories:
-                    if any(
-                        i in inventory.location_ids.ids for i in rec.location_ids.ids
-                    ):
-                        raise ValidationError(
-                            _(
-                                "Cannot have more than one in-progress inventory "
-                                "adjustment affecting the same location or product "
-                                "at the same time."
-                            )
-                        )
+               )
+            """.format(
+                loc_rel=locations.relation,
+                loc_col1=locations.column1,
+                loc_col2=locations.column2,
+                prod_rel=products.relation,
+                prod_col1=products.column1,
+                prod_col2=products.column2,
+            ),
+            [records.ids],
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _check_inventory_in_progress_not_override(self):
+        if self._get_overlapping_inventories():
+            raise ValidationError(
+                _(
+                    "Cannot have more than one in-progress inventory "
+                    "adjustment affecting the same location or product "
+                    "at the same time."
+                )
+            )
 
     @api.constrains("product_selection", "product_ids")
     def _check_one_product_in_product_selection(self):
@@ -611,9 +640,99 @@ class InventoryAdjustmentsGroup(models.Model):
                 'date': fields.Datetime.now()
             }
             if not inventory.line_ids and not inventory.start_empty:
-                self.env['stock.inventory.line'].create(inventory._get_inventory_lines_values())
+                inventory._generate_inventory_lines()
             inventory.write(vals)
 
+    def _get_line_batch_size(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'stock_inventory_ajustement.line_batch_size', DEFAULT_LINE_BATCH_SIZE))
+
+    def _get_quant_filter_sql(self):
+        """SQL condition and parameters selecting the quants counted by this inventory
+
+        Mirrors the domain of `_get_quantities`. Sub-locations are matched on
+        `parent_path` instead of expanding `child_of` into an id list.
+        """
+        self.ensure_one()
+        conditions = ["q.company_id = %(company_id)s", "q.quantity != 0"]
+        params = {'company_id': self.company_id.id}
+        if self.location_ids:
+            conditions.append("""EXISTS (
+                SELECT 1 FROM stock_location root
+                 WHERE root.id = ANY(%(location_ids)s)
+                   AND loc.parent_path LIKE root.parent_path || '%%')""")
+            params['location_ids'] = self.location_ids.ids
+        else:
+            conditions.append("loc.company_id = %(company_id)s")
+            conditions.append("loc.usage IN ('internal', 'transit')")
+        if self.prefill_counted_quantity == 'zero':
+            conditions.append("pp.active")
+        if self.product_ids:
+            conditions.append("q.product_id = ANY(%(product_ids)s)")
+            params['product_ids'] = self.product_ids.ids
+        return ' AND '.join(conditions), params
+
+    def _generate_inventory_lines(self):
+        """Create the inventory lines straight from `stock_quant`
+
+        Lines are inserted with one `INSERT ... SELECT` per batch of products,
+        quantities never travel through Python. Progress is logged per batch.
+        """
+        self.ensure_one()
+        Line = self.env['stock.inventory.line']
+        self.env['stock.quant'].flush_model()
+        self.env['stock.location'].flush_model(['parent_path', 'company_id', 'usage'])
+        self.env['product.product'].flush_model(['active'])
+        self.flush_recordset()
+        condition, params = self._get_quant_filter_sql()
+        from_clause = """
+              FROM stock_quant q
+              JOIN stock_location loc ON loc.id = q.location_id
+              JOIN product_product pp ON pp.id = q.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+              JOIN uom_uom uom ON uom.id = pt.uom_id
+             WHERE """ + condition
+        self.env.cr.execute("SELECT DISTINCT q.product_id" + from_clause, params)
+        product_ids = [row[0] for row in self.env.cr.fetchall()]
+
+        started = time.monotonic()
+        now = fields.Datetime.now()
+        params.update({
+            'inventory_id': self.id,
+            'zero': self.prefill_counted_quantity == 'zero',
+            'uid': self.env.uid,
+            'now': now,
+        })
+        created = 0
+        done = 0
+        for batch in split_every(self._get_line_batch_size(), product_ids, list):
+            params['batch'] = batch
+            self.env.cr.execute("""
+                INSERT INTO stock_inventory_line (
+                    inventory_id, company_id, product_id, product_uom_id, categ_id,
+                    location_id, prod_lot_id, package_id, partner_id,
+                    theoretical_qty, product_qty, difference_qty, inventory_date,
+                    create_uid, create_date, write_uid, write_date)
+                SELECT %(inventory_id)s, %(company_id)s, q.product_id, pt.uom_id, pt.categ_id,
+                       q.location_id, q.lot_id, q.package_id, q.owner_id,
+                       SUM(q.quantity), CASE WHEN %(zero)s THEN 0 ELSE SUM(q.quantity) END,
+                       -- Rounded to the UoM like _compute_difference
+                       CASE WHEN %(zero)s THEN ROUND(-SUM(q.quantity) / uom.rounding) * uom.rounding
+                            ELSE 0 END, %(now)s,
+                       %(uid)s, %(now)s, %(uid)s, %(now)s
+            """ + from_clause + """
+                   AND q.product_id = ANY(%(batch)s)
+                 GROUP BY q.product_id, pt.uom_id, uom.rounding, pt.categ_id, q.location_id,
+                          q.lot_id, q.package_id, q.owner_id
+            """, params)
+            created += self.env.cr.rowcount
+            done += len(batch)
+            _logger.info('%s: %s/%s products, %s inventory lines created (%.1fs)',
+                         self.name, done, len(product_ids), created, time.monotonic() - started)
+        Line.invalidate_model()
+        self.invalidate_recordset(['line_ids'])
+        return created
+
     def _get_inventory_lines_values(self):
         """Return the values of the inventory lines to create for this inventory.
 
@@ -622,6 +741,8 @@ class InventoryAdjustmentsGroup(models.Model):
         """
         self.ensure_one()
         quants_groups = self._get_quantities()
+        products = self.env['product.product'].browse({key[0] for key in quants_groups})
+        uom_by_product = {product.id: product.uom_id.id for product in products}
         vals = []
         for (product_id, location_id, lot_id, package_id, owner_id), quantity in quants_groups.items():
             line_values = {
@@ -634,7 +755,7 @@ class InventoryAdjustmentsGroup(models.Model):
                 'location_id': location_id,
                 'package_id': package_id
             }
-            line_values['product_uom_id'] = self.env['product.product'].browse(product_id).uom_id.id
+            line_values['product_uom_id'] = uom_by_product[product_id]
             vals.append(line_values)
         
         return vals
@@ -648,14 +769,13 @@ class InventoryAdjustmentsGroup(models.Model):
         """
         self.ensure_one()
         if self.location_ids:
-            domain_loc = [('id', 'child_of', self.location_ids.ids)]
+            domain_loc = [('location_id', 'child_of', self.location_ids.ids)]
         else:
-            domain_loc = [('company_id', '=', self.company_id.id), ('usage', 'in', ['internal', 'transit'])]
-        locations_ids = [l['id'] for l in self.env['stock.location'].search_read(domain_loc, ['id'])]
+            domain_loc = [('location_id.company_id', '=', self.company_id.id),
+                          ('location_id.usage', 'in', ['internal', 'transit'])]
 
         domain = [('company_id', '=', self.company_id.id),
-                  ('quantity', '!=', '0'),
-                  ('location_id', 'in', locations_ids)]
+                  ('quantity', '!=', '0')] + domain_loc
         if self.prefill_counted_quantity == 'zero':
             domain.append(('product_id.active', '=', True))
 
@@ -751,7 +871,7 @@ class InventoryAdjustmentsLine(models.Model):
     theoretical_qty = fields.Float('Theoretical Quantity',digits='Product Unit of Measure', readonly=True)
 
     difference_qty = fields.Float('Difference', compute='_compute_difference', readonly=True, digits='Product Unit of Measure',
-        search="_search_difference_qty",
+        store=True,
         help="Indicates the gap between the product's theoretical quantity and its newest quantity.",)
 
     inventory_date = fields.Datetime('Inventory Date', readonly=True,
@@ -762,10 +882,27 @@ class InventoryAdjustmentsLine(models.Model):
 
 
 
-    @api.depends('product_qty', 'theoretical_qty')
+    def init(self):
+        super().init()
+        # Backs the set-based duplicate check in `_check_no_duplicate_line`
+        create_index(
+            self._cr, 'stock_inventory_line_duplicate_index', self._table,
+            ['inventory_id', 'product_id', 'location_id'],
+        )
+        # Lines with a difference to review, stays small on large counts
+        create_index(
+            self._cr, 'stock_inventory_line_difference_index', self._table,
+            ['inventory_id'], where='difference_qty != 0',
+        )
+
+    @api.depends('product_qty', 'theoretical_qty', 'product_uom_id.rounding')
     def _compute_difference(self):
         for line in self:
-            line.difference_qty = line.product_qty - line.theoretical_qty
+            difference = line.product_qty - line.theoretical_qty
+            if line.product_uom_id:
+                # Rounded so that "no difference" is stored as an exact zero
+                difference = float_round(difference, precision_rounding=line.product_uom_id.rounding)
+            line.difference_qty = difference
 
 
     @api.onchange('product_id', 'location_id', 'product_uom_id', 'prod_lot_id', 'partner_id', 'package_id')
@@ -847,19 +984,27 @@ class InventoryAdjustmentsLine(models.Model):
         return res
 
     def _check_no_duplicate_line(self):
-        for line in self:
-            domain = [
-                ('id', '!=', line.id),
-                ('product_id', '=', line.product_id.id),
-                ('location_id', '=', line.location_id.id),
-                ('partner_id', '=', line.partner_id.id),
-                ('package_id', '=', line.package_id.id),
-                ('prod_lot_id', '=', line.prod_lot_id.id),
-                ('inventory_id', '=', line.inventory_id.id)]
-            existings = self.search_count(domain)
-            if existings:
-                raise UserError(_("There is already one inventory adjustment line for this product,"
-                                  " you should rather modify this one instead of creating a new one."))
+        """Check the lines against every line of their inventories in one query"""
+        if not self:
+            return
+        self.flush_model(['inventory_id', 'product_id', 'location_id', 'partner_id', 'package_id', 'prod_lot_id'])
+        self.env.cr.execute("""
+            SELECT line.id
+              FROM stock_inventory_line line
+              JOIN stock_inventory_line other
+                ON other.inventory_id = line.inventory_id
+               AND other.product_id = line.product_id
+               AND other.location_id = line.location_id
+               AND other.partner_id IS NOT DISTINCT FROM line.partner_id
+               AND other.package_id IS NOT DISTINCT FROM line.package_id
+               AND other.prod_lot_id IS NOT DISTINCT FROM line.prod_lot_id
+               AND other.id != line.id
+             WHERE line.id = ANY(%s)
+             LIMIT 1
+        """, [self.ids])
+        if self.env.cr.fetchone():
+            raise UserError(_("There is already one inventory adjustment line for this product,"
+                              " you should rather modify this one instead of creating a new one."))
 
     @api.constrains('product_id')
     def _check_product_id(self):
@@ -869,14 +1014,3 @@ class InventoryAdjustmentsLine(models.Model):
         for line in self:
             if line.product_id.type != 'product':
                 raise ValidationError(_("You can only adjust storable products.") + '\n\n%s -> %s' % (line.product_id.display_name, line.product_id.type))
-
-    def _search_difference_qty(self, operator, value):
-        if operator == '=':
-            result = True
-        elif operator == '!=':
-            result = False
-        else:
-            raise NotImplementedError()
-        lines = self.search([('inventory_id', '=', self.env.context.get('default_inventory_id'))])
-        line_ids = lines.filtered(lambda line: float_is_zero(line.difference_qty, line.product_id.uom_id.rounding) == result).ids
-        return [('id', 'in', line_ids)]
@@ -589,3 +589,69 @@ class TestStockInventory(TransactionCase):
             ).current_inventory_id,
             inventory2,
         )
+
+    def test_14_start_generates_lines_from_quants(self):
+        inventory = self.inventory_model.create(
+            {
+                "name": "Inventory start",
+                "product_selection": "all",
+                "location_ids": [(6, 0, [self.location1.id])],
+            }
+        )
+        expected = sorted(
+            (
+                vals["product_id"],
+                vals["location_id"],
+                vals["prod_lot_id"],
+                vals["product_uom_id"],
+                vals["theoretical_qty"],
+                vals["product_qty"],
+            )
+            for vals in inventory._get_inventory_lines_values()
+        )
+        self.env["ir.config_parameter"].sudo().set_param(
+            "stock_inventory_ajustement.line_batch_size", 1
+        )
+        inventory.action_start()
+        self.assertEqual(inventory.state, "validation1")
+        lines = sorted(
+            (
+                line.product_id.id,
+                line.location_id.id,
+                line.prod_lot_id.id,
+                line.product_uom_id.id,
+                line.theoretical_qty,
+                line.product_qty,
+            )
+            for line in inventory.line_ids
+        )
+        self.assertEqual(lines, expected)
+        # Sub-location quants are included, one line per product/location/lot
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(inventory.line_ids.company_id, inventory.company_id)
+
+    def test_15_duplicate_lines_and_stored_difference(self):
+        inventory = self.inventory_model.create(
+            {
+                "name": "Inventory duplicates",
+                "product_selection": "all",
+                "location_ids": [(6, 0, [self.location1.id])],
+            }
+        )
+        inventory.action_start()
+        line = inventory.line_ids.filtered(lambda l: not l.prod_lot_id)[:1]
+        with self.assertRaises(UserError):
+            self.env["stock.inventory.line"].create(
+                {
+                    "inventory_id": inventory.id,
+                    "product_id": line.product_id.id,
+                    "location_id": line.location_id.id,
+                    "product_uom_id": line.product_uom_id.id,
+                }
+            )
+        line.product_qty = line.theoretical_qty + 2
+        with_difference = self.env["stock.inventory.line"].search(
+            [("inventory_id", "=", inventory.id), ("difference_qty", "!=", 0)]
+        )
+        self.assertEqual(with_difference, line)
+        self.assertEqual(line.difference_qty, 2)
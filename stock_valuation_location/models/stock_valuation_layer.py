@@ -1,8 +1,16 @@
 import logging
+import time
+
 from odoo import api, fields, models
+from odoo.tools.sql import create_index
 
 _logger = logging.getLogger(__name__)
 
+# Number of SVL ids updated (and committed) per backfill chunk
+DEFAULT_BACKFILL_CHUNK_SIZE = 50000
+# Last SVL id processed by an interrupted backfill, the next run resumes from it
+BACKFILL_CURSOR_PARAM = "stock_valuation_location.backfill_last_id"
+
 class StockValuationLayer(models.Model):
     _inherit = "stock.valuation.layer"
 
@@ -42,6 +50,16 @@ class StockValuationLayer(models.Model):
         help="Warehouse of the location"
     )
 
+    def init(self):
+        super().init()
+        # Per-location valuation reports filter and group by location and product
+        create_index(
+            self._cr,
+            "stock_valuation_layer_location_product_index",
+            self._table,
+            ["location_id", "product_id"],
+        )
+
     @api.depends("stock_move_id")
     def _compute_location_id(self):
         """Compute location_id with memory-efficient batch processing."""
@@ -94,23 +112,99 @@ class StockValuationLayer(models.Model):
                 if location_usage.get(loc_id) in ('internal', 'transit'):
                     svl.location_id = loc_id
 
+    @api.model
+    def _get_backfill_chunk_size(self):
+        return int(self.env["ir.config_parameter"].sudo().get_param(
+            "stock_valuation_location.backfill_chunk_size", DEFAULT_BACKFILL_CHUNK_SIZE))
+
+    @api.model
+    def _backfill_location_chunk(self, from_id, to_id):
+        """Set the location (and its related fields) of SVLs with from_id < id <= to_id in SQL.
+
+        Same rule as _compute_location_id: the source location of the move if
+        it is internal or transit, otherwise its destination location.
+        Only rows whose location changes are written.
+        """
+        self.env.cr.execute(
+            """
+            WITH target AS (
+                SELECT svl.id, COALESCE(src.id, dest.id) AS location_id
+                  FROM stock_valuation_layer svl
+                  JOIN stock_move sm ON sm.id = svl.stock_move_id
+             LEFT JOIN stock_location src
+                    ON src.id = sm.location_id AND src.usage IN ('internal', 'transit')
+             LEFT JOIN stock_location dest
+                    ON dest.id = sm.location_dest_id AND dest.usage IN ('internal', 'transit')
+                 WHERE svl.id > %(from_id)s AND svl.id <= %(to_id)s
+            )
+            UPDATE stock_valuation_layer svl
+               SET location_id = loc.id,
+                   location_complete_name = loc.complete_name,
+                   location_type = loc.usage,
+                   warehouse_id = loc.warehouse_id
+              FROM target
+         LEFT JOIN stock_location loc ON loc.id = target.location_id
+             WHERE svl.id = target.id
+               AND svl.location_id IS DISTINCT FROM target.location_id
+            """,
+            {"from_id": from_id, "to_id": to_id},
+        )
+        return self.env.cr.rowcount
+
+    @api.model
+    def _backfill_location(self, chunk_size=None):
+        """Backfill the location of all SVLs with chunked SQL updates.
+
+        Every chunk covers an id range and is committed on its own; the last
+        processed id is kept in BACKFILL_CURSOR_PARAM so an interrupted run
+        resumes where it stopped. Returns the number of updated rows.
+        """
+        chunk_size = chunk_size or self._get_backfill_chunk_size()
+        ICP = self.env["ir.config_parameter"].sudo()
+        self.env["stock.move"].flush_model(["location_id", "location_dest_id"])
+        self.env["stock.location"].flush_model(["usage", "complete_name", "warehouse_id"])
+        self.flush_model()
+
+        self.env.cr.execute("SELECT MAX(id) FROM stock_valuation_layer WHERE stock_move_id IS NOT NULL")
+        max_id = self.env.cr.fetchone()[0] or 0
+        last_id = int(ICP.get_param(BACKFILL_CURSOR_PARAM, 0))
+        if last_id:
+            _logger.info("Resuming SVL location backfill after id %s", last_id)
+
+        updated = 0
+        started = time.monotonic()
+        while last_id < max_id:
+            to_id = min(last_id + chunk_size, max_id)
+            updated += self._backfill_location_chunk(last_id, to_id)
+            last_id = to_id
+            ICP.set_param(BACKFILL_CURSOR_PARAM, last_id)
+            self.env.cr.commit()
+            _logger.info(
+                "SVL location backfill: id %s/%s, %s rows updated (%.1fs)",
+                last_id, max_id, updated, time.monotonic() - started,
+            )
+
+        ICP.set_param(BACKFILL_CURSOR_PARAM, False)
+        self.env.cr.commit()
+        self.invalidate_model(["location_id", "location_complete_name", "location_type", "warehouse_id"])
+        return updated
+
     def action_recompute_location(self):
         """
         Manual recompute action for selected records or all records.
         Can be called from UI or programmatically.
+        Without a selection all layers are backfilled with chunked SQL updates.
         """
         if not self:
-            # If no records selected, recompute all
-            self = self.search([('stock_move_id', '!=', False)])
-        
-        if not self:
+            updated = self._backfill_location()
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {
-                    'title': 'No Records',
-                    'message': 'No stock valuation layers found to recompute.',
-                    'type': 'info',
+                    'title': 'Recompute Complete',
+                    'message': f'Successfully updated location for {updated} stock valuation layers.',
+                    'type': 'success',
+                    'sticky': False,
                 }
             }
         